@@ -1,32 +1,86 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from utils.config import Config
-from routes.users import users_bp
-from routes.problems import problems_bp
-from routes.recommendations import recommendations_bp
 from services.database import init_db
+from services.admission import init_admission
+from services.metrics import instrument_app
+from services.profiler import init_profiler
+from services.resilience import init_stale_marking
+from services.warmup import warmup
+from utils.compression import init_compression
+from utils.json_provider import init_json
 
-app = Flask(__name__)
-app.config.from_object(Config)
-CORS(app)
 
-# Register blueprints
-app.register_blueprint(users_bp, url_prefix='/api/users')
-app.register_blueprint(problems_bp, url_prefix='/api/problems')
-app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
+def create_app(config=Config):
+    """Build the Flask app (WSGI servers: `gunicorn 'app:create_app()'`).
 
-@app.route('/')
-def home():
-    return jsonify({
-        "message": "CF Recommender API",
-        "version": "1.0.0",
-        "status": "running"
-    })
+    Creates missing tables, so this also happens under a server and not only
+    via `python app.py`, then warms the worker: NumPy and the memory-mapped
+    catalog snapshot load in the background while the first requests are
+    already served. /api/ready turns 200 once warm.
+    """
+    # No default /static route: /static/ belongs to the frontend build
+    app = Flask(__name__, static_folder=None)
+    app.config.from_object(config)
+    init_json(app)
+    CORS(app)
+
+    init_db()
+
+    if config.METRICS_ENABLED:
+        instrument_app(app)
+    init_profiler(app)
+    init_stale_marking(app)
+    # Registered first so it runs last, after admission cached the plain body
+    init_compression(app)
+    init_admission(app)
+
+    # Blueprints pull in the service modules and their globals; imported
+    # here so importing this module has no side effects
+    from routes.users import users_bp
+    from routes.problems import problems_bp
+    from routes.recommendations import recommendations_bp
+    from routes.jobs import jobs_bp
+    from routes.metrics import metrics_bp
+    from routes.profiles import profiles_bp
+    from routes.frontend import frontend_bp, frontend_available
+
+    # Register blueprints
+    app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(problems_bp, url_prefix='/api/problems')
+    app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+    app.register_blueprint(profiles_bp, url_prefix='/api/profiles')
+
+    def home():
+        return jsonify({
+            "message": "CF Recommender API",
+            "version": "1.0.0",
+            "status": "running"
+        })
+
+    app.add_url_rule('/api', 'home', home)
+    if frontend_available():
+        # The built React app owns / and every non-API path
+        app.register_blueprint(frontend_bp)
+    else:
+        app.add_url_rule('/', 'index', home)
+
+    @app.route('/api/health')
+    def health_check():
+        return jsonify({"status": "healthy"})
+
+    @app.route('/api/ready')
+    def readiness_check():
+        """Readiness probe: 503 until the worker finished warming up"""
+        status = warmup.status()
+        return jsonify(status), 200 if status['ready'] else 503
+
+    warmup.start(background=config.WARMUP_IN_BACKGROUND)
+
+    return app
 
-@app.route('/api/health')
-def health_check():
-    return jsonify({"status": "healthy"})
 
 if __name__ == '__main__':
-    init_db()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,113 @@
+import contextlib
+import re
+import time
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from app import create_app
+from routes import async_users, async_recommendations
+from services.admission import admission, client_key
+from services.async_codeforces_api import async_cf_api
+from services.metrics import metrics
+from services.resilience import is_stale, reset_stale
+from utils.compression import compress_starlette_response
+from utils.config import Config
+from utils.responses import json_response
+
+# Flask-style rule for metric labels: {cf_handle} -> <cf_handle>, {id:int} -> <int:id>
+_PARAM = re.compile(r'\{(\w+)(?::(\w+))?\}')
+
+
+def _rule(path):
+    return _PARAM.sub(lambda m: f"<{m.group(2)}:{m.group(1)}>" if m.group(2) else f"<{m.group(1)}>", path)
+
+
+def _shed_response(rejection):
+    if rejection.cached is not None:
+        body, content_type = rejection.cached
+        response = Response(body, media_type=content_type)
+    else:
+        response = json_response(rejection.body(), rejection.status_code)
+    response.headers.update(rejection.headers())
+    return response
+
+
+async def _admitted(gate, endpoint, request):
+    """Run endpoint once the route's gate admits the request"""
+    url = request.url.path + ('?' + request.url.query if request.url.query else '')
+    client = client_key(request.client.host if request.client else None, request.headers.get('x-forwarded-for'))
+    rejection = await admission.admit_async(gate, client, url)
+    if rejection is not None:
+        return _shed_response(rejection)
+
+    started = time.perf_counter()
+    try:
+        response = await endpoint(request)
+    finally:
+        gate.release(time.perf_counter() - started)
+    if 'content-encoding' not in response.headers and not is_stale():
+        admission.remember(url, response.status_code, response.body, response.headers.get('content-type'))
+    return response
+
+
+def _instrumented(route):
+    """Same route with latency metrics, stale-data headers and admission control.
+
+    Requests passed through to Flask are covered by its own request hooks.
+    """
+    endpoint = route.endpoint
+    labels = {'route': _rule(route.path), 'blueprint': route.path.split('/')[2]}
+    gate = admission.gate_for(labels['route'])
+
+    async def handler(request):
+        reset_stale()
+        start = time.perf_counter()
+        if Config.METRICS_ENABLED:
+            metrics.add_gauge('http_requests_in_flight', 1)
+        status = 500
+        try:
+            if gate is not None:
+                response = await _admitted(gate, endpoint, request)
+            else:
+                response = await endpoint(request)
+            status = response.status_code
+            compress_starlette_response(response, request.headers.get('accept-encoding'))
+            if is_stale():
+                response.headers['X-Upstream-Stale'] = 'true'
+                response.headers['Warning'] = '110 - "Response is Stale"'
+            return response
+        finally:
+            if Config.METRICS_ENABLED:
+                request_labels = {**labels, 'method': request.method}
+                metrics.add_gauge('http_requests_in_flight', -1)
+                metrics.observe('http_request_duration_seconds', time.perf_counter() - start, request_labels)
+                metrics.inc('http_requests_total', {**request_labels, 'status': str(status)})
+
+    return Route(route.path, handler, methods=route.methods, name=endpoint.__name__)
+
+
+flask_app = create_app()
+# Config.DEBUG is for the app.py dev server only
+flask_app.debug = False
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await async_cf_api.close()
+
+
+# Async routes first; any other path falls through to the Flask app, run on
+# a bounded thread pool (SERVER_THREADS) by the WSGI adapter
+app = Starlette(
+    routes=[_instrumented(route) for route in async_users.routes + async_recommendations.routes] + [
+        Mount('/', app=WSGIMiddleware(flask_app, workers=Config.SERVER_THREADS))
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan
+)
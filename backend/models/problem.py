@@ -1,7 +1,49 @@
 from services.database import get_db_connection
+from functools import lru_cache
 import json
 
+PROBLEM_URL = 'https://codeforces.com/contest/{}/problem/{}'
+
+@lru_cache(maxsize=4096)
+def _decode_tags(raw):
+    # The catalog has a few thousand distinct tag combinations, so most rows
+    # hit the cache instead of running json.loads again
+    return tuple(json.loads(raw)) if raw else ()
+
+def decode_tags(raw):
+    """Tag list from the stored JSON (a fresh list, safe to mutate)"""
+    return list(_decode_tags(raw))
+
+def problem_url(contest_id, index):
+    return PROBLEM_URL.format(contest_id, index)
+
+def fetch_problem_dicts(conn, query, params=()):
+    """Run a problems query and return response dicts directly.
+
+    Rows go straight from SQLite tuples to dicts (tags decoded, url added)
+    without an intermediate sqlite3.Row or Problem per row.
+    """
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    has_tags = 'tags' in columns
+    has_url = 'contest_id' in columns and 'index' in columns
+
+    def to_dict(cursor, row):
+        problem = dict(zip(columns, row))
+        if has_tags:
+            problem['tags'] = decode_tags(problem['tags'])
+        if has_url:
+            problem['url'] = PROBLEM_URL.format(problem['contest_id'], problem['index'])
+        return problem
+
+    # Applied at fetch time, so it can be installed once the columns are known
+    cursor.row_factory = to_dict
+    return cursor.fetchall()
+
 class Problem:
+    __slots__ = ('id', 'contest_id', 'index', 'name', 'type', 'rating', '_tags', '_raw_tags', 'solved_count', '_url')
+
     def __init__(self, id=None, contest_id=None, index=None, name=None, type=None, rating=None, tags=None, solved_count=None):
         self.id = id
         self.contest_id = contest_id
@@ -9,8 +51,40 @@ class Problem:
         self.name = name
         self.type = type
         self.rating = rating
-        self.tags = tags if isinstance(tags, list) else (json.loads(tags) if tags else [])
+        # JSON tags are only decoded when first read
+        self._tags = tags if isinstance(tags, list) else None
+        self._raw_tags = None if isinstance(tags, list) else tags
         self.solved_count = solved_count
+        self._url = None
+
+    @property
+    def tags(self):
+        if self._tags is None:
+            self._tags = decode_tags(self._raw_tags)
+        return self._tags
+
+    @tags.setter
+    def tags(self, value):
+        self._tags = value
+
+    @property
+    def url(self):
+        if self._url is None:
+            self._url = PROBLEM_URL.format(self.contest_id, self.index)
+        return self._url
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            id=row['id'],
+            contest_id=row['contest_id'],
+            index=row['index'],
+            name=row['name'],
+            type=row['type'],
+            rating=row['rating'],
+            tags=row['tags'],
+            solved_count=row['solved_count']
+        )
 
     @staticmethod
     def create(contest_id, index, name, type, rating, tags, solved_count=0):
@@ -21,7 +95,7 @@ class Problem:
         
         conn = get_db_connection()
         conn.execute('''
-            INSERT OR REPLACE INTO problems 
+            INSERT OR REPLACE INTO problems
             (id, contest_id, `index`, name, type, rating, tags, solved_count)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
@@ -49,23 +123,11 @@ class Problem:
         conn.close()
         
         if problem:
-            return Problem(
-                id=problem['id'],
-                contest_id=problem['contest_id'],
-                index=problem['index'],
-                name=problem['name'],
-                type=problem['type'],
-                rating=problem['rating'],
-                tags=problem['tags'],
-                solved_count=problem['solved_count']
-            )
+            return Problem.from_row(problem)
         return None
 
     @staticmethod
-    def search(rating_min=None, rating_max=None, tags=None, limit=20, offset=0):
-        """Search problems with filters"""
-        conn = get_db_connection()
-        
+    def _search_query(rating_min=None, rating_max=None, tags=None, limit=20, offset=0):
         query = 'SELECT * FROM problems WHERE rating IS NOT NULL'
         params = []
         
@@ -85,20 +147,29 @@ class Problem:
         
         query += ' ORDER BY solved_count DESC LIMIT ? OFFSET ?'
         params.extend([limit, offset])
+        return query, params
+
+    @staticmethod
+    def search(rating_min=None, rating_max=None, tags=None, limit=20, offset=0):
+        """Search problems with filters"""
+        query, params = Problem._search_query(rating_min, rating_max, tags, limit, offset)
         
+        conn = get_db_connection()
         problems = conn.execute(query, params).fetchall()
         conn.close()
         
-        return [Problem(
-            id=p['id'],
-            contest_id=p['contest_id'],
-            index=p['index'],
-            name=p['name'],
-            type=p['type'],
-            rating=p['rating'],
-            tags=p['tags'],
-            solved_count=p['solved_count']
-        ) for p in problems]
+        return [Problem.from_row(p) for p in problems]
+
+    @staticmethod
+    def search_dicts(rating_min=None, rating_max=None, tags=None, limit=20, offset=0):
+        """Same as search(), but returns response dicts without building objects"""
+        query, params = Problem._search_query(rating_min, rating_max, tags, limit, offset)
+        
+        conn = get_db_connection()
+        try:
+            return fetch_problem_dicts(conn, query, params)
+        finally:
+            conn.close()
 
     def to_dict(self):
         """Convert problem to dictionary"""
@@ -111,5 +182,5 @@ class Problem:
             'rating': self.rating,
             'tags': self.tags,
             'solved_count': self.solved_count,
-            'url': f"https://codeforces.com/contest/{self.contest_id}/problem/{self.index}"
+            'url': self.url
         }
@@ -1,8 +1,12 @@
 from services.database import get_db_connection
-import json
+from models.problem import fetch_problem_dicts
+from utils.config import Config
 from datetime import datetime
+import time
 
 class Recommendation:
+    __slots__ = ('id', 'user_id', 'problem_id', 'score', 'reason', 'created_at')
+
     def __init__(self, id=None, user_id=None, problem_id=None, score=None, reason=None, created_at=None):
         self.id = id
         self.user_id = user_id
@@ -26,28 +30,34 @@ class Recommendation:
         
         return recommendation_id
 
+    @staticmethod
+    def create_many(rows):
+        """Insert (user_id, problem_id, score, reason) rows in one transaction"""
+        conn = get_db_connection()
+        try:
+            conn.executemany('''
+                INSERT INTO recommendations (user_id, problem_id, score, reason)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+        finally:
+            conn.close()
+
     @staticmethod
     def get_by_user(user_id, limit=10):
         """Get recommendations for a user"""
         conn = get_db_connection()
-        recommendations = conn.execute('''
-            SELECT r.*, p.contest_id, p.index, p.name, p.rating, p.tags
+        recommendations = fetch_problem_dicts(conn, '''
+            SELECT r.*, p.contest_id, p.`index`, p.name, p.rating, p.tags
             FROM recommendations r
             JOIN problems p ON r.problem_id = p.id
             WHERE r.user_id = ?
             ORDER BY r.created_at DESC
             LIMIT ?
-        ''', (user_id, limit)).fetchall()
+        ''', (user_id, limit))
         conn.close()
         
-        result = []
-        for rec in recommendations:
-            rec_dict = dict(rec)
-            rec_dict['tags'] = json.loads(rec_dict['tags']) if rec_dict['tags'] else []
-            rec_dict['url'] = f"https://codeforces.com/contest/{rec_dict['contest_id']}/problem/{rec_dict['index']}"
-            result.append(rec_dict)
-        
-        return result
+        return recommendations
 
     @staticmethod
     def get_daily_recommendations(user_id, date=None):
@@ -56,53 +66,109 @@ class Recommendation:
             date = datetime.now().date()
         
         conn = get_db_connection()
-        recommendations = conn.execute('''
-            SELECT r.*, p.contest_id, p.index, p.name, p.rating, p.tags
+        recommendations = fetch_problem_dicts(conn, '''
+            SELECT r.*, p.contest_id, p.`index`, p.name, p.rating, p.tags
             FROM recommendations r
             JOIN problems p ON r.problem_id = p.id
             WHERE r.user_id = ? AND DATE(r.created_at) = ?
             ORDER BY r.score DESC
-        ''', (user_id, date)).fetchall()
+        ''', (user_id, date))
         conn.close()
         
-        result = []
-        for rec in recommendations:
-            rec_dict = dict(rec)
-            rec_dict['tags'] = json.loads(rec_dict['tags']) if rec_dict['tags'] else []
-            rec_dict['url'] = f"https://codeforces.com/contest/{rec_dict['contest_id']}/problem/{rec_dict['index']}"
-            result.append(rec_dict)
-        
-        return result
+        return recommendations
 
     @staticmethod
-    def delete_old_recommendations(days=30):
-        """Delete recommendations older than specified days"""
+    def delete_old_recommendations(days=30, chunk_size=None, rollup=None):
+        """Delete recommendations older than specified days
+        
+        Works through the created_at index a chunk at a time, each chunk in
+        its own short transaction, so concurrent writers wait for one chunk
+        instead of the whole purge. With rollup, deleted rows are first
+        folded into recommendation_daily, which get_recommendation_stats
+        still counts.
+        """
+        chunk_size = chunk_size or Config.RECOMMENDATION_RETENTION_CHUNK
+        rollup = Config.RECOMMENDATION_ROLLUP if rollup is None else rollup
+        cutoff = f'-{int(days)} days'
+        deleted = 0
+        chunks = 0
+        
         conn = get_db_connection()
-        conn.execute('''
-            DELETE FROM recommendations 
-            WHERE created_at < datetime('now', '-{} days')
-        '''.format(days))
-        conn.commit()
-        conn.close()
+        try:
+            while True:
+                ids = [row[0] for row in conn.execute('''
+                    SELECT id FROM recommendations
+                    WHERE created_at < datetime('now', ?)
+                    ORDER BY created_at
+                    LIMIT ?
+                ''', (cutoff, chunk_size)).fetchall()]
+                if not ids:
+                    break
+                
+                placeholders = ','.join('?' * len(ids))
+                if rollup:
+                    conn.execute(f'''
+                        INSERT INTO recommendation_daily
+                            (user_id, day, recommendations, scored, score_sum, last_created_at)
+                        SELECT user_id, DATE(created_at), COUNT(*), COUNT(score), TOTAL(score), MAX(created_at)
+                        FROM recommendations
+                        WHERE id IN ({placeholders})
+                        GROUP BY user_id, DATE(created_at)
+                        ON CONFLICT (user_id, day) DO UPDATE SET
+                            recommendations = recommendations + excluded.recommendations,
+                            scored = scored + excluded.scored,
+                            score_sum = score_sum + excluded.score_sum,
+                            last_created_at = MAX(last_created_at, excluded.last_created_at)
+                    ''', ids)
+                conn.execute(f'DELETE FROM recommendations WHERE id IN ({placeholders})', ids)
+                conn.commit()
+                
+                deleted += len(ids)
+                chunks += 1
+                if len(ids) < chunk_size:
+                    break
+                # Let queued writers in between chunks
+                time.sleep(Config.RECOMMENDATION_RETENTION_PAUSE)
+        finally:
+            conn.close()
+        
+        return {'deleted': deleted, 'chunks': chunks, 'rolled_up': bool(rollup)}
 
     @staticmethod
     def get_recommendation_stats(user_id):
         """Get recommendation statistics for a user"""
         conn = get_db_connection()
         
+        # Live rows plus the daily aggregates retention rolled them up into
         stats = conn.execute('''
-            SELECT 
-                COUNT(*) as total_recommendations,
-                COUNT(DISTINCT DATE(created_at)) as days_active,
-                AVG(score) as avg_score,
-                MAX(created_at) as last_recommendation
-            FROM recommendations
-            WHERE user_id = ?
-        ''', (user_id,)).fetchone()
+            SELECT
+                live.total + rolled.total as total_recommendations,
+                (SELECT COUNT(*) FROM (
+                    SELECT DATE(created_at) FROM recommendations WHERE user_id = ?
+                    UNION
+                    SELECT day FROM recommendation_daily WHERE user_id = ?
+                )) as days_active,
+                CASE WHEN live.scored + rolled.scored > 0
+                    THEN (live.score_sum + rolled.score_sum) / (live.scored + rolled.scored)
+                END as avg_score,
+                MAX(COALESCE(live.last_created_at, ''), COALESCE(rolled.last_created_at, '')) as last_recommendation
+            FROM
+                (SELECT COUNT(*) as total, COUNT(score) as scored, TOTAL(score) as score_sum,
+                        MAX(created_at) as last_created_at
+                 FROM recommendations WHERE user_id = ?) live,
+                (SELECT TOTAL(recommendations) as total, TOTAL(scored) as scored, TOTAL(score_sum) as score_sum,
+                        MAX(last_created_at) as last_created_at
+                 FROM recommendation_daily WHERE user_id = ?) rolled
+        ''', (user_id, user_id, user_id, user_id)).fetchone()
         
         conn.close()
         
-        return dict(stats) if stats else {}
+        if not stats:
+            return {}
+        stats = dict(stats)
+        stats['total_recommendations'] = int(stats['total_recommendations'])
+        stats['last_recommendation'] = stats['last_recommendation'] or None
+        return stats
 
     def to_dict(self):
         """Convert recommendation to dictionary"""
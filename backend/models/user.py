@@ -3,6 +3,8 @@ from services.codeforces_api import cf_api
 from datetime import datetime
 
 class User:
+    __slots__ = ('id', 'cf_handle', 'rating', 'max_rating', 'created_at', 'last_updated')
+
     def __init__(self, id=None, cf_handle=None, rating=None, max_rating=None, created_at=None, last_updated=None):
         self.id = id
         self.cf_handle = cf_handle
@@ -11,6 +13,17 @@ class User:
         self.created_at = created_at
         self.last_updated = last_updated
 
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            id=row['id'],
+            cf_handle=row['cf_handle'],
+            rating=row['rating'],
+            max_rating=row['max_rating'],
+            created_at=row['created_at'],
+            last_updated=row['last_updated']
+        )
+
     @staticmethod
     def create(cf_handle):
         """Create a new user by fetching data from Codeforces"""
@@ -48,14 +61,7 @@ class User:
         conn.close()
         
         if user:
-            return User(
-                id=user['id'],
-                cf_handle=user['cf_handle'],
-                rating=user['rating'],
-                max_rating=user['max_rating'],
-                created_at=user['created_at'],
-                last_updated=user['last_updated']
-            )
+            return User.from_row(user)
         return None
 
     @staticmethod
@@ -68,14 +74,7 @@ class User:
         conn.close()
         
         if user:
-            return User(
-                id=user['id'],
-                cf_handle=user['cf_handle'],
-                rating=user['rating'],
-                max_rating=user['max_rating'],
-                created_at=user['created_at'],
-                last_updated=user['last_updated']
-            )
+            return User.from_row(user)
         return None
 
     @staticmethod
@@ -85,14 +84,7 @@ class User:
         users = conn.execute('SELECT * FROM users ORDER BY rating DESC').fetchall()
         conn.close()
         
-        return [User(
-            id=user['id'],
-            cf_handle=user['cf_handle'],
-            rating=user['rating'],
-            max_rating=user['max_rating'],
-            created_at=user['created_at'],
-            last_updated=user['last_updated']
-        ) for user in users]
+        return [User.from_row(user) for user in users]
 
     def update_rating(self):
         """Update user rating from Codeforces"""
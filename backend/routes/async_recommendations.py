@@ -0,0 +1,89 @@
+from datetime import datetime
+from starlette.routing import Route
+from services.async_codeforces_api import async_cf_api
+from services.database import run_db
+from services.ml_service import get_recommendations_async, analyze_user_performance
+from routes.recommendations import load_explain_rows, build_explanation, explain_sections
+from utils.helpers import parse_fields, subfields, select_fields
+from utils.responses import json_response
+
+
+async def analyze_user(request):
+    """Analyze user's performance and weaknesses"""
+    cf_handle = request.path_params['cf_handle']
+    try:
+        # Get user submissions from Codeforces
+        submissions = await async_cf_api.get_user_submissions(cf_handle, count=100)
+
+        if not submissions:
+            return json_response({'error': 'Could not fetch user submissions'}, 500)
+
+        fields = parse_fields(request.query_params.get('fields'))
+        analysis = analyze_user_performance(submissions, subfields(fields, 'analysis'))
+
+        return json_response(select_fields({
+            'cf_handle': cf_handle,
+            'analysis': analysis,
+            'total_submissions': len(submissions)
+        }, fields))
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+async def get_ml_recommendations(request):
+    """Get ML-based recommendations"""
+    cf_handle = request.path_params['cf_handle']
+    method = request.query_params.get('method', 'hybrid')  # hybrid, collaborative, content
+    try:
+        count = min(int(request.query_params.get('count', 5)), 10)
+    except ValueError:
+        count = 5
+
+    try:
+        recommendations = await get_recommendations_async(cf_handle, count, method)
+
+        if not recommendations:
+            return json_response({'error': 'Could not generate recommendations'}, 500)
+
+        return json_response(select_fields({
+            'recommendations': recommendations,
+            'method': method,
+            'generated_at': datetime.now().isoformat(),
+            'cf_handle': cf_handle
+        }, parse_fields(request.query_params.get('fields'))))
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+async def explain_recommendation(request):
+    """Explain why a problem was recommended"""
+    cf_handle = request.path_params['cf_handle']
+    problem_id = request.path_params['problem_id']
+    try:
+        problem, user = await run_db(load_explain_rows, cf_handle, problem_id)
+
+        if not problem:
+            return json_response({'error': 'Problem not found'}, 404)
+
+        if not user:
+            return json_response({'error': 'User not found'}, 404)
+
+        # Analyze user performance
+        fields = parse_fields(request.query_params.get('fields'))
+        submissions = await async_cf_api.get_user_submissions(cf_handle, count=100)
+        analysis = analyze_user_performance(submissions, explain_sections(fields)) if submissions else {}
+
+        return json_response(select_fields(build_explanation(cf_handle, problem, user, analysis), fields))
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+# Full paths: asgi.py lists these ahead of the Flask app, which serves everything else
+routes = [
+    Route('/api/recommendations/analyze/{cf_handle}', analyze_user),
+    Route('/api/recommendations/ml/{cf_handle}', get_ml_recommendations),
+    Route('/api/recommendations/explain/{cf_handle}/{problem_id:int}', explain_recommendation)
+]
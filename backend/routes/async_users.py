@@ -0,0 +1,145 @@
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from services.async_codeforces_api import async_cf_api
+from services.database import get_db_connection, run_db
+from services.rating_history import get_rating_history_async, MIN_DOWNSAMPLE_POINTS
+from services.activity import get_user_activity_async
+from services.profile_bundle import get_profile_bundle_async, parse_sections
+from services.live_updates import live_updates
+from utils.responses import json_response, sse_event
+
+
+def _int_arg(request, name):
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+async def recent_activity(request):
+    """Latest submissions served from the locally synced store"""
+    cf_handle = request.path_params['cf_handle']
+    try:
+        activity = await get_user_activity_async(cf_handle)
+        if activity is None:
+            return json_response({'activity': []})
+        return json_response({'activity': activity['recent_activity'], 'source': activity['source']})
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+async def activity_summary(request):
+    """Streak, heatmap, recent activity and progress score in one response"""
+    cf_handle = request.path_params['cf_handle']
+    try:
+        activity = await get_user_activity_async(cf_handle)
+        if activity is None:
+            return json_response({'error': 'Could not fetch user submissions'}, 500)
+        return json_response({'cf_handle': cf_handle, **activity})
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+async def rating_history(request):
+    """Rating history from the local cache, optionally since a time and downsampled"""
+    cf_handle = request.path_params['cf_handle']
+    since = _int_arg(request, 'since')
+    points = _int_arg(request, 'points')
+    if points is not None and points < MIN_DOWNSAMPLE_POINTS:
+        return json_response({'error': f'points must be at least {MIN_DOWNSAMPLE_POINTS}'}, 400)
+
+    try:
+        result = await get_rating_history_async(cf_handle, since=since, max_points=points)
+
+        if result is None:
+            return json_response({'error': 'Could not fetch rating history'}, 500)
+
+        return json_response(result)
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+async def profile_bundle(request):
+    """Analysis, activity, recommendations and rating summary in one response"""
+    cf_handle = request.path_params['cf_handle']
+    try:
+        sections = parse_sections(request.query_params.get('sections'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+
+    try:
+        return json_response(await get_profile_bundle_async(cf_handle, sections))
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+async def live_stream(request):
+    """Server-sent events: new submissions and changed recommendations of a handle"""
+    cf_handle = request.path_params['cf_handle']
+
+    async def events():
+        async for event, data in live_updates.stream(cf_handle):
+            yield sse_event(event, data)
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Keep reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def _save_user(cf_handle, rating, max_rating):
+    conn = get_db_connection()
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO users (cf_handle, rating, max_rating)
+            VALUES (?, ?, ?)
+        ''', (cf_handle, rating, max_rating))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+async def add_user(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    cf_handle = data.get('cf_handle') if isinstance(data, dict) else None
+
+    if not cf_handle:
+        return json_response({'error': 'CF handle is required'}, 400)
+
+    # Verify user exists on Codeforces
+    user_info = await async_cf_api.get_user_info(cf_handle)
+    if not user_info:
+        return json_response({'error': 'Invalid Codeforces handle'}, 400)
+
+    user_data = user_info[0]
+
+    try:
+        await run_db(_save_user, cf_handle, user_data.get('rating', 0), user_data.get('maxRating', 0))
+
+        return json_response({
+            'message': 'User added successfully',
+            'user': {
+                'cf_handle': cf_handle,
+                'rating': user_data.get('rating', 0),
+                'max_rating': user_data.get('maxRating', 0)
+            }
+        })
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+# Full paths: asgi.py lists these ahead of the Flask app, which serves everything else
+routes = [
+    Route('/api/users/{cf_handle}/recent-activity', recent_activity),
+    Route('/api/users/{cf_handle}/activity', activity_summary),
+    Route('/api/users/{cf_handle}/rating-history', rating_history),
+    Route('/api/users/{cf_handle}/bundle', profile_bundle),
+    Route('/api/users/{cf_handle}/live', live_stream),
+    Route('/api/users/add', add_user, methods=['POST'])
+]
@@ -0,0 +1,70 @@
+import mimetypes
+import os
+import re
+from flask import Blueprint, abort, request, send_file
+from utils.compression import accepts_encoding
+from utils.config import Config
+
+frontend_bp = Blueprint('frontend', __name__)
+
+# Build output with a content hash in its name (main.42a08534.js) never
+# changes under the same URL
+_HASHED = re.compile(r'\.[0-9a-f]{8,}\.')
+
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def build_dir():
+    return os.path.abspath(Config.FRONTEND_BUILD_DIR)
+
+
+def frontend_available():
+    return Config.SERVE_FRONTEND and os.path.isfile(os.path.join(build_dir(), 'index.html'))
+
+
+def _cache_control(filename):
+    if _HASHED.search(os.path.basename(filename)):
+        return f'public, max-age={Config.FRONTEND_CACHE_MAX_AGE}, immutable'
+    # index.html, manifest, images: revalidate so a new deploy shows up at once
+    return 'no-cache'
+
+
+def _precompressed(path):
+    """(path, encoding) of the best ahead-of-time compressed copy the client accepts"""
+    accept_encoding = request.headers.get('Accept-Encoding')
+    # Serving a ready .br needs no brotli module, so both are always tried
+    for encoding in ('br', 'gzip'):
+        candidate = path + PRECOMPRESSED_SUFFIXES[encoding]
+        if accepts_encoding(accept_encoding, encoding) and os.path.isfile(candidate):
+            return candidate, encoding
+    return path, None
+
+
+def serve_build_file(filename):
+    """A file of the frontend build, precompressed if available, with its cache policy"""
+    root = build_dir()
+    path = os.path.abspath(os.path.join(root, filename))
+    if not path.startswith(root + os.sep) or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    served, encoding = _precompressed(path)
+    response = send_file(served, mimetype=mimetype, conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = _cache_control(filename)
+    return response
+
+
+@frontend_bp.route('/', defaults={'filename': ''})
+@frontend_bp.route('/<path:filename>')
+def frontend(filename):
+    """Files of frontend/build; other non-API paths get index.html (client-side routing)"""
+    if filename.startswith('api/'):
+        abort(404)
+    if filename and os.path.isfile(os.path.join(build_dir(), filename)):
+        return serve_build_file(filename)
+    if filename.startswith('static/'):
+        abort(404)
+    return serve_build_file('index.html')
@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify, url_for
+from services.jobs import job_manager
+import services.job_tasks  # registers the job kinds
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('', methods=['POST'])
+def submit_job():
+    """Submit a background job: {"type": "...", "params": {...}}"""
+    data = request.get_json(silent=True) or {}
+    job_type = data.get('type')
+    params = data.get('params') or {}
+    
+    if not job_type:
+        return jsonify({'error': 'Job type is required', 'available_types': job_manager.kinds}), 400
+    
+    if not isinstance(params, dict):
+        return jsonify({'error': 'params must be an object'}), 400
+    
+    try:
+        job = job_manager.submit(job_type, params)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'available_types': job_manager.kinds}), 400
+    
+    return jsonify({
+        'job': job,
+        'status_url': url_for('jobs.get_job', job_id=job['id'])
+    }), 202
+
+@jobs_bp.route('/<job_id>')
+def get_job(job_id):
+    """Poll a job's status and result"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'job': job})
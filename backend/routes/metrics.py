@@ -0,0 +1,16 @@
+from flask import Blueprint, Response, jsonify
+from services.metrics import metrics, slow_requests
+from utils.auth import admin_required
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('')
+def prometheus_metrics():
+    """All metrics in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@metrics_bp.route('/slow')
+@admin_required
+def slow_request_samples():
+    """Recent slow requests with their sampled stacks, newest first"""
+    return jsonify({'slow_requests': slow_requests.recent()})
@@ -1,52 +1,125 @@
 from flask import Blueprint, request, jsonify
-from services.codeforces_api import cf_api
 from services.database import get_db_connection
-import json
+from services.problem_ingest import ingest_latest_problems
+from services.catalog_snapshot import snapshots
+from services.virtual_contest import build_virtual_contest, parse_contest_spec
+from services.ladders import get_ladder, ladder_band
+from services.similar_problems import similar_problems
+from services.submission_sync import solved_problem_ids, sync_user_submissions
+from models.problem import fetch_problem_dicts, decode_tags
+from utils.helpers import parse_fields, select_fields
 
 problems_bp = Blueprint('problems', __name__)
 
 @problems_bp.route('/fetch-latest', methods=['POST'])
 def fetch_latest_problems():
-    """Fetch latest problems from Codeforces"""
+    """Fetch problems of finished contests that are not in the DB yet"""
+    data = request.get_json(silent=True) or {}
+    max_contests = data.get('max_contests')
+    time_budget = data.get('time_budget')
+    
+    if max_contests is not None and (type(max_contests) is not int or max_contests < 1):
+        return jsonify({'error': 'max_contests must be a positive integer'}), 400
+    
+    if time_budget is not None and (type(time_budget) not in (int, float) or not 0 < time_budget < float('inf')):
+        return jsonify({'error': 'time_budget must be a positive number of seconds'}), 400
+    
     try:
-        # Get recent contests
-        contests = cf_api.get_contest_list()
-        if not contests:
+        result = ingest_latest_problems(max_contests=max_contests, time_budget=time_budget)
+        
+        if result is None:
             return jsonify({'error': 'Failed to fetch contests'}), 500
         
-        # Get recent contests (last 10)
-        recent_contests = [c for c in contests if c.get('phase') == 'FINISHED'][:10]
+        return jsonify({
+            'message': f"Imported {result['new_problems']} problems from {len(result['contests_fetched'])} contests",
+            **result
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@problems_bp.route('/virtual-contest', methods=['POST'])
+def virtual_contest():
+    """Build a problem set from rating/tag constraints, unsolved by every participant"""
+    try:
+        spec = parse_contest_spec(request.get_json(silent=True))
+        result = build_virtual_contest(spec)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    if 'error' in result:
+        return jsonify(result), 500
+    return jsonify(result)
+
+@problems_bp.route('/ladder/<int:band>')
+def practice_ladder(band):
+    """Next problems of a rating band's precomputed ladder, minus what handle solved"""
+    cf_handle = request.args.get('handle')
+    count = max(1, min(request.args.get('count', 20, type=int), 100))
+    band = ladder_band(band)
+    
+    try:
+        solved_ids = []
+        if cf_handle:
+            _, last_synced = sync_user_submissions(cf_handle)
+            if last_synced is None:
+                return jsonify({'error': 'Could not fetch user submissions'}), 500
+            solved_ids = solved_problem_ids([cf_handle])
+        
+        ladder = get_ladder(band, count, solved_ids)
+        if ladder is None:
+            return jsonify({'error': f'No ladder for band {band}'}), 404
+        
+        return jsonify(select_fields({**ladder, 'cf_handle': cf_handle}, parse_fields(request.args.get('fields'))))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@problems_bp.route('/<int:problem_id>/similar')
+def similar_to_problem(problem_id):
+    """Problems with similar tags and solvers, from the prebuilt MinHash LSH index"""
+    count = max(1, min(request.args.get('count', 10, type=int), 50))
+    rating_min = request.args.get('rating_min', type=int)
+    rating_max = request.args.get('rating_max', type=int)
+    
+    try:
+        index = similar_problems.get()
+        if index is None:
+            return jsonify({'error': 'Similarity index not built'}), 503
+        
+        matches = index.query(problem_id, count, rating_min, rating_max)
+        if matches is None:
+            return jsonify({'error': 'Problem not found'}), 404
         
+        problems = {}
+        ids = [problem_id] + [match[0] for match in matches]
         conn = get_db_connection()
-        new_problems = 0
+        try:
+            for problem in fetch_problem_dicts(
+                conn, f"SELECT * FROM problems WHERE id IN ({','.join('?' * len(ids))})", ids
+            ):
+                problems[problem['id']] = problem
+        finally:
+            conn.close()
         
-        for contest in recent_contests:
-            contest_id = contest['id']
-            
-            # Skip gym contests
-            if contest_id > 100000:
-                continue
-            
-            # Check if we already have problems from this contest
-            existing = conn.execute(
-                'SELECT COUNT(*) as count FROM problems WHERE contest_id = ?',
-                (contest_id,)
-            ).fetchone()
-            
-            if existing['count'] > 0:
-                continue  # Skip if already have problems from this contest
-            
-            print(f"Fetching problems from contest {contest_id}...")
-            
-            # This is a simplified approach - in reality, you'd need to scrape
-            # or use contest-specific API calls
-            
-        conn.close()
+        similar = []
+        for similar_id, score, tag_similarity, solver_similarity in matches:
+            if similar_id in problems:
+                similar.append({
+                    **problems[similar_id],
+                    'similarity': round(score, 4),
+                    'tag_similarity': round(tag_similarity, 4),
+                    'solver_similarity': None if solver_similarity is None else round(solver_similarity, 4)
+                })
         
-        return jsonify({
-            'message': f'Checked {len(recent_contests)} recent contests',
-            'new_problems': new_problems
-        })
+        return jsonify(select_fields({
+            'problem': problems.get(problem_id),
+            'similar': similar,
+            'rating_range': [rating_min, rating_max],
+            'index_version': index.version
+        }, parse_fields(request.args.get('fields'))))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -100,7 +173,7 @@ def search_problems():
     query += ' ORDER BY solved_count DESC LIMIT ? OFFSET ?'
     params.extend([limit, offset])
     
-    problems = conn.execute(query, params).fetchall()
+    problems = fetch_problem_dicts(conn, query, params)
     
     # Get total count for pagination
     count_query = query.replace('SELECT *', 'SELECT COUNT(*)').split('ORDER BY')[0]
@@ -108,16 +181,8 @@ def search_problems():
     
     conn.close()
     
-    # Format results
-    result = []
-    for problem in problems:
-        problem_dict = dict(problem)
-        problem_dict['tags'] = json.loads(problem_dict['tags']) if problem_dict['tags'] else []
-        problem_dict['url'] = f"https://codeforces.com/contest/{problem_dict['contest_id']}/problem/{problem_dict['index']}"
-        result.append(problem_dict)
-    
-    return jsonify({
-        'problems': result,
+    return jsonify(select_fields({
+        'problems': problems,
         'pagination': {
             'total': total_count,
             'limit': limit,
@@ -130,7 +195,7 @@ def search_problems():
             'contest_id': contest_id,
             'solved_range': [solved_min, solved_max]
         }
-    })
+    }, parse_fields(request.args.get('fields'))))
 
 @problems_bp.route('/trending')
 def get_trending_problems():
@@ -141,43 +206,40 @@ def get_trending_problems():
     
     conn = get_db_connection()
     
-    problems = conn.execute('''
+    problems = fetch_problem_dicts(conn, '''
         SELECT * FROM problems
         WHERE rating BETWEEN ? AND ?
         AND solved_count > 100
         ORDER BY solved_count DESC
         LIMIT ?
-    ''', (rating_min, rating_max, limit)).fetchall()
+    ''', (rating_min, rating_max, limit))
     
     conn.close()
     
-    result = []
-    for problem in problems:
-        problem_dict = dict(problem)
-        problem_dict['tags'] = json.loads(problem_dict['tags']) if problem_dict['tags'] else []
-        problem_dict['url'] = f"https://codeforces.com/contest/{problem_dict['contest_id']}/problem/{problem_dict['index']}"
-        result.append(problem_dict)
-    
-    return jsonify({
-        'problems': result,
+    return jsonify(select_fields({
+        'problems': problems,
         'criteria': 'Most solved problems',
         'rating_range': [rating_min, rating_max]
-    })
+    }, parse_fields(request.args.get('fields'))))
 
 @problems_bp.route('/tags')
 def get_available_tags():
     """Get all available problem tags with counts"""
-    conn = get_db_connection()
-    
-    # Get all tags
-    problems = conn.execute('SELECT tags FROM problems WHERE tags IS NOT NULL').fetchall()
-    conn.close()
-    
-    tag_counts = {}
-    for problem in problems:
-        tags = json.loads(problem['tags']) if problem['tags'] else []
-        for tag in tags:
-            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+    snapshot = snapshots.get()
+    if snapshot is not None:
+        tag_counts = snapshot.tag_counts()
+    else:
+        conn = get_db_connection()
+        
+        # Get all tags
+        problems = conn.execute('SELECT tags FROM problems WHERE tags IS NOT NULL').fetchall()
+        conn.close()
+        
+        tag_counts = {}
+        for problem in problems:
+            tags = decode_tags(problem['tags'])
+            for tag in tags:
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
     
     # Sort by frequency
     sorted_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)
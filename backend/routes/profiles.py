@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify, send_file
+from services.profiler import list_traces, get_trace, top_functions, trace_file
+from utils.auth import admin_required
+
+profiles_bp = Blueprint('profiles', __name__)
+
+@profiles_bp.route('')
+@admin_required
+def recent_profiles():
+    """Recently captured request profiles, newest first"""
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify({'profiles': list_traces()[:limit]})
+
+@profiles_bp.route('/<trace_id>')
+@admin_required
+def profile_detail(trace_id):
+    """Top functions of one profile (?sort=cumulative|tottime|calls, ?filter=<regex>)"""
+    meta = get_trace(trace_id)
+    if not meta:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    limit = min(request.args.get('limit', 30, type=int), 200)
+    sort = request.args.get('sort', 'cumulative')
+    pattern = request.args.get('filter')
+    
+    try:
+        functions = top_functions(trace_id, limit=limit, sort=sort, pattern=pattern)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'profile': meta, 'sort': sort, 'functions': functions})
+
+@profiles_bp.route('/<trace_id>/download')
+@admin_required
+def download_profile(trace_id):
+    """Raw pstats dump, e.g. for snakeviz"""
+    path = trace_file(trace_id)
+    if not path:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, as_attachment=True, download_name=f"{trace_id}.prof")
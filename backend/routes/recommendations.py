@@ -1,8 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, url_for
 from services.codeforces_api import cf_api
 from services.database import get_db_connection
 from services.ml_service import get_recommendations, analyze_user_performance, recommendation_engine
-import json
+from services.jobs import job_manager
+import services.job_tasks  # registers the job kinds
+from models import User, Recommendation
+from models.problem import decode_tags
+from utils.helpers import parse_fields, subfields, select_fields
 from datetime import datetime, timedelta
 
 recommendations_bp = Blueprint('recommendations', __name__)
@@ -17,13 +21,14 @@ def analyze_user(cf_handle):
         if not submissions:
             return jsonify({'error': 'Could not fetch user submissions'}), 500
         
-        analysis = analyze_user_performance(submissions)
+        fields = parse_fields(request.args.get('fields'))
+        analysis = analyze_user_performance(submissions, subfields(fields, 'analysis'))
         
-        return jsonify({
+        return jsonify(select_fields({
             'cf_handle': cf_handle,
             'analysis': analysis,
             'total_submissions': len(submissions)
-        })
+        }, fields))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -41,47 +46,57 @@ def get_ml_recommendations(cf_handle):
         if not recommendations:
             return jsonify({'error': 'Could not generate recommendations'}), 500
         
-        return jsonify({
+        return jsonify(select_fields({
             'recommendations': recommendations,
             'method': method,
             'generated_at': datetime.now().isoformat(),
             'cf_handle': cf_handle
-        })
+        }, parse_fields(request.args.get('fields'))))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @recommendations_bp.route('/build-model', methods=['POST'])
 def build_recommendation_model():
-    """Build/rebuild the recommendation model"""
+    """Start building the recommendation model in the background"""
     try:
-        # Build user-item matrix
-        matrix = recommendation_engine.build_user_item_matrix()
+        job = job_manager.submit('build-model')
         
-        if matrix is not None:
-            users_count = len(matrix.index)
-            items_count = len(matrix.columns)
-            sparsity = (matrix == 0).sum().sum() / (users_count * items_count)
-            
-            return jsonify({
-                'message': 'Model built successfully',
-                'users_count': users_count,
-                'items_count': items_count,
-                'sparsity': f"{sparsity:.2%}",
-                'matrix_shape': list(matrix.shape)
-            })
-        else:
-            return jsonify({'error': 'Failed to build model'}), 500
+        return jsonify({
+            'message': 'Model build started',
+            'job_id': job['id'],
+            'status_url': url_for('jobs.get_job', job_id=job['id'])
+        }), 202
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@recommendations_bp.route('/stats/<cf_handle>')
+def get_recommendation_stats(cf_handle):
+    """How many recommendations were served to a user, including rolled-up history"""
+    try:
+        user = User.get_by_handle(cf_handle)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        return jsonify({
+            'cf_handle': cf_handle,
+            'stats': Recommendation.get_recommendation_stats(user.id)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @recommendations_bp.route('/similar-users/<cf_handle>')
 def get_similar_users(cf_handle):
     """Get users similar to the given user"""
     try:
+        # Building the matrix is a CPU-heavy job; requests only use a published artifact
         if recommendation_engine.user_item_matrix is None:
-            recommendation_engine.build_user_item_matrix()
+            return jsonify({
+                'error': 'Recommendation model not built yet',
+                'build_url': url_for('recommendations.build_recommendation_model')
+            }), 503
         
         similarities = recommendation_engine.compute_user_similarity(cf_handle)
         
@@ -116,86 +131,101 @@ def get_similar_users(cf_handle):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@recommendations_bp.route('/explain/<cf_handle>/<int:problem_id>')
-def explain_recommendation(cf_handle, problem_id):
-    """Explain why a problem was recommended"""
+def load_explain_rows(cf_handle, problem_id):
+    """(problem, user) rows for an explanation; either may be None"""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
-        
-        # Get problem details
         problem = conn.execute(
             'SELECT * FROM problems WHERE id = ?', (problem_id,)
         ).fetchone()
-        
-        if not problem:
-            return jsonify({'error': 'Problem not found'}), 404
-        
-        # Get user info
         user = conn.execute(
             'SELECT * FROM users WHERE cf_handle = ?', (cf_handle,)
         ).fetchone()
+        return problem, user
+    finally:
+        conn.close()
+
+def explain_sections(fields):
+    """Analysis sections an explanation needs for the requested fields (None = all)"""
+    sections = subfields(fields, 'analysis')
+    if sections is None:
+        return None
+    # The explanation text itself is built from these
+    return sections | {'weak_tags', 'strong_tags'}
+
+def build_explanation(cf_handle, problem, user, analysis):
+    """Response body explaining why problem suits the user"""
+    user_rating = user['rating'] or 1200
+    problem_rating = problem['rating']
+    problem_tags = decode_tags(problem['tags'])
+    
+    # Generate explanation
+    explanations = []
+    
+    # Rating-based explanation
+    rating_diff = abs(problem_rating - user_rating)
+    if rating_diff <= 100:
+        explanations.append(f"Perfect difficulty match (±{rating_diff} from your rating)")
+    elif rating_diff <= 200:
+        explanations.append(f"Good difficulty level ({rating_diff} points from your rating)")
+    else:
+        explanations.append(f"Challenging problem ({rating_diff} points from your rating)")
+    
+    # Tag-based explanation
+    weak_tags = analysis.get('weak_tags', [])
+    strong_tags = analysis.get('strong_tags', [])
+    
+    weak_matches = [tag for tag in problem_tags if tag in weak_tags]
+    strong_matches = [tag for tag in problem_tags if tag in strong_tags]
+    
+    if weak_matches:
+        explanations.append(f"Helps improve weak areas: {', '.join(weak_matches)}")
+    
+    if strong_matches:
+        explanations.append(f"Builds on your strengths: {', '.join(strong_matches)}")
+    
+    # Popularity explanation
+    if problem['solved_count'] > 1000:
+        explanations.append("Popular and well-tested problem")
+    elif problem['solved_count'] < 100:
+        explanations.append("Less common problem for variety")
+    
+    return {
+        'problem': {
+            'id': problem['id'],
+            'name': problem['name'],
+            'contest_id': problem['contest_id'],
+            'index': problem['index'],
+            'rating': problem['rating'],
+            'tags': problem_tags,
+            'solved_count': problem['solved_count']
+        },
+        'user': {
+            'cf_handle': cf_handle,
+            'rating': user_rating
+        },
+        'explanations': explanations,
+        'analysis': analysis
+    }
+
+@recommendations_bp.route('/explain/<cf_handle>/<int:problem_id>')
+def explain_recommendation(cf_handle, problem_id):
+    """Explain why a problem was recommended"""
+    try:
+        problem, user = load_explain_rows(cf_handle, problem_id)
+        
+        if not problem:
+            return jsonify({'error': 'Problem not found'}), 404
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        user_rating = user['rating'] or 1200
-        problem_rating = problem['rating']
-        problem_tags = json.loads(problem['tags']) if problem['tags'] else []
-        
         # Analyze user performance
+        fields = parse_fields(request.args.get('fields'))
         submissions = cf_api.get_user_submissions(cf_handle, count=100)
-        analysis = analyze_user_performance(submissions) if submissions else {}
-        
-        # Generate explanation
-        explanations = []
-        
-        # Rating-based explanation
-        rating_diff = abs(problem_rating - user_rating)
-        if rating_diff <= 100:
-            explanations.append(f"Perfect difficulty match (±{rating_diff} from your rating)")
-        elif rating_diff <= 200:
-            explanations.append(f"Good difficulty level ({rating_diff} points from your rating)")
-        else:
-            explanations.append(f"Challenging problem ({rating_diff} points from your rating)")
-        
-        # Tag-based explanation
-        weak_tags = analysis.get('weak_tags', [])
-        strong_tags = analysis.get('strong_tags', [])
-        
-        weak_matches = [tag for tag in problem_tags if tag in weak_tags]
-        strong_matches = [tag for tag in problem_tags if tag in strong_tags]
+        analysis = analyze_user_performance(submissions, explain_sections(fields)) if submissions else {}
         
-        if weak_matches:
-            explanations.append(f"Helps improve weak areas: {', '.join(weak_matches)}")
-        
-        if strong_matches:
-            explanations.append(f"Builds on your strengths: {', '.join(strong_matches)}")
-        
-        # Popularity explanation
-        if problem['solved_count'] > 1000:
-            explanations.append("Popular and well-tested problem")
-        elif problem['solved_count'] < 100:
-            explanations.append("Less common problem for variety")
-        
-        conn.close()
-        
-        return jsonify({
-            'problem': {
-                'id': problem['id'],
-                'name': problem['name'],
-                'contest_id': problem['contest_id'],
-                'index': problem['index'],
-                'rating': problem['rating'],
-                'tags': problem_tags,
-                'solved_count': problem['solved_count']
-            },
-            'user': {
-                'cf_handle': cf_handle,
-                'rating': user_rating
-            },
-            'explanations': explanations,
-            'analysis': analysis
-        })
+        return jsonify(select_fields(build_explanation(cf_handle, problem, user, analysis), fields))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
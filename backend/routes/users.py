@@ -1,25 +1,70 @@
 from flask import Blueprint, request, jsonify
 from services.codeforces_api import cf_api
 from services.database import get_db_connection
+from services.rating_history import get_rating_history, MIN_DOWNSAMPLE_POINTS
+from services.activity import get_user_activity
+from services.profile_bundle import get_profile_bundle, parse_sections
 
 users_bp = Blueprint('users', __name__)
 
 @users_bp.route('/<cf_handle>/recent-activity')
 def recent_activity(cf_handle):
-    from services.codeforces_api import cf_api
-    submissions = cf_api.get_user_submissions(cf_handle, count=20) or []
-    activity = []
-    for sub in submissions:
-        if 'problem' in sub and 'creationTimeSeconds' in sub:
-            verdict = sub.get('verdict', 'UNKNOWN')
-            problem = sub['problem']
-            activity.append({
-                'time': sub['creationTimeSeconds'],
-                'problem': f"{problem.get('contestId', '')}{problem.get('index', '')} - {problem.get('name', '')}",
-                'url': f"https://codeforces.com/contest/{problem.get('contestId')}/problem/{problem.get('index')}",
-                'verdict': verdict
-            })
-    return jsonify({'activity': activity})
+    """Latest submissions served from the locally synced store"""
+    try:
+        activity = get_user_activity(cf_handle)
+        if activity is None:
+            return jsonify({'activity': []})
+        return jsonify({'activity': activity['recent_activity'], 'source': activity['source']})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@users_bp.route('/<cf_handle>/activity')
+def activity_summary(cf_handle):
+    """Streak, heatmap, recent activity and progress score in one response"""
+    try:
+        activity = get_user_activity(cf_handle)
+        if activity is None:
+            return jsonify({'error': 'Could not fetch user submissions'}), 500
+        return jsonify({'cf_handle': cf_handle, **activity})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@users_bp.route('/<cf_handle>/rating-history')
+def rating_history(cf_handle):
+    """Rating history from the local cache, optionally since a time and downsampled"""
+    since = request.args.get('since', type=int)
+    points = request.args.get('points', type=int)
+    
+    if points is not None and points < MIN_DOWNSAMPLE_POINTS:
+        return jsonify({'error': f'points must be at least {MIN_DOWNSAMPLE_POINTS}'}), 400
+    
+    try:
+        result = get_rating_history(cf_handle, since=since, max_points=points)
+        
+        if result is None:
+            return jsonify({'error': 'Could not fetch rating history'}), 500
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@users_bp.route('/<cf_handle>/bundle')
+def profile_bundle(cf_handle):
+    """Analysis, activity, recommendations and rating summary in one response"""
+    try:
+        sections = parse_sections(request.args.get('sections'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return jsonify(get_profile_bundle(cf_handle, sections))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 @users_bp.route('/add', methods=['POST'])
@@ -0,0 +1,246 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import json
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from utils.config import Config
+
+# Keep the benchmark self-contained: no worker processes, no network
+Config.JOB_OFFLOAD_ENABLED = False
+
+from scripts.synthetic_data import generate_dataset, load_dataset, SyntheticCodeforces
+from services.candidate_cache import candidate_cache
+from services.catalog_snapshot import snapshots
+from services.cf_transport import RecordingTransport, ReplayTransport
+from services.codeforces_api import cf_api
+from services.recommendation_log import recommendation_writer
+from services.ml_service import (
+    get_recommendations, analyze_user_performance, build_interaction_matrix, recommendation_engine
+)
+from models.problem import Problem
+
+DEFAULT_SCALES = [9000, 30000, 100000]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[position]
+
+
+def measure(fn, iterations, warmup=2):
+    """Time fn() `iterations` times, then once more under tracemalloc for peak memory"""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'throughput_per_s': round(iterations / elapsed, 2) if elapsed > 0 else None,
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+
+def build_cases(dataset, client, rng):
+    handles = [u['handle'] for u in dataset['users']]
+    sample_submissions = dataset['submissions'][handles[0]][:100]
+
+    def recommendations():
+        get_recommendations(rng.choice(handles), 5, 'hybrid')
+
+    def analysis():
+        analyze_user_performance(sample_submissions)
+
+    def search():
+        low = rng.choice(range(800, 2400, 100))
+        Problem.search(rating_min=low, rating_max=low + 400, tags=[rng.choice(['dp', 'math', 'greedy'])])
+
+    def tags_endpoint():
+        response = client.get('/api/problems/tags')
+        assert response.status_code == 200
+
+    def model_build():
+        recommendation_engine.set_matrix(build_interaction_matrix())
+
+    def similarity():
+        recommendation_engine.compute_user_similarity(rng.choice(handles))
+
+    def collaborative():
+        recommendation_engine.get_collaborative_recommendations(rng.choice(handles), 10)
+
+    return [
+        ('get_recommendations', recommendations),
+        ('analyze_user_performance', analysis),
+        ('problem_search', search),
+        ('api_problem_tags', tags_endpoint),
+        ('build_model', model_build),
+        ('user_similarity', similarity),
+        ('collaborative_recommendations', collaborative)
+    ]
+
+
+def build_upstream(dataset, problem_count, args):
+    """Synthetic stub, optionally recorded to or replayed from an archive"""
+    if args.replay:
+        return ReplayTransport(
+            args.replay.format(scale=problem_count),
+            latency=args.latency,
+            jitter=args.jitter,
+            timeout_rate=args.timeout_rate,
+            failed_rate=args.failed_rate,
+            http_503_rate=args.http_503_rate,
+            seed=args.seed
+        )
+    stub = SyntheticCodeforces(dataset)
+    if args.record:
+        return RecordingTransport(stub, args.record.format(scale=problem_count))
+    return stub
+
+
+def run_scale(problem_count, args):
+    workdir = tempfile.mkdtemp(prefix='cf_bench_')
+    original_url = Config.DATABASE_URL
+    original_snapshot_dir = Config.SNAPSHOT_DIR
+    try:
+        Config.DATABASE_URL = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+        t0 = time.perf_counter()
+        dataset = generate_dataset(problem_count, args.users, args.submissions, seed=args.seed)
+        Config.SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+        with contextlib.redirect_stdout(sys.stderr):
+            load_dataset(dataset)
+            snapshots.refresh()
+        setup_seconds = time.perf_counter() - t0
+
+        cf_api.transport = build_upstream(dataset, problem_count, args)
+        cf_api.min_request_interval = args.rate_limit
+
+        from app import create_app
+        with contextlib.redirect_stdout(sys.stderr):
+            client = create_app().test_client()
+        rng = random.Random(args.seed)
+
+        results = {}
+        for name, fn in build_cases(dataset, client, rng):
+            if args.only and name not in args.only:
+                continue
+            iterations = args.model_iterations if name == 'build_model' else args.iterations
+            results[name] = measure(fn, iterations)
+            print(f"  {name}: p50={results[name]['p50_ms']}ms p99={results[name]['p99_ms']}ms", file=sys.stderr)
+
+        upstream = cf_api.transport
+        return {
+            'upstream': {
+                'transport': type(upstream).__name__,
+                'calls': getattr(upstream, 'calls', None),
+                'misses': getattr(upstream, 'misses', None)
+            },
+            'problems': problem_count,
+            'users': args.users,
+            'submissions_per_user': args.submissions,
+            'setup_seconds': round(setup_seconds, 2),
+            'cases': results
+        }
+    finally:
+        # Served recommendations are buffered; write them to the bench DB
+        recommendation_writer.flush()
+        Config.DATABASE_URL = original_url
+        Config.SNAPSHOT_DIR = original_snapshot_dir
+        snapshots.invalidate()
+        candidate_cache.invalidate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark recommendation and search paths on synthetic data')
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help='Comma-separated problemset sizes')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--submissions', type=int, default=200, help='Submissions per user')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--model-iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', type=lambda v: v.split(','), default=None,
+                        help='Comma-separated case names to run')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--record', help='Record upstream calls to this archive ({scale} is substituted)')
+    parser.add_argument('--replay', help='Replay upstream calls from this archive ({scale} is substituted)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Replay latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Replay latency jitter in seconds')
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--failed-rate', type=float, default=0.0)
+    parser.add_argument('--http-503-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Minimum seconds between upstream calls (0 disables the limiter)')
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': int(time.time()),
+        'seed': args.seed,
+        'upstream': {
+            'record': args.record,
+            'replay': args.replay,
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'timeout_rate': args.timeout_rate,
+            'failed_rate': args.failed_rate,
+            'http_503_rate': args.http_503_rate,
+            'rate_limit': args.rate_limit
+        },
+        'scales': []
+    }
+
+    for scale in [int(s) for s in args.scales.split(',') if s]:
+        print(f"Benchmarking {scale} problems...", file=sys.stderr)
+        report['scales'].append(run_scale(scale, args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from services.database import init_db
+from services.similar_problems import build_similarity_index
+from utils.config import Config
+
+
+def main():
+    """Build step: write the MinHash LSH index behind /api/problems/<id>/similar.
+
+    Run after importing problems, and again after standings ingestion so
+    solver sets are included; workers map the new version without a restart.
+    """
+    parser = argparse.ArgumentParser(description='Build the similar-problems index artifact')
+    parser.add_argument('--artifact-dir', default=Config.MODEL_ARTIFACT_DIR)
+    parser.add_argument('--tags-only', action='store_true', help='Ignore solver sets')
+    args = parser.parse_args()
+
+    if args.tags_only:
+        Config.SIMILAR_USE_SOLVERS = False
+    init_db()
+    print(json.dumps(build_similarity_index(args.artifact_dir), indent=2))
+
+
+if __name__ == '__main__':
+    main()
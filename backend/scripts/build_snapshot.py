@@ -0,0 +1,29 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from services.database import init_db
+from services.catalog_snapshot import write_snapshot, load_snapshot
+from utils.config import Config
+
+
+def main():
+    """Build step: export the problems table as the memory-mapped catalog snapshot.
+
+    Run after the DB is populated and before starting workers so they map a
+    ready snapshot instead of exporting one on first start.
+    """
+    parser = argparse.ArgumentParser(description='Write the catalog snapshot workers map at startup')
+    parser.add_argument('--snapshot-dir', default=Config.SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_DIR = args.snapshot_dir
+    init_db()
+    write_snapshot()
+    print(json.dumps(load_snapshot().summary(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
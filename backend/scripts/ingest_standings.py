@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from services.database import init_db
+from services.standings_ingest import ingest_standings, ingest_status
+from utils.config import Config
+
+
+def main():
+    """Offline step: ingest contest standings as training interactions.
+
+    Safe to stop at any time; rerunning resumes from the stored checkpoints.
+    Rebuild the model and the similarity index afterwards (the build-model and
+    build-similar jobs) to use the new data.
+    """
+    parser = argparse.ArgumentParser(description='Ingest contest.standings into the interactions table')
+    parser.add_argument('--max-contests', type=int, default=Config.STANDINGS_MAX_CONTESTS)
+    parser.add_argument('--time-budget', type=float, default=Config.STANDINGS_TIME_BUDGET)
+    parser.add_argument('--page-size', type=int, default=Config.STANDINGS_PAGE_SIZE)
+    parser.add_argument('--status', action='store_true', help='Print checkpoint totals and exit')
+    args = parser.parse_args()
+
+    init_db()
+    if not args.status:
+        Config.STANDINGS_PAGE_SIZE = args.page_size
+        result = ingest_standings(max_contests=args.max_contests, time_budget=args.time_budget)
+        if result is None:
+            print('Failed to fetch contests')
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+    print(json.dumps(ingest_status(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
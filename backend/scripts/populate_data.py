@@ -4,6 +4,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.codeforces_api import cf_api
 from services.database import get_db_connection
+from services.ladders import build_ladders
+from services.similar_problems import build_similarity_index
 import json
 import time
 
@@ -126,6 +128,10 @@ if __name__ == "__main__":
     # Populate problems
     if populate_problems():
         print("Problems populated successfully!")
+        result = build_ladders()
+        print(f"Built practice ladders for {result['bands']} rating bands")
+        result = build_similarity_index()
+        print(f"Built similarity index v{result['version']} over {result['problems']} problems")
     else:
         print("Failed to populate problems")
         sys.exit(1)
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import mimetypes
+from utils.compression import brotli, compress, compressible
+from routes.frontend import PRECOMPRESSED_SUFFIXES
+from utils.config import Config
+
+# Ahead of time there is no latency budget: use the strongest settings
+BUILD_LEVELS = {'br': 11, 'gzip': 9}
+
+
+def precompress(root, min_size, encodings):
+    """Write .br/.gz siblings for compressible build files; returns (files, bytes in, bytes out)"""
+    files = size_in = size_out = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(tuple(PRECOMPRESSED_SUFFIXES.values())):
+                continue
+            path = os.path.join(directory, name)
+            mimetype = mimetypes.guess_type(path)[0]
+            size = os.path.getsize(path)
+            if size < min_size or not compressible(mimetype):
+                continue
+
+            with open(path, 'rb') as f:
+                data = f.read()
+            files += 1
+            size_in += size
+            for encoding in encodings:
+                target = path + PRECOMPRESSED_SUFFIXES[encoding]
+                compressed = compress(data, encoding, BUILD_LEVELS[encoding])
+                if encoding == encodings[0]:
+                    size_out += min(len(compressed), size)
+                # A copy that isn't smaller would only cost a disk read
+                if len(compressed) >= size:
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+    return files, size_in, size_out
+
+
+def main():
+    """Build step: precompress frontend/build so Flask serves .br/.gz files as is.
+
+    Run after `npm run build`; rerunning overwrites the copies.
+    """
+    parser = argparse.ArgumentParser(description='Write .br and .gz copies of the frontend build')
+    parser.add_argument('--build-dir', default=Config.FRONTEND_BUILD_DIR)
+    parser.add_argument('--min-size', type=int, default=Config.COMPRESSION_MIN_SIZE)
+    args = parser.parse_args()
+
+    encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+    if brotli is None:
+        print('brotli is not installed; writing .gz copies only')
+    files, size_in, size_out = precompress(args.build_dir, args.min_size, encodings)
+    ratio = size_in / size_out if size_out else 0
+    print(f"Precompressed {files} files ({encodings[0]}): {size_in} -> {size_out} bytes ({ratio:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
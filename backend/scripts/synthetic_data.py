@@ -0,0 +1,214 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database import get_db_connection, init_db
+from utils.helpers import generate_problem_id
+import json
+import random
+import time
+
+CF_TAGS = [
+    'implementation', 'math', 'greedy', 'dp', 'data structures', 'brute force',
+    'constructive algorithms', 'graphs', 'sortings', 'binary search', 'dfs and similar',
+    'trees', 'strings', 'number theory', 'combinatorics', 'two pointers', 'bitmasks',
+    'geometry', 'dsu', 'shortest paths', 'probabilities', 'divide and conquer',
+    'hashing', 'games', 'interactive', 'matrices', 'flows', 'string suffix structures',
+    'graph matchings', 'fft', 'ternary search', 'expression parsing', 'meet-in-the-middle',
+    '2-sat', 'chinese remainder theorem', 'schedules', '*special'
+]
+VERDICTS = ['OK', 'OK', 'OK', 'WRONG_ANSWER', 'WRONG_ANSWER', 'TIME_LIMIT_EXCEEDED', 'RUNTIME_ERROR']
+INDEXES = 'ABCDEFGH'
+
+
+def generate_problems(count, rng):
+    """Codeforces-shaped problem dicts: ~8 per contest, rating rising with index"""
+    problems = []
+    contest_id = 1
+    while len(problems) < count:
+        per_contest = rng.randint(5, 8)
+        base = rng.choice(range(800, 2000, 100))
+        for position in range(per_contest):
+            if len(problems) >= count:
+                break
+            rating = min(3500, base + position * rng.choice((100, 200, 300)))
+            tags = rng.sample(CF_TAGS, rng.randint(1, 4))
+            # Easier problems are solved by many more people
+            solved_count = int(rng.lognormvariate(10.5 - rating / 500, 0.8))
+            problems.append({
+                'contestId': contest_id,
+                'index': INDEXES[position],
+                'name': f"Synthetic {contest_id}{INDEXES[position]}",
+                'type': 'PROGRAMMING',
+                'rating': rating,
+                'tags': tags,
+                'solvedCount': solved_count
+            })
+        contest_id += 1
+    return problems
+
+
+def generate_users(count, rng):
+    return [{'handle': f"user{i}", 'rating': int(rng.gauss(1500, 350))} for i in range(count)]
+
+
+def generate_submissions(users, problems, per_user, rng, now=None):
+    """user.status-shaped submissions per handle, newest first"""
+    now = now or int(time.time())
+    by_rating = {}
+    for problem in problems:
+        by_rating.setdefault(problem['rating'] // 100 * 100, []).append(problem)
+    ratings = sorted(by_rating)
+
+    submissions = {}
+    next_id = 1
+    for user in users:
+        near = [r for r in ratings if abs(r - user['rating']) <= 400] or ratings
+        items = []
+        for _ in range(per_user):
+            problem = rng.choice(by_rating[rng.choice(near)])
+            items.append({
+                'id': next_id,
+                'problem': {key: problem[key] for key in ('contestId', 'index', 'name', 'type', 'rating', 'tags')},
+                'verdict': rng.choice(VERDICTS),
+                'creationTimeSeconds': now - rng.randint(0, 365 * 86400)
+            })
+            next_id += 1
+        items.sort(key=lambda s: s['creationTimeSeconds'], reverse=True)
+        submissions[user['handle']] = items
+    return submissions
+
+
+def generate_dataset(problem_count=9000, user_count=200, submissions_per_user=200, seed=42):
+    """Generate a reproducible synthetic problemset, users and submissions"""
+    rng = random.Random(seed)
+    problems = generate_problems(problem_count, rng)
+    users = generate_users(user_count, rng)
+    submissions = generate_submissions(users, problems, submissions_per_user, rng)
+    return {'problems': problems, 'users': users, 'submissions': submissions}
+
+
+def load_dataset(dataset):
+    """Write a generated dataset into the DB named by Config.DATABASE_URL"""
+    init_db()
+    conn = get_db_connection()
+
+    conn.executemany('''
+        INSERT OR REPLACE INTO problems
+        (id, contest_id, `index`, name, type, rating, tags, solved_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(
+        generate_problem_id(p['contestId'], p['index']),
+        p['contestId'], p['index'], p['name'], p['type'], p['rating'],
+        json.dumps(p['tags']), p['solvedCount']
+    ) for p in dataset['problems']])
+
+    conn.executemany('''
+        INSERT OR REPLACE INTO users (cf_handle, rating, max_rating)
+        VALUES (?, ?, ?)
+    ''', [(u['handle'], u['rating'], u['rating'] + 100) for u in dataset['users']])
+
+    conn.executemany('''
+        INSERT OR REPLACE INTO user_submissions
+        (id, cf_handle, contest_id, problem_index, problem_name, problem_rating, tags, verdict, creation_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(
+        s['id'], handle, s['problem']['contestId'], s['problem']['index'], s['problem']['name'],
+        s['problem']['rating'], json.dumps(s['problem']['tags']), s['verdict'], s['creationTimeSeconds']
+    ) for handle, items in dataset['submissions'].items() for s in items])
+
+    conn.commit()
+    conn.close()
+
+
+class SyntheticCodeforces:
+    """Local stand-in for the Codeforces API answering from a generated dataset.
+
+    Implements the CodeforcesAPI transport interface, so calls still go
+    through the client's rate limiting and metrics.
+    """
+
+    def __init__(self, dataset, standings_size=200, contestant_pool=5000):
+        self.dataset = dataset
+        self.users = {u['handle'].lower(): u for u in dataset['users']}
+        self.submissions = {h.lower(): items for h, items in dataset['submissions'].items()}
+        self.standings_size = standings_size
+        self.contestant_pool = contestant_pool
+        self.calls = 0
+
+    def get(self, endpoint, params):
+        """Transport interface: (status_code, decoded JSON body)"""
+        self.calls += 1
+        result = self._result(endpoint, params or {})
+        if result is None:
+            return 200, {'status': 'FAILED', 'comment': f"{endpoint}: not found"}
+        return 200, {'status': 'OK', 'result': result}
+
+    def _result(self, endpoint, params):
+        if endpoint == 'user.info':
+            user = self.users.get(params['handles'].lower())
+            return [{'handle': user['handle'], 'rating': user['rating'], 'maxRating': user['rating'] + 100}] if user else None
+
+        if endpoint == 'user.status':
+            items = self.submissions.get(params['handle'].lower())
+            if items is None:
+                return None
+            start = params.get('from', 1) - 1
+            count = params.get('count')
+            return items[start:start + count] if count else items[start:]
+
+        if endpoint == 'user.rating':
+            user = self.users.get(params['handle'].lower())
+            if user is None:
+                return None
+            return [{
+                'contestId': i + 1, 'contestName': f"Contest {i + 1}", 'rank': 100,
+                'oldRating': user['rating'] - 10 * (20 - i), 'newRating': user['rating'] - 10 * (19 - i),
+                'ratingUpdateTimeSeconds': 1600000000 + i * 7 * 86400
+            } for i in range(20)]
+
+        if endpoint == 'problemset.problems':
+            return {
+                'problems': self.dataset['problems'],
+                'problemStatistics': [
+                    {'contestId': p['contestId'], 'index': p['index'], 'solvedCount': p['solvedCount']}
+                    for p in self.dataset['problems']
+                ]
+            }
+
+        if endpoint == 'contest.list':
+            last = self.dataset['problems'][-1]['contestId'] if self.dataset['problems'] else 0
+            return [{'id': c, 'phase': 'FINISHED'} for c in range(last, 0, -1)]
+
+        if endpoint == 'contest.standings':
+            problems = [p for p in self.dataset['problems'] if p['contestId'] == params['contestId']]
+            start = params.get('from', 1) - 1
+            count = params.get('count') or self.standings_size
+            rows = self._standings_rows(params['contestId'], problems)[start:start + count]
+            return {'contest': {'id': params['contestId'], 'phase': 'FINISHED'}, 'problems': problems, 'rows': rows}
+
+        return None
+
+    def _standings_rows(self, contest_id, problems):
+        """Deterministic standings of a contest drawn from a pool of recurring contestants"""
+        rng = random.Random(contest_id)
+        handles = rng.sample(range(self.contestant_pool), min(self.standings_size, self.contestant_pool))
+        rows = []
+        for rank, contestant in enumerate(handles, 1):
+            results = []
+            for problem in problems:
+                solved = rng.random() < max(0.05, 1.2 - problem['rating'] / 2000)
+                results.append({
+                    'points': 1.0 if solved else 0.0,
+                    'rejectedAttemptCount': rng.randint(0, 2) if solved or rng.random() < 0.3 else 0
+                })
+            rows.append({
+                'party': {'members': [{'handle': f"contestant{contestant}"}], 'participantType': 'CONTESTANT'},
+                'rank': rank,
+                'problemResults': results
+            })
+        return rows
+
+    def install(self, api):
+        """Route every call of a CodeforcesAPI instance to this stub"""
+        api.transport = self
@@ -0,0 +1,43 @@
+"""Production entry point.
+
+    python serve.py --workers 4 --threads 16 --port 5000
+
+Runs asgi:app under uvicorn: the users and recommendations routes await
+Codeforces and the DB without holding a thread, all other routes run in the
+Flask app on a pool of --threads threads per worker. Never runs in debug mode.
+"""
+import argparse
+import os
+import uvicorn
+from services.database import init_db
+from utils.config import Config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the CF Recommender API')
+    parser.add_argument('--host', default=Config.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=Config.SERVER_PORT)
+    parser.add_argument('--workers', type=int, default=Config.SERVER_WORKERS, help='worker processes')
+    parser.add_argument('--threads', type=int, default=Config.SERVER_THREADS, help='Flask threads per worker')
+    parser.add_argument('--db-threads', type=int, default=Config.ASYNC_DB_THREADS, help='DB threads per worker for async routes')
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    # Workers are separate processes that read Config from the environment
+    os.environ['SERVER_THREADS'] = str(args.threads)
+    os.environ['ASYNC_DB_THREADS'] = str(args.db_threads)
+
+    init_db()
+    uvicorn.run(
+        'asgi:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+        app_dir=os.path.dirname(os.path.abspath(__file__))
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+from services.database import get_db_connection, run_db
+from services.submission_sync import sync_user_submissions, sync_user_submissions_async
+from utils.config import Config
+from models.problem import problem_url
+from utils.helpers import calculate_progress_score
+
+SECONDS_PER_DAY = 86400
+RECENT_ACTIVITY_LIMIT = 20
+RECENT_DAYS = 30
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _utc_offset_seconds():
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+
+def _load_submissions(conn, cf_handle):
+    return conn.execute('''
+        SELECT id, creation_time, verdict, contest_id, problem_index, problem_name, problem_rating, tags
+        FROM user_submissions
+        WHERE cf_handle = ?
+        ORDER BY creation_time DESC
+    ''', (cf_handle,)).fetchall()
+
+
+def _load_ratings(conn, cf_handle):
+    user = conn.execute(
+        'SELECT rating, max_rating FROM users WHERE cf_handle = ?', (cf_handle,)
+    ).fetchone()
+    if user:
+        return user['rating'] or 0, user['max_rating'] or 0
+
+    row = conn.execute('''
+        SELECT
+            (SELECT new_rating FROM rating_changes WHERE cf_handle = ? ORDER BY update_time DESC LIMIT 1),
+            MAX(new_rating)
+        FROM rating_changes WHERE cf_handle = ?
+    ''', (cf_handle, cf_handle)).fetchone()
+    return row[0] or 0, row[1] or 0
+
+
+def format_activity(row):
+    contest_id, index = row['contest_id'], row['problem_index']
+    return {
+        'time': row['creation_time'],
+        'problem': f"{contest_id or ''}{index or ''} - {row['problem_name'] or ''}",
+        'url': problem_url(contest_id, index),
+        'verdict': row['verdict']
+    }
+
+
+def compute_activity(rows, current_rating=0, max_rating=0, now=None):
+    """Streak, heatmap, recent activity and progress from submissions (newest first).
+
+    All day-based metrics come from one array of local day numbers, so each
+    timestamp is converted exactly once.
+    """
+    import numpy as np
+
+    now = now or time.time()
+    offset = _utc_offset_seconds()
+    heatmap_days = Config.ACTIVITY_HEATMAP_DAYS
+
+    times = np.fromiter((r['creation_time'] or 0 for r in rows), dtype=np.int64, count=len(rows))
+    solved = np.fromiter((r['verdict'] == 'OK' for r in rows), dtype=bool, count=len(rows))
+    days = (times + offset) // SECONDS_PER_DAY
+    today = int((now + offset) // SECONDS_PER_DAY)
+    age = today - days
+
+    # Current streak: consecutive solving days ending today
+    solving_days = np.unique(days[solved])[::-1]
+    expected = today - np.arange(len(solving_days))
+    mismatch = np.nonzero(solving_days != expected)[0]
+    streak = int(mismatch[0]) if len(mismatch) else len(solving_days)
+
+    # Daily heatmap, oldest day first
+    in_window = (age >= 0) & (age < heatmap_days)
+    position = heatmap_days - 1 - age[in_window]
+    submissions_per_day = np.bincount(position, minlength=heatmap_days)
+    solved_per_day = np.bincount(position, weights=solved[in_window], minlength=heatmap_days)
+    start_day = date(1970, 1, 1) + timedelta(days=today - heatmap_days + 1)
+
+    recent = age < RECENT_DAYS
+    recent_total = int(recent.sum())
+    recent_solved = int((recent & solved).sum())
+
+    unique_solved = len({
+        (r['contest_id'], r['problem_index']) for r, ok in zip(rows, solved) if ok
+    })
+
+    return {
+        'streak': streak,
+        'heatmap': {
+            'start_date': start_day.isoformat(),
+            'days': heatmap_days,
+            'submissions': submissions_per_day.tolist(),
+            'solved': solved_per_day.astype(np.int64).tolist()
+        },
+        'recent_activity': [format_activity(r) for r in rows[:RECENT_ACTIVITY_LIMIT]],
+        'recent_performance': {
+            'days': RECENT_DAYS,
+            'total_submissions': recent_total,
+            'solved': recent_solved,
+            'accuracy': recent_solved / recent_total if recent_total > 0 else 0
+        },
+        'total_submissions': len(rows),
+        'problems_solved': unique_solved,
+        'progress_score': round(calculate_progress_score(current_rating, max_rating, unique_solved), 2)
+    }
+
+
+def get_user_activity(cf_handle):
+    """Activity metrics for a handle, recomputed only after a sync brings new data"""
+    source, last_synced = sync_user_submissions(cf_handle)
+    return activity_after_sync(cf_handle, source, last_synced)
+
+
+async def get_user_activity_async(cf_handle):
+    source, last_synced = await sync_user_submissions_async(cf_handle)
+    return await run_db(activity_after_sync, cf_handle, source, last_synced)
+
+
+def load_submission_rows(cf_handle):
+    """Locally stored submissions of a handle, newest first"""
+    conn = get_db_connection()
+    try:
+        return _load_submissions(conn, cf_handle)
+    finally:
+        conn.close()
+
+
+def activity_after_sync(cf_handle, source, last_synced, rows=None):
+    """Activity for the store as of last_synced; rows saves the reload if already loaded"""
+    if last_synced is None:
+        return None
+
+    key = cf_handle.lower()
+    today = date.today()
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == last_synced and cached[1] == today:
+        return {**cached[2], 'source': source}
+
+    conn = get_db_connection()
+    try:
+        if rows is None:
+            rows = _load_submissions(conn, cf_handle)
+        current_rating, max_rating = _load_ratings(conn, cf_handle)
+    finally:
+        conn.close()
+
+    activity = compute_activity(rows, current_rating, max_rating)
+    with _cache_lock:
+        _cache[key] = (last_synced, today, activity)
+
+    return {**activity, 'source': source}
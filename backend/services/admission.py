@@ -0,0 +1,312 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from services.metrics import metrics
+from services.resilience import LastGoodCache, is_stale
+from utils.config import Config
+
+# Expensive routes (Flask rule syntax, shared by both apps) and the gate
+# whose concurrency budget they draw from
+GATED_ROUTES = {
+    '/api/recommendations/ml/<cf_handle>': 'recommendations',
+    '/api/recommendations/analyze/<cf_handle>': 'analysis',
+    '/api/recommendations/explain/<cf_handle>/<int:problem_id>': 'analysis',
+    '/api/users/<cf_handle>/bundle': 'bundle'
+}
+
+SHED_QUEUE_FULL = 'queue_full'
+SHED_TIMEOUT = 'timeout'
+SHED_RATE_LIMITED = 'rate_limited'
+
+
+class _Waiter:
+    __slots__ = ('event', 'loop', 'future', 'granted')
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RouteGate:
+    """Concurrency limit with a bounded FIFO wait queue for one class of routes.
+
+    Works for Flask threads (acquire) and asyncio tasks (acquire_async)
+    alike: a released slot is handed straight to the oldest waiter, so a
+    steady stream of new arrivals can't starve the queue. Waiting is capped
+    by ADMISSION_MAX_WAIT; past that the request is shed.
+    """
+
+    def __init__(self, name, limit=None, queue_size=None):
+        self.name = name
+        self.limit = limit or Config.ADMISSION_CONCURRENCY
+        self.queue_size = Config.ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        self.active = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        # Moving average of how long an admitted request holds its slot
+        self._service_time = 0.0
+
+    def _enter(self, waiter_factory):
+        """(True, None) on a free slot, (False, None) if the queue is full, else (False, waiter)"""
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True, None
+            if len(self._waiters) >= self.queue_size:
+                return False, None
+            waiter = waiter_factory()
+            self._waiters.append(waiter)
+            return False, waiter
+
+    def _settle(self, waiter):
+        """After a wait: True if the slot was handed over, else leave the queue"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def acquire(self, timeout):
+        """Block until a slot is free; returns None when admitted, else the shed reason"""
+        admitted, waiter = self._enter(lambda: _Waiter(event=threading.Event()))
+        if admitted:
+            return None
+        if waiter is None:
+            return SHED_QUEUE_FULL
+        waiter.event.wait(timeout)
+        return None if self._settle(waiter) else SHED_TIMEOUT
+
+    async def acquire_async(self, timeout):
+        loop = asyncio.get_running_loop()
+        admitted, waiter = self._enter(lambda: _Waiter(loop=loop, future=loop.create_future()))
+        if admitted:
+            return None
+        if waiter is None:
+            return SHED_QUEUE_FULL
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot we already got
+            if self._settle(waiter):
+                self.release()
+            raise
+        return None if self._settle(waiter) else SHED_TIMEOUT
+
+    def release(self, held=None):
+        """Give the slot back (to the oldest waiter if any); held is how long it was used"""
+        with self._lock:
+            if held is not None:
+                self._service_time = held if not self._service_time else 0.8 * self._service_time + 0.2 * held
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self.active -= 1
+
+    def queued(self):
+        with self._lock:
+            return len(self._waiters)
+
+    def retry_after(self):
+        """Seconds until the current queue has likely drained, at least 1"""
+        with self._lock:
+            backlog = (len(self._waiters) + self.active) / self.limit
+            return max(1, math.ceil(backlog * self._service_time))
+
+
+class ClientBuckets:
+    """Token bucket per client: ADMISSION_CLIENT_RATE requests/s, bursts of ADMISSION_CLIENT_BURST"""
+
+    def __init__(self, max_clients=None):
+        self.max_clients = max_clients or Config.ADMISSION_MAX_CLIENTS
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, client):
+        """0 if the client may proceed, else seconds until its next token"""
+        rate, burst = Config.ADMISSION_CLIENT_RATE, Config.ADMISSION_CLIENT_BURST
+        if rate <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            # Re-inserted last, so the least recently seen client is evicted first
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class Rejection:
+    """Why a request was not admitted, and what to answer instead"""
+
+    def __init__(self, gate, reason, retry_after, cached=None):
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = retry_after
+        # (body, content_type) of the last good response to the same URL
+        self.cached = cached
+
+    @property
+    def status_code(self):
+        return 429 if self.reason == SHED_RATE_LIMITED else 503
+
+    def body(self):
+        if self.reason == SHED_RATE_LIMITED:
+            return {'error': 'Too many requests', 'retry_after': self.retry_after}
+        return {'error': 'Server busy, try again shortly', 'retry_after': self.retry_after}
+
+    def headers(self):
+        if self.cached is not None:
+            return {'X-Upstream-Stale': 'true', 'Warning': '110 - "Response is Stale"', 'X-Load-Shed': self.reason}
+        return {'Retry-After': str(self.retry_after), 'X-Load-Shed': self.reason}
+
+
+class AdmissionController:
+    """Per-client rate limits and per-route concurrency for GATED_ROUTES.
+
+    A request first spends a token of its client's bucket (429 when empty),
+    then waits for a slot of its route's gate. Requests that can't get one
+    within ADMISSION_MAX_WAIT, or find the queue full, are shed: answered
+    with the last good response for the same URL when one is cached, else
+    with a fast 503 and Retry-After. Cheap routes (/api/health, ...) never
+    queue behind them.
+    """
+
+    def __init__(self):
+        self.gates = {name: RouteGate(name) for name in set(GATED_ROUTES.values())}
+        self.clients = ClientBuckets()
+        self.responses = LastGoodCache(Config.ADMISSION_STALE_ENTRIES)
+
+    def gate_for(self, rule):
+        if not Config.ADMISSION_ENABLED:
+            return None
+        name = GATED_ROUTES.get(rule)
+        return self.gates[name] if name else None
+
+    def _rejection(self, gate, reason, retry_after, url):
+        cached = self.responses.get(url) if reason != SHED_RATE_LIMITED else None
+        if cached is not None and time.time() - cached[1] > Config.ADMISSION_STALE_MAX_AGE:
+            cached = None
+        metrics.inc('admission_shed_total', {
+            'gate': gate.name, 'reason': reason, 'served': 'stale' if cached is not None else 'rejected'
+        })
+        return Rejection(gate, reason, retry_after, cached[0] if cached is not None else None)
+
+    def _check_client(self, gate, client, url):
+        wait = self.clients.take(client)
+        if wait:
+            return self._rejection(gate, SHED_RATE_LIMITED, max(1, math.ceil(wait)), url)
+        return None
+
+    def admit(self, gate, client, url):
+        """Block until admitted (returns None) or return the Rejection to send"""
+        rejection = self._check_client(gate, client, url)
+        if rejection is not None:
+            return rejection
+        started = time.perf_counter()
+        reason = gate.acquire(Config.ADMISSION_MAX_WAIT)
+        metrics.observe('admission_wait_seconds', time.perf_counter() - started, {'gate': gate.name})
+        return None if reason is None else self._rejection(gate, reason, gate.retry_after(), url)
+
+    async def admit_async(self, gate, client, url):
+        rejection = self._check_client(gate, client, url)
+        if rejection is not None:
+            return rejection
+        started = time.perf_counter()
+        reason = await gate.acquire_async(Config.ADMISSION_MAX_WAIT)
+        metrics.observe('admission_wait_seconds', time.perf_counter() - started, {'gate': gate.name})
+        return None if reason is None else self._rejection(gate, reason, gate.retry_after(), url)
+
+    def remember(self, url, status_code, body, content_type):
+        """Keep a successful response around to serve when this URL is shed"""
+        if status_code == 200 and Config.ADMISSION_STALE_ENTRIES > 0:
+            self.responses.put(url, (body, content_type))
+
+
+def client_key(remote_addr, forwarded_for=None):
+    """Client identity for rate limiting: the proxy-reported address if trusted"""
+    if forwarded_for and Config.ADMISSION_TRUST_FORWARDED:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr or 'unknown'
+
+
+def init_admission(app):
+    """Gate the Flask copies of GATED_ROUTES"""
+    from flask import request, g
+
+    @app.before_request
+    def _admit():
+        rule = request.url_rule.rule if request.url_rule else None
+        gate = admission.gate_for(rule)
+        if gate is None:
+            return None
+        client = client_key(request.remote_addr, request.headers.get('X-Forwarded-For'))
+        rejection = admission.admit(gate, client, request.full_path)
+        if rejection is None:
+            g._admission = (gate, time.perf_counter())
+            return None
+        if rejection.cached is not None:
+            body, content_type = rejection.cached
+            response = app.response_class(body, content_type=content_type)
+        else:
+            response = app.json.response(rejection.body())
+            response.status_code = rejection.status_code
+        response.headers.update(rejection.headers())
+        return response
+
+    @app.after_request
+    def _remember(response):
+        # Compressed bodies are skipped (their encoding depends on the client),
+        # as are answers that were stale already
+        if g.get('_admission') is None or response.direct_passthrough or is_stale():
+            return response
+        if 'Content-Encoding' not in response.headers:
+            admission.remember(request.full_path, response.status_code, response.get_data(), response.content_type)
+        return response
+
+    @app.teardown_request
+    def _release(exc):
+        admitted = g.pop('_admission', None)
+        if admitted is not None:
+            gate, started = admitted
+            gate.release(time.perf_counter() - started)
+
+
+# Global instance
+admission = AdmissionController()
+
+metrics.describe('admission_shed_total', 'counter', 'Requests not admitted per gate, reason and what was served instead')
+metrics.describe('admission_wait_seconds', 'histogram', 'Time spent queued for a route gate')
+metrics.describe('admission_queue_depth', 'gauge', 'Requests queued per route gate')
+metrics.describe('admission_in_flight', 'gauge', 'Admitted requests running per route gate')
+metrics.register_collector(lambda: [
+    metric
+    for gate in admission.gates.values()
+    for metric in (
+        ('admission_queue_depth', {'gate': gate.name}, gate.queued()),
+        ('admission_in_flight', {'gate': gate.name}, gate.active)
+    )
+])
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+import httpx
+import requests
+from services.cf_transport import build_async_transport
+from services.codeforces_api import cf_api
+from services.database import run_db
+from services.metrics import metrics
+from services.rate_limiter import current_priority
+from services.resilience import breakers, TRIAL
+
+
+class AsyncCodeforcesAPI:
+    """Non-blocking Codeforces client for the ASGI app.
+
+    Waiting for a rate-limit slot, backoff and the HTTP call itself are all
+    awaited, so thousands of in-flight upstream calls cost no threads.
+    Rate limiting, circuit breakers and the stale cache are shared with the
+    synchronous client so both paths respect one upstream budget. Slot
+    bookings can block on the shared limiter's SQLite lock, so they run on
+    the DB threads rather than the event loop.
+    """
+
+    def __init__(self, transport=None, limiter=None):
+        self.transport = transport or build_async_transport()
+        self.limiter = limiter or cf_api
+
+    async def _make_request(self, endpoint, params=None, deadline=None, allow_stale=True):
+        breaker = breakers.get(endpoint)
+        allowed = breaker.allow()
+        if not allowed:
+            metrics.inc('cf_api_requests_total', {'endpoint': endpoint, 'outcome': 'circuit_open'})
+            return self.limiter._serve_stale(endpoint, params, allow_stale)
+
+        try:
+            attempt = 0
+            while True:
+                # Rate limiting
+                if not await self._wait_for_slot(deadline):
+                    metrics.inc('cf_api_requests_total', {'endpoint': endpoint, 'outcome': 'deadline'})
+                    return None
+
+                start = time.perf_counter()
+                result, outcome = await self._send(endpoint, params)
+                elapsed = time.perf_counter() - start
+                if outcome == 'call_limit':
+                    # Settling penalizes the limiter, a blocking booking
+                    settled = await run_db(self.limiter._settle, endpoint, params, result, outcome, elapsed)
+                else:
+                    settled = self.limiter._settle(endpoint, params, result, outcome, elapsed)
+                if settled:
+                    return result
+
+                delay = self.limiter._retry_delay(endpoint, outcome, attempt, deadline)
+                if delay is None:
+                    return self.limiter._serve_stale(endpoint, params, allow_stale)
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            # Also runs on cancellation, so an abandoned trial frees the breaker
+            if allowed == TRIAL:
+                breaker.release_trial()
+
+    async def _wait_for_slot(self, deadline=None):
+        priority = current_priority()
+        started = time.time()
+        while True:
+            grant = await run_db(self.limiter._reserve_slot, priority, deadline)
+            if grant is None:
+                return False
+            delay, reserved = grant
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if reserved:
+                self.limiter._record_wait(priority, started)
+                return True
+
+    async def _send(self, endpoint, params):
+        """Perform one call through the transport; returns (result or None, outcome label)"""
+        try:
+            status_code, data = await self.transport.get(endpoint, params)
+            return self.limiter._classify(status_code, data)
+
+        except (httpx.TimeoutException, requests.exceptions.Timeout):
+            print("Request timeout")
+            return None, 'timeout'
+        except (httpx.HTTPError, requests.exceptions.RequestException) as e:
+            print(f"Request failed: {str(e)}")
+            return None, 'request_error'
+        except json.JSONDecodeError:
+            print("Invalid JSON response")
+            return None, 'invalid_json'
+
+    async def get_user_info(self, handle):
+        """Get user information"""
+        return await self._make_request('user.info', {'handles': handle})
+
+    async def get_user_submissions(self, handle, count=50, start=1, allow_stale=True):
+        """Get user submissions (newest first); count=None returns the full history"""
+        params = {'handle': handle, 'from': start}
+        if count is not None:
+            params['count'] = count
+        return await self._make_request('user.status', params, allow_stale=allow_stale)
+
+    async def get_user_rating(self, handle, allow_stale=True):
+        """Get user rating history"""
+        return await self._make_request('user.rating', {'handle': handle}, allow_stale=allow_stale)
+
+    async def close(self):
+        await self.transport.close()
+
+
+# Global instance
+async_cf_api = AsyncCodeforcesAPI()
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from services.catalog import catalog
+from services.database import get_db_connection
+from services.metrics import record_cache_result
+from models.problem import fetch_problem_dicts
+from utils.config import Config
+
+MIN_PROBLEM_RATING = 800
+# Rating assumed for users without one
+DEFAULT_USER_RATING = 1200
+
+
+def band_of(rating):
+    return int(rating) // Config.RECOMMENDATION_BAND_WIDTH
+
+
+def band_window(band):
+    """(center, rating_min, rating_max) of the candidate window for a band"""
+    width = Config.RECOMMENDATION_BAND_WIDTH
+    center = band * width + width // 2
+    return center, max(MIN_PROBLEM_RATING, center - 300), center + 400
+
+
+def fit_score(rating_diff):
+    """(score, reason) for how well a problem's rating fits the user's"""
+    if rating_diff <= 100:
+        return 1.0, "Perfect difficulty match"
+    if rating_diff <= 200:
+        return 0.8, "Good difficulty match"
+    return 0.5, "Challenging problem"
+
+
+def build_band(band, page=0):
+    """One page of a band's candidates, best first: rating fit, then popularity.
+
+    Only the user-independent parts are scored here, and SQLite does the
+    ordering so only the kept rows are decoded. Per-user exclusion and tag
+    boosts happen on the top of this list at request time. Page 0 is the
+    cached one; later pages are only read for users who solved all of it.
+    """
+    size = Config.RECOMMENDATION_BAND_SIZE
+    center, rating_min, rating_max = band_window(band)
+    conn = get_db_connection()
+    try:
+        problems = fetch_problem_dicts(conn, '''
+            SELECT * FROM problems
+            WHERE rating BETWEEN ? AND ?
+            ORDER BY
+                CASE WHEN ABS(rating - ?) <= 100 THEN 0 WHEN ABS(rating - ?) <= 200 THEN 1 ELSE 2 END,
+                solved_count DESC, id
+            LIMIT ? OFFSET ?
+        ''', (rating_min, rating_max, center, center, size, page * size))
+    finally:
+        conn.close()
+
+    for problem in problems:
+        problem['_key'] = f"{problem['contest_id']}-{problem['index']}"
+    return problems
+
+
+def busiest_bands(limit):
+    """Bands holding the most users, busiest first"""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT COALESCE(NULLIF(rating, 0), ?) / ? AS band, COUNT(*) AS users
+            FROM users
+            GROUP BY band
+            ORDER BY users DESC, band
+            LIMIT ?
+        ''', (DEFAULT_USER_RATING, Config.RECOMMENDATION_BAND_WIDTH, limit)).fetchall()
+    finally:
+        conn.close()
+    return [row['band'] for row in rows] or [band_of(DEFAULT_USER_RATING)]
+
+
+class CandidateCache:
+    """Pre-scored candidate lists shared by every user in a rating band.
+
+    Users with similar ratings get the same window, so the catalog query and
+    the user-independent scoring run once per band instead of per request.
+    Bands are built on first use (one builder per band, concurrent callers
+    wait for it), kept in LRU order and dropped when the catalog changes.
+    Other processes' catalog changes are picked up after
+    RECOMMENDATION_BAND_TTL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bands = OrderedDict()
+        self._building = {}
+        self._version = catalog.version
+
+    def get(self, band):
+        """Candidate list for a band; treat it as read-only"""
+        with self._lock:
+            entry = self._bands.get(band)
+            if entry is not None and time.time() - entry[0] < Config.RECOMMENDATION_BAND_TTL:
+                self._bands.move_to_end(band)
+                record_cache_result('recommendation_candidates', 'hit')
+                return entry[1]
+            event = self._building.get(band)
+            builder = event is None
+            if builder:
+                event = self._building[band] = threading.Event()
+            version = self._version
+
+        if not builder:
+            event.wait()
+            with self._lock:
+                entry = self._bands.get(band)
+            if entry is not None:
+                return entry[1]
+            # The build failed or was invalidated; build our own copy
+            return build_band(band)
+
+        record_cache_result('recommendation_candidates', 'miss')
+        try:
+            candidates = build_band(band)
+            with self._lock:
+                # A catalog change during the build makes this list outdated
+                if version == self._version:
+                    self._bands[band] = (time.time(), candidates)
+                    self._bands.move_to_end(band)
+                    while len(self._bands) > Config.RECOMMENDATION_BANDS_CACHED:
+                        self._bands.popitem(last=False)
+            return candidates
+        finally:
+            with self._lock:
+                self._building.pop(band, None)
+            event.set()
+
+    def warm(self, limit=None):
+        """Build the busiest bands now, so a fresh worker's first requests skip SQLite"""
+        limit = min(Config.RECOMMENDATION_WARM_BANDS if limit is None else limit, Config.RECOMMENDATION_BANDS_CACHED)
+        bands = busiest_bands(limit) if limit > 0 else []
+        for band in bands:
+            self.get(band)
+        return {'bands': len(bands)}
+
+    def invalidate(self, version=None, contest_ids=None):
+        with self._lock:
+            self._bands.clear()
+            self._version = catalog.version if version is None else version
+
+
+# Global instance
+candidate_cache = CandidateCache()
+catalog.subscribe(candidate_cache.invalidate)
+
+
+def band_candidates(band):
+    """Every candidate of a band in order: the cached page, then deeper pages as they are consumed"""
+    page, candidates = 0, candidate_cache.get(band)
+    while True:
+        yield from candidates
+        if len(candidates) < Config.RECOMMENDATION_BAND_SIZE:
+            return
+        page += 1
+        candidates = build_band(band, page)
@@ -0,0 +1,38 @@
+import threading
+
+
+class ProblemCatalog:
+    """Process-wide hub for in-memory views of the problems table.
+
+    Anything that caches problems (indexes, candidate lists, ...) subscribes
+    here and is told when the problems table changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.version = 0
+
+    def subscribe(self, callback):
+        """Register callback(version, contest_ids) for catalog changes"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def notify_changed(self, contest_ids=None):
+        """Bump the catalog version and notify every subscriber"""
+        with self._lock:
+            self.version += 1
+            version = self.version
+            listeners = list(self._listeners)
+
+        for callback in listeners:
+            try:
+                callback(version, contest_ids)
+            except Exception as e:
+                print(f"Catalog listener failed: {str(e)}")
+
+        return version
+
+
+# Global instance
+catalog = ProblemCatalog()
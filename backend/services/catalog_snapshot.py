@@ -0,0 +1,238 @@
+import json
+import os
+import shutil
+import threading
+import time
+from services.catalog import catalog
+from services.database import get_db_connection
+from utils.config import Config
+
+FORMAT_VERSION = 1
+CURRENT_FILE = 'CURRENT'
+COLUMNS = ('ids', 'ratings', 'solved_counts', 'contest_ids', 'tag_bits')
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped columns of the problems table, sorted by rating.
+
+    Unrated problems are stored with rating 0 and so sort first.
+
+    Workers share the pages of the mapped files through the OS page cache,
+    so a new worker is warm as soon as the files are opened.
+    """
+
+    def __init__(self, path, meta, columns):
+        self.path = path
+        self.meta = meta
+        self.tags = meta['tags']
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rating_range(self, rating_min, rating_max):
+        """Slice bounds of the problems rated within [rating_min, rating_max]"""
+        import numpy as np
+
+        lo = int(np.searchsorted(self.ratings, rating_min, side='left'))
+        hi = int(np.searchsorted(self.ratings, rating_max, side='right'))
+        return lo, hi
+
+    def tag_counts(self):
+        """{tag: number of problems}, tags without problems omitted"""
+        import numpy as np
+
+        counts = {}
+        for bit, tag in enumerate(self.tags):
+            count = int(np.count_nonzero(self.tag_bits & np.uint64(1 << bit)))
+            if count:
+                counts[tag] = count
+        return counts
+
+    def summary(self):
+        return {
+            'path': self.path,
+            'created': self.meta['created'],
+            'catalog_version': self.meta['catalog_version'],
+            'problems': len(self),
+            'tags': len(self.tags)
+        }
+
+
+def _snapshot_root():
+    return os.path.join(Config.SNAPSHOT_DIR, 'catalog')
+
+
+def catalog_columns():
+    """(columns, tags) of the problems table, sorted by rating, as NumPy arrays"""
+    import numpy as np
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT id, COALESCE(rating, 0) AS rating, solved_count, contest_id, tags
+            FROM problems
+            ORDER BY rating, id
+        ''').fetchall()
+    finally:
+        conn.close()
+
+    tag_lists = [json.loads(row['tags']) if row['tags'] else [] for row in rows]
+    tags = sorted({tag for problem_tags in tag_lists for tag in problem_tags})
+    # One bit per tag; Codeforces has fewer than 64 tags
+    tags = tags[:64]
+    tag_index = {tag: bit for bit, tag in enumerate(tags)}
+
+    tag_bits = np.zeros(len(rows), dtype=np.uint64)
+    for i, problem_tags in enumerate(tag_lists):
+        bits = 0
+        for tag in problem_tags:
+            if tag in tag_index:
+                bits |= 1 << tag_index[tag]
+        tag_bits[i] = bits
+
+    columns = {
+        'ids': np.fromiter((row['id'] for row in rows), dtype=np.int64, count=len(rows)),
+        'ratings': np.fromiter((row['rating'] for row in rows), dtype=np.int32, count=len(rows)),
+        'solved_counts': np.fromiter((row['solved_count'] or 0 for row in rows), dtype=np.int64, count=len(rows)),
+        'contest_ids': np.fromiter((row['contest_id'] or 0 for row in rows), dtype=np.int32, count=len(rows)),
+        'tag_bits': tag_bits
+    }
+    return columns, tags
+
+
+def in_memory_snapshot():
+    """A snapshot read straight from the DB, for when no file snapshot is mapped"""
+    columns, tags = catalog_columns()
+    meta = {'created': time.time(), 'catalog_version': catalog.version, 'tags': tags}
+    return CatalogSnapshot(None, meta, columns)
+
+
+def write_snapshot(root=None):
+    """Export the problems table into a new snapshot directory and make it current.
+
+    The directory is fully written before CURRENT is atomically replaced, so
+    readers never see a half-written snapshot. Returns the snapshot path.
+    """
+    import numpy as np
+
+    root = root or _snapshot_root()
+    os.makedirs(root, exist_ok=True)
+    columns, tags = catalog_columns()
+
+    name = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{time.time_ns() % 1000000:06d}"
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    for column, values in columns.items():
+        np.save(os.path.join(path, f"{column}.npy"), values)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({
+            'format': FORMAT_VERSION,
+            'created': time.time(),
+            'catalog_version': catalog.version,
+            'problems': len(columns['ids']),
+            'tags': tags
+        }, f)
+
+    pointer = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(pointer, 'w') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+
+    _prune(root, keep=name)
+    return path
+
+
+def _prune(root, keep):
+    """Remove old snapshot directories, leaving the newest SNAPSHOT_KEEP"""
+    names = sorted(
+        (n for n in os.listdir(root) if os.path.isdir(os.path.join(root, n))),
+        reverse=True
+    )
+    for name in names[Config.SNAPSHOT_KEEP:]:
+        if name != keep:
+            # Workers still mapping an old snapshot keep their open files
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def load_snapshot(root=None):
+    """Memory-map the current snapshot, or None if there is none"""
+    import numpy as np
+
+    root = root or _snapshot_root()
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            path = os.path.join(root, f.read().strip())
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('format') != FORMAT_VERSION:
+        return None
+
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+    return CatalogSnapshot(path, meta, columns)
+
+
+class SnapshotHolder:
+    """The snapshot this worker serves from.
+
+    Picks up snapshots written by other processes (build step, another
+    worker after an import) by re-checking CURRENT at most every
+    SNAPSHOT_CHECK_INTERVAL seconds, and drops the snapshot as soon as this
+    process changes the catalog.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._pointer_mtime = None
+        self._checked_at = 0
+
+    def _pointer_stat(self):
+        try:
+            return os.stat(os.path.join(_snapshot_root(), CURRENT_FILE)).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """(Re)load the current snapshot; returns it or None"""
+        mtime = self._pointer_stat()
+        snapshot = load_snapshot()
+        with self._lock:
+            self._snapshot = snapshot
+            self._pointer_mtime = mtime
+            self._checked_at = time.time()
+        return snapshot
+
+    def get(self):
+        """The current snapshot, or None when callers must fall back to SQL"""
+        if time.time() - self._checked_at >= Config.SNAPSHOT_CHECK_INTERVAL:
+            self._checked_at = time.time()
+            if self._pointer_stat() != self._pointer_mtime:
+                return self.load()
+        return self._snapshot
+
+    def invalidate(self, version=None, contest_ids=None):
+        with self._lock:
+            self._snapshot = None
+
+    def refresh(self):
+        """Rebuild the snapshot from the DB and serve it"""
+        write_snapshot()
+        return self.load()
+
+
+# Global instance
+snapshots = SnapshotHolder()
+
+
+def _on_catalog_change(version, contest_ids):
+    snapshots.invalidate()
+    # Rebuild off the request thread; SQL serves in the meantime
+    threading.Thread(target=snapshots.refresh, name='catalog-snapshot', daemon=True).start()
+
+
+catalog.subscribe(_on_catalog_change)
@@ -0,0 +1,211 @@
+import asyncio
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlencode
+import requests
+from utils.config import Config
+
+
+def fixture_key(endpoint, params):
+    """Stable key for an endpoint call; params are compared as strings"""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    return f"{endpoint}?{urlencode(items)}"
+
+
+class HttpTransport:
+    """Talks to the real Codeforces API"""
+
+    def __init__(self, base_url=None, timeout=15):
+        self.base_url = base_url or Config.CODEFORCES_API_BASE
+        self.timeout = timeout
+
+    def get(self, endpoint, params):
+        """Returns (status_code, decoded JSON body); raises requests exceptions"""
+        response = requests.get(f"{self.base_url}/{endpoint}", params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            # Codeforces explains most errors (bad handle, call limit) in a JSON body
+            try:
+                return response.status_code, response.json()
+            except ValueError:
+                return response.status_code, None
+        return response.status_code, response.json()
+
+
+class RecordingTransport:
+    """Passes calls to another transport and appends every response to a gzip JSON-lines archive"""
+
+    def __init__(self, inner, archive_path):
+        self.inner = inner
+        self.archive_path = archive_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(archive_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, endpoint, params):
+        status_code, payload = self.inner.get(endpoint, params)
+        record = {
+            'key': fixture_key(endpoint, params),
+            'endpoint': endpoint,
+            'params': params,
+            'status_code': status_code,
+            'payload': payload,
+            'recorded_at': time.time()
+        }
+        with self._lock:
+            # Each append is its own gzip member; readers see one stream
+            with gzip.open(self.archive_path, 'at', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        return status_code, payload
+
+
+def load_archive(archive_path):
+    """key -> (status_code, payload); later recordings win"""
+    fixtures = {}
+    with gzip.open(archive_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                fixtures[record['key']] = (record['status_code'], record['payload'])
+    return fixtures
+
+
+class ReplayTransport:
+    """Serves recorded responses with configurable latency and injected failures.
+
+    Failure rates are probabilities per call: timeout raises
+    requests.exceptions.Timeout after `timeout_after` seconds, failed returns
+    a FAILED status ("Call limit exceeded") and http_503 returns HTTP 503.
+    Calls missing from the archive get a FAILED "not recorded" response.
+    """
+
+    def __init__(self, archive_path, latency=0.0, jitter=0.0, timeout_rate=0.0,
+                 failed_rate=0.0, http_503_rate=0.0, timeout_after=None, seed=None):
+        self.fixtures = load_archive(archive_path)
+        self.latency = latency
+        self.jitter = jitter
+        self.timeout_rate = timeout_rate
+        self.failed_rate = failed_rate
+        self.http_503_rate = http_503_rate
+        self.timeout_after = latency if timeout_after is None else timeout_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.misses = 0
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            return self._rng.random(), self._rng.uniform(-self.jitter, self.jitter)
+
+    def get(self, endpoint, params):
+        roll, jitter = self._draw()
+
+        if roll < self.timeout_rate:
+            time.sleep(self.timeout_after)
+            raise requests.exceptions.Timeout(f"Injected timeout for {endpoint}")
+
+        delay = max(0.0, self.latency + jitter)
+        if delay:
+            time.sleep(delay)
+
+        roll -= self.timeout_rate
+        if roll < self.failed_rate:
+            return 200, {'status': 'FAILED', 'comment': 'Call limit exceeded'}
+        roll -= self.failed_rate
+        if roll < self.http_503_rate:
+            return 503, None
+
+        fixture = self.fixtures.get(fixture_key(endpoint, params))
+        if fixture is None:
+            with self._lock:
+                self.misses += 1
+            return 200, {'status': 'FAILED', 'comment': f"No recorded response for {endpoint}"}
+        return fixture
+
+
+def build_transport():
+    """Transport selected by CF_TRANSPORT: http (default), record or replay"""
+    mode = Config.CF_TRANSPORT
+    if mode == 'record':
+        return RecordingTransport(HttpTransport(), Config.CF_FIXTURE_ARCHIVE)
+    if mode == 'replay':
+        if not os.path.exists(Config.CF_FIXTURE_ARCHIVE):
+            raise RuntimeError(
+                f"CF_TRANSPORT=replay but CF_FIXTURE_ARCHIVE {Config.CF_FIXTURE_ARCHIVE} does not exist; "
+                "record one with CF_TRANSPORT=record first"
+            )
+        return ReplayTransport(
+            Config.CF_FIXTURE_ARCHIVE,
+            latency=Config.CF_REPLAY_LATENCY,
+            jitter=Config.CF_REPLAY_JITTER,
+            timeout_rate=Config.CF_REPLAY_TIMEOUT_RATE,
+            failed_rate=Config.CF_REPLAY_FAILED_RATE,
+            http_503_rate=Config.CF_REPLAY_503_RATE,
+            seed=Config.CF_REPLAY_SEED
+        )
+    return HttpTransport()
+
+
+class AsyncHttpTransport:
+    """Talks to the real Codeforces API without holding a thread per call.
+
+    One pooled httpx.AsyncClient per event loop; close() releases it on
+    shutdown. Raises httpx exceptions.
+    """
+
+    def __init__(self, base_url=None, timeout=15, max_connections=None):
+        import httpx
+        self._httpx = httpx
+        self.base_url = base_url or Config.CODEFORCES_API_BASE
+        self.timeout = timeout
+        self.max_connections = max_connections or Config.CF_ASYNC_MAX_CONNECTIONS
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = self._httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self._httpx.Limits(max_connections=self.max_connections)
+            )
+        return self._client
+
+    async def get(self, endpoint, params):
+        """Returns (status_code, decoded JSON body)"""
+        response = await self._get_client().get(f"/{endpoint}", params=params)
+        if response.status_code != 200:
+            try:
+                return response.status_code, response.json()
+            except ValueError:
+                return response.status_code, None
+        return response.status_code, response.json()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ThreadedTransport:
+    """Async adapter running a blocking transport (record/replay, stubs) in a thread"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def get(self, endpoint, params):
+        return await asyncio.to_thread(self.inner.get, endpoint, params)
+
+    async def close(self):
+        pass
+
+
+def build_async_transport():
+    """Async counterpart of build_transport(); record/replay run through a thread"""
+    if Config.CF_TRANSPORT == 'http':
+        return AsyncHttpTransport()
+    return ThreadedTransport(build_transport())
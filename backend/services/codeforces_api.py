@@ -1,54 +1,195 @@
 import requests
 import time
 import json
+from services.cf_transport import build_transport, fixture_key
+from services.metrics import metrics
+from services.rate_limiter import build_rate_limiter, current_priority
+from services.resilience import breakers, last_good, backoff_delay, mark_stale, CLOSED, TRIAL
 from utils.config import Config
 
+NON_RETRYABLE_OUTCOMES = ('api_error', 'http_client_error')
+
 class CodeforcesAPI:
-    def __init__(self):
+    def __init__(self, transport=None, limiter=None):
         self.base_url = Config.CODEFORCES_API_BASE
-        self.last_request_time = 0
-        self.min_request_interval = 0.5  # 500ms between requests for safety
-    
-    def _make_request(self, endpoint, params=None):
-        # Rate limiting
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
+        self.transport = transport or build_transport()
+        # Shared by all worker processes on the host unless CF_RATE_LIMITER=local
+        self.limiter = limiter or build_rate_limiter()
+    
+    @property
+    def min_request_interval(self):
+        return self.limiter.interval
+    
+    @min_request_interval.setter
+    def min_request_interval(self, interval):
+        self.limiter.interval = interval
+    
+    def _reserve_slot(self, priority, deadline=None):
+        """One booking attempt for the caller's priority class.
+        
+        Returns (delay, reserved) like RateLimiter.reserve, or None if the
+        deadline can't be met. Shared with the async client so both respect
+        one limit.
+        """
+        grant = self.limiter.reserve(priority, deadline)
+        if grant is not None and not grant[1]:
+            metrics.inc('cf_api_rate_limit_deferrals_total', {'priority': priority})
+        return grant
+    
+    @staticmethod
+    def _record_wait(priority, started):
+        metrics.observe('cf_api_rate_limit_wait_seconds', time.time() - started, {'priority': priority})
+    
+    def _wait_for_slot(self, deadline=None):
+        priority = current_priority()
+        started = time.time()
+        while True:
+            grant = self._reserve_slot(priority, deadline)
+            if grant is None:
+                return False
+            delay, reserved = grant
+            if delay > 0:
+                time.sleep(delay)
+            if reserved:
+                self._record_wait(priority, started)
+                return True
+    
+    def next_slot_time(self):
+        """Earliest time the next request may be sent"""
+        return self.limiter.next_slot_time()
+    
+    def _penalize(self):
+        """Push every pending caller back after a "Call limit exceeded" answer"""
+        self.limiter.penalize(Config.CF_CALL_LIMIT_PENALTY)
+    
+    def _serve_stale(self, endpoint, params, allow_stale=True):
+        """Last known good response for this call, flagged as stale, or None"""
+        if not allow_stale:
+            return None
+        entry = last_good.get(fixture_key(endpoint, params))
+        if entry is None:
+            return None
+        metrics.inc('cf_api_stale_responses_total', {'endpoint': endpoint})
+        mark_stale()
+        return entry[0]
+    
+    def _settle(self, endpoint, params, result, outcome, elapsed, cache_last_good=True):
+        """Record one attempt; True when no retry should follow"""
+        metrics.observe('cf_api_request_duration_seconds', elapsed, {'endpoint': endpoint})
+        metrics.inc('cf_api_requests_total', {'endpoint': endpoint, 'outcome': outcome})
+        breaker = breakers.get(endpoint)
+        
+        if outcome == 'ok':
+            breaker.record_success()
+            if cache_last_good:
+                last_good.put(fixture_key(endpoint, params), result)
+            return True
+        
+        if outcome in NON_RETRYABLE_OUTCOMES:
+            # Upstream answered; the request itself is bad (e.g. unknown handle)
+            breaker.record_success()
+            return True
+        
+        if outcome == 'call_limit':
+            self._penalize()
+        else:
+            breaker.record_failure()
+        return False
+    
+    def _retry_delay(self, endpoint, outcome, attempt, deadline):
+        """Backoff before the next attempt, or None when giving up"""
+        if attempt >= Config.CF_MAX_RETRIES or breakers.get(endpoint).state != CLOSED:
+            return None
+        delay = backoff_delay(attempt)
+        if deadline is not None and time.time() + delay >= deadline:
+            return None
+        metrics.inc('cf_api_retries_total', {'endpoint': endpoint, 'outcome': outcome})
+        return delay
+    
+    def _make_request(self, endpoint, params=None, deadline=None, allow_stale=True, cache_last_good=True):
+        """Result of a call, retried with backoff; None if it failed.
+        
+        With allow_stale, a failed call is answered from the last known good
+        response (and the request flagged stale) when there is one.
+        cache_last_good=False keeps bulk answers (standings pages, the whole
+        problemset) out of that bounded cache, where they would pin memory
+        and evict the per-user entries stale serving is for.
+        """
+        breaker = breakers.get(endpoint)
+        allowed = breaker.allow()
+        if not allowed:
+            metrics.inc('cf_api_requests_total', {'endpoint': endpoint, 'outcome': 'circuit_open'})
+            return self._serve_stale(endpoint, params, allow_stale)
         
         try:
-            url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, params=params, timeout=15)
-            self.last_request_time = time.time()
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['status'] == 'OK':
-                    return data['result']
-                else:
-                    print(f"API Error: {data.get('comment', 'Unknown error')}")
+            attempt = 0
+            while True:
+                # Rate limiting
+                if not self._wait_for_slot(deadline):
+                    metrics.inc('cf_api_requests_total', {'endpoint': endpoint, 'outcome': 'deadline'})
                     return None
-            else:
-                print(f"HTTP Error: {response.status_code}")
-                return None
+                
+                start = time.perf_counter()
+                result, outcome = self._send(endpoint, params)
+                if self._settle(endpoint, params, result, outcome, time.perf_counter() - start, cache_last_good):
+                    return result
+                
+                delay = self._retry_delay(endpoint, outcome, attempt, deadline)
+                if delay is None:
+                    return self._serve_stale(endpoint, params, allow_stale)
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            # A trial that ended without an outcome must not wedge the breaker
+            if allowed == TRIAL:
+                breaker.release_trial()
+    
+    @staticmethod
+    def _classify(status_code, data):
+        """(result or None, outcome label) for a decoded upstream answer"""
+        if isinstance(data, dict) and data.get('status') == 'OK' and status_code == 200:
+            return data['result'], 'ok'
+        
+        if isinstance(data, dict) and data.get('status') == 'FAILED':
+            comment = data.get('comment', 'Unknown error')
+            print(f"API Error: {comment}")
+            if 'call limit exceeded' in comment.lower():
+                return None, 'call_limit'
+            return None, 'api_error'
+        
+        print(f"HTTP Error: {status_code}")
+        if status_code == 429:
+            return None, 'call_limit'
+        if 400 <= status_code < 500:
+            return None, 'http_client_error'
+        return None, 'http_error'
+    
+    def _send(self, endpoint, params):
+        """Perform one call through the transport; returns (result or None, outcome label)"""
+        try:
+            status_code, data = self.transport.get(endpoint, params)
+            return self._classify(status_code, data)
                 
         except requests.exceptions.Timeout:
             print("Request timeout")
-            return None
+            return None, 'timeout'
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {str(e)}")
-            return None
+            return None, 'request_error'
         except json.JSONDecodeError:
             print("Invalid JSON response")
-            return None
+            return None, 'invalid_json'
     
     def get_user_info(self, handle):
         """Get user information"""
         return self._make_request('user.info', {'handles': handle})
     
-    def get_user_submissions(self, handle, count=50):
-        """Get user submissions"""
-        return self._make_request('user.status', {'handle': handle, 'from': 1, 'count': count})
+    def get_user_submissions(self, handle, count=50, start=1, allow_stale=True):
+        """Get user submissions (newest first); count=None returns the full history"""
+        params = {'handle': handle, 'from': start}
+        if count is not None:
+            params['count'] = count
+        return self._make_request('user.status', params, allow_stale=allow_stale)
     
     def get_contest_list(self, gym=False):
         """Get list of contests"""
@@ -59,18 +200,32 @@ class CodeforcesAPI:
         params = {}
         if tags:
             params['tags'] = ';'.join(tags) if isinstance(tags, list) else tags
-        return self._make_request('problemset.problems', params)
+        return self._make_request('problemset.problems', params, cache_last_good=False)
     
-    def get_contest_standings(self, contest_id, handles=None, count=50):
-        """Get contest standings"""
-        params = {'contestId': contest_id, 'count': count}
+    def get_contest_standings(self, contest_id, handles=None, count=50, start=1, deadline=None):
+        """Get contest standings (official participants only), count rows from rank start"""
+        params = {'contestId': contest_id, 'from': start, 'count': count, 'showUnofficial': False}
         if handles:
             params['handles'] = ';'.join(handles) if isinstance(handles, list) else handles
-        return self._make_request('contest.standings', params)
+        return self._make_request('contest.standings', params, deadline=deadline, cache_last_good=False)
+    
+    def get_contest_problems(self, contest_id, deadline=None):
+        """Get the problem list of a single contest (standings header only)"""
+        standings = self._make_request(
+            'contest.standings', {'contestId': contest_id, 'from': 1, 'count': 1},
+            deadline=deadline, cache_last_good=False
+        )
+        if standings is None:
+            return None
+        return standings.get('problems', [])
     
-    def get_user_rating(self, handle):
+    def get_user_rating(self, handle, allow_stale=True):
         """Get user rating history"""
-        return self._make_request('user.rating', {'handle': handle})
+        return self._make_request('user.rating', {'handle': handle}, allow_stale=allow_stale)
 
 # Global instance
 cf_api = CodeforcesAPI()
+
+metrics.register_collector(lambda: [
+    ('cf_api_rate_limit_backlog_seconds', None, cf_api.limiter.backlog())
+])
@@ -1,9 +1,84 @@
+import asyncio
 import sqlite3
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from services.metrics import metrics
 from utils.config import Config
 
+def _record_query(sql, elapsed, phase='execute'):
+    statement = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'UNKNOWN'
+    metrics.observe('db_query_duration_seconds', elapsed, {'statement': statement, 'phase': phase})
+    if phase == 'execute':
+        metrics.inc('db_queries_total', {'statement': statement})
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that records statement timings (execute plus fetchall)"""
+    def execute(self, sql, parameters=()):
+        self._last_sql = sql
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - start)
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._last_sql = sql
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - start)
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _record_query(getattr(self, '_last_sql', ''), time.perf_counter() - start, 'fetch')
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+_db_executor = None
+_db_executor_lock = threading.Lock()
+
+def _get_db_executor():
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(max_workers=Config.ASYNC_DB_THREADS, thread_name_prefix='db')
+        return _db_executor
+
+async def run_db(fn, *args, **kwargs):
+    """Await a blocking DB function from async code.
+
+    sqlite3 has no async driver, so calls run on a small dedicated pool;
+    a slow upstream wait never holds one of these threads.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_db_executor(), lambda: fn(*args, **kwargs))
+
+def get_db_path():
+    """Filesystem path of the SQLite DB named by Config.DATABASE_URL"""
+    url = Config.DATABASE_URL
+    if url.startswith('sqlite:///'):
+        return url[len('sqlite:///'):]
+    return url
+
 def get_db_connection():
-    conn = sqlite3.connect('cf_recommender.db')
+    if Config.METRICS_ENABLED:
+        conn = sqlite3.connect(get_db_path(), factory=InstrumentedConnection)
+    else:
+        conn = sqlite3.connect(get_db_path())
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -35,6 +110,7 @@ def init_db():
             solved_count INTEGER DEFAULT 0
         )
     ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_problems_contest_id ON problems (contest_id)')
     
     # User submissions table
     conn.execute('''
@@ -62,7 +138,142 @@ def init_db():
             FOREIGN KEY (problem_id) REFERENCES problems (id)
         )
     ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_recommendations_created_at
+        ON recommendations (created_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_recommendations_user_created
+        ON recommendations (user_id, created_at)
+    ''')
+    
+    # Per-user daily aggregates of recommendations removed by retention
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS recommendation_daily (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            recommendations INTEGER NOT NULL,
+            scored INTEGER NOT NULL,
+            score_sum REAL NOT NULL,
+            last_created_at TIMESTAMP,
+            PRIMARY KEY (user_id, day)
+        )
+    ''')
+    
+    # Practice ladders: problem order per 100-point rating band
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ladders (
+            band INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            problem_id INTEGER NOT NULL,
+            PRIMARY KEY (band, position)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Rating history cached from user.rating
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rating_changes (
+            cf_handle TEXT NOT NULL COLLATE NOCASE,
+            contest_id INTEGER NOT NULL,
+            contest_name TEXT,
+            rank INTEGER,
+            old_rating INTEGER,
+            new_rating INTEGER,
+            update_time INTEGER,
+            PRIMARY KEY (cf_handle, contest_id)
+        )
+    ''')
+    
+    # Submissions synced from user.status, keyed by Codeforces submission id
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_submissions (
+            id INTEGER PRIMARY KEY,
+            cf_handle TEXT NOT NULL COLLATE NOCASE,
+            contest_id INTEGER,
+            problem_index TEXT,
+            problem_name TEXT,
+            problem_rating INTEGER,
+            tags TEXT,
+            verdict TEXT,
+            creation_time INTEGER
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_submissions_handle_time
+        ON user_submissions (cf_handle, creation_time)
+    ''')
+    
+    # Solved/attempted problems of contest participants, from contest.standings
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS interactions (
+            cf_handle TEXT NOT NULL COLLATE NOCASE,
+            contest_id INTEGER NOT NULL,
+            problem_index TEXT NOT NULL,
+            solved INTEGER NOT NULL,
+            PRIMARY KEY (cf_handle, contest_id, problem_index)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Standings ingestion checkpoint: next standings row (`from`) to fetch per contest
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS standings_progress (
+            contest_id INTEGER PRIMARY KEY,
+            next_row INTEGER NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            interactions INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL
+        )
+    ''')
+    
+    # Background jobs; shared so a poll can land on any worker
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            submitted_at REAL NOT NULL,
+            finished_at REAL,
+            result TEXT,
+            error TEXT
+        )
+    ''')
+    
+    # Problem ingestion attempts, so contests that stay unrated are retried with backoff
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contest_fetches (
+            contest_id INTEGER PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_attempt REAL,
+            retry_after REAL
+        )
+    ''')
+    
+    # Last successful upstream sync per handle and data kind
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            cf_handle TEXT NOT NULL COLLATE NOCASE,
+            kind TEXT NOT NULL,
+            last_synced REAL,
+            PRIMARY KEY (cf_handle, kind)
+        )
+    ''')
     
     conn.commit()
     conn.close()
     print("Database initialized successfully!")
+
+def get_last_synced(conn, cf_handle, kind):
+    """Timestamp of the last successful upstream sync, or None"""
+    row = conn.execute(
+        'SELECT last_synced FROM sync_state WHERE cf_handle = ? AND kind = ?',
+        (cf_handle, kind)
+    ).fetchone()
+    return row['last_synced'] if row else None
+
+def mark_synced(conn, cf_handle, kind, synced_at):
+    """Record a successful upstream sync (caller commits)"""
+    conn.execute('''
+        INSERT OR REPLACE INTO sync_state (cf_handle, kind, last_synced)
+        VALUES (?, ?, ?)
+    ''', (cf_handle, kind, synced_at))
@@ -0,0 +1,70 @@
+from services.codeforces_api import cf_api
+from services.jobs import job_manager, CPU, IO
+from services.ladders import build_ladders
+from services.ml_service import (
+    analyze_user_performance, build_model_artifact, get_recommendations, recommendation_engine
+)
+from services.rate_limiter import upstream_priority, BACKGROUND
+from services.recommendation_log import recommendation_writer
+from services.similar_problems import build_similarity_index, similar_problems
+from services.standings_ingest import ingest_standings
+from services.submission_sync import sync_user_submissions
+from models.recommendation import Recommendation
+from utils.config import Config
+
+
+def _install_artifact(published):
+    """Map the artifact the job just wrote; other workers pick it up on their next check"""
+    if published is None:
+        raise ValueError('No interaction data to build the model from')
+    recommendation_engine.reload()
+    return recommendation_engine.user_item_matrix.summary()
+
+
+def _install_similarity_index(built):
+    similar_problems.reload()
+    return built
+
+
+def analyze_handle(cf_handle, count=100):
+    """Fetch submissions and analyze them (the analysis is cheap enough to run inline)"""
+    submissions = cf_api.get_user_submissions(cf_handle, count=count)
+    if not submissions:
+        raise ValueError('Could not fetch user submissions')
+    return {
+        'cf_handle': cf_handle,
+        'analysis': analyze_user_performance(submissions),
+        'total_submissions': len(submissions)
+    }
+
+
+def recommend_for_handle(cf_handle, count=5, method='hybrid'):
+    recommendations = get_recommendations(cf_handle, count, method)
+    if not recommendations:
+        raise ValueError('Could not generate recommendations')
+    return {'cf_handle': cf_handle, 'method': method, 'recommendations': recommendations}
+
+
+def sync_handle_submissions(cf_handle):
+    with upstream_priority(BACKGROUND):
+        source, last_synced = sync_user_submissions(cf_handle, force=True)
+    return {'cf_handle': cf_handle, 'source': source, 'last_synced': last_synced}
+
+
+def compact_recommendations(days=None, rollup=None):
+    """Flush buffered rows, then apply retention (rolling old rows up by day)"""
+    flushed = recommendation_writer.flush()
+    result = Recommendation.delete_old_recommendations(
+        days=Config.RECOMMENDATION_RETENTION_DAYS if days is None else days, rollup=rollup
+    )
+    return {'flushed': flushed, **result}
+
+
+job_manager.register('build-model', build_model_artifact, pool=CPU, on_result=_install_artifact)
+job_manager.register('analyze', analyze_handle, pool=IO)
+job_manager.register('recommendations', recommend_for_handle, pool=IO)
+job_manager.register('sync-submissions', sync_handle_submissions, pool=IO)
+job_manager.register('compact-recommendations', compact_recommendations, pool=IO)
+job_manager.register('build-ladders', build_ladders, pool=CPU)
+job_manager.register('ingest-standings', ingest_standings, pool=IO)
+job_manager.register('build-similar', build_similarity_index, pool=CPU, on_result=_install_similarity_index)
@@ -0,0 +1,188 @@
+import inspect
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from services.database import get_db_connection
+from utils.config import Config
+
+CPU = 'cpu'
+IO = 'io'
+
+
+class JobManager:
+    """Runs registered job kinds off the request threads.
+
+    CPU-bound kinds go to a process pool so pure-Python loops do not hold the
+    GIL of the serving process; I/O-bound kinds go to a thread pool. Job
+    records live in the jobs table, so a poll answered by any worker sees
+    them; only the 'running' state is known to the submitting worker alone
+    (the others report 'queued' until the job finishes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._kinds = {}
+        self._process_pool = None
+        self._thread_pool = None
+
+    def register(self, kind, fn, pool=CPU, on_result=None):
+        """Register a job kind.
+
+        fn(**params) runs in the chosen pool, with params checked against
+        its signature on submit; for CPU kinds it must be a module-level
+        function with picklable arguments and result.
+        on_result(result) runs in this process and returns the JSON-able
+        value stored on the job (e.g. after installing a built model).
+        """
+        self._kinds[kind] = (fn, pool, on_result)
+
+    @property
+    def kinds(self):
+        return sorted(self._kinds)
+
+    def _get_process_pool(self):
+        with self._lock:
+            if self._process_pool is None:
+                # spawn: forking a multi-threaded server process is unsafe
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=Config.JOB_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._process_pool
+
+    def _replace_process_pool(self, broken):
+        """Drop a pool whose worker died (e.g. OOM-killed); the next call starts a new one"""
+        with self._lock:
+            if self._process_pool is broken:
+                self._process_pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _get_thread_pool(self):
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=Config.JOB_THREAD_WORKERS,
+                    thread_name_prefix='job-io'
+                )
+            return self._thread_pool
+
+    def submit(self, kind, params=None):
+        """Queue a job of a registered kind and return its public record.
+
+        Raises ValueError for an unknown kind or params fn does not accept;
+        a job that can't be started is recorded as failed.
+        """
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown job type: {kind}")
+
+        fn, pool, on_result = self._kinds[kind]
+        params = params or {}
+        try:
+            inspect.signature(fn).bind(**params)
+        except TypeError as e:
+            raise ValueError(f"Invalid params for {kind}: {e}")
+
+        job_id = uuid.uuid4().hex
+        conn = get_db_connection()
+        try:
+            conn.execute('''
+                INSERT INTO jobs (id, type, params, status, submitted_at)
+                VALUES (?, ?, ?, 'queued', ?)
+            ''', (job_id, kind, json.dumps(params), time.time()))
+            self._prune(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+        try:
+            future = self._start(fn, pool, params)
+        except Exception as e:
+            self._store(job_id, 'failed', None, str(e))
+            return self.get(job_id)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_result))
+
+        return self.get(job_id)
+
+    def _start(self, fn, pool, params):
+        if pool != CPU or not Config.JOB_OFFLOAD_ENABLED:
+            return self._get_thread_pool().submit(fn, **params)
+        executor = self._get_process_pool()
+        try:
+            return executor.submit(fn, **params)
+        except BrokenProcessPool:
+            # A broken pool rejects every submit; replace it once and retry
+            self._replace_process_pool(executor)
+            return self._get_process_pool().submit(fn, **params)
+
+    def _finish(self, job_id, future, on_result):
+        result = error = None
+        try:
+            value = future.result()
+            result = json.dumps(on_result(value) if on_result else value, default=str)
+            status = 'done'
+        except Exception as e:
+            error = str(e)
+            status = 'failed'
+        try:
+            self._store(job_id, status, result, error)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def _store(self, job_id, status, result, error):
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?',
+                (status, time.time(), result, error, job_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _prune(self, conn):
+        # Drop the oldest finished jobs beyond the history limit (caller commits)
+        conn.execute('''
+            DELETE FROM jobs WHERE id IN (
+                SELECT id FROM jobs WHERE status IN ('done', 'failed')
+                ORDER BY submitted_at
+                LIMIT MAX(0, (SELECT COUNT(*) FROM jobs) - ?)
+            )
+        ''', (Config.JOB_HISTORY_LIMIT,))
+
+    def get(self, job_id):
+        conn = get_db_connection()
+        try:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._public(row) if row else None
+
+    def _public(self, row):
+        status = row['status']
+        with self._lock:
+            future = self._futures.get(row['id'])
+        if status == 'queued' and future is not None and future.running():
+            status = 'running'
+
+        return {
+            'id': row['id'],
+            'type': row['type'],
+            'params': json.loads(row['params']),
+            'status': status,
+            'submitted_at': row['submitted_at'],
+            'finished_at': row['finished_at'],
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error']
+        }
+
+
+# Global instance
+job_manager = JobManager()
@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from services.catalog import catalog
+from services.database import get_db_connection
+from models.problem import decode_tags, fetch_problem_dicts
+from utils.config import Config
+
+BAND_WIDTH = 100
+# How much a problem's unseen tags count against its popularity
+TAG_NOVELTY_WEIGHT = 0.5
+
+
+def ladder_band(rating):
+    """Band (its lowest rating) a rating falls into"""
+    return int(rating) // BAND_WIDTH * BAND_WIDTH
+
+
+def rank_ladder(problems, size):
+    """Ladder order for one band's (id, solved_count, tags) problems.
+
+    Codeforces only reports how many people solved a problem, so the
+    solved count relative to the band's most solved problem stands in for
+    the solve rate. Each next rung is the best mix of that and tag novelty
+    (tags used less so far on the ladder score higher), so the ladder
+    alternates topics instead of listing the most popular tag first.
+    """
+    if not problems:
+        return []
+    top = math.log1p(max(solved for _, solved, _ in problems)) or 1.0
+    # Only the most solved few can make the ladder; keeps the greedy cheap
+    remaining = sorted(problems, key=lambda p: (-p[1], p[0]))[:size * 3]
+    tag_uses = Counter()
+    ladder = []
+    while remaining and len(ladder) < size:
+        def score(problem):
+            _, solved, tags = problem
+            novelty = sum(1 / (1 + tag_uses[tag]) for tag in tags) / len(tags) if tags else 0.0
+            return math.log1p(solved) / top + TAG_NOVELTY_WEIGHT * novelty
+
+        best = max(range(len(remaining)), key=lambda i: score(remaining[i]))
+        problem_id, _, tags = remaining.pop(best)
+        tag_uses.update(tags)
+        ladder.append(problem_id)
+    return ladder
+
+
+def build_ladders(only_if_missing=False):
+    """Recompute every band's ladder and replace the ladders table in one transaction.
+
+    With only_if_missing, the table is re-checked under the write lock and
+    left alone (returning None) if another worker filled it meanwhile.
+    """
+    started = time.time()
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            'SELECT id, rating, solved_count, tags FROM problems WHERE rating IS NOT NULL'
+        ).fetchall()
+
+        by_band = defaultdict(list)
+        for row in rows:
+            by_band[ladder_band(row['rating'])].append((row['id'], row['solved_count'] or 0, decode_tags(row['tags'])))
+
+        ladder_rows = []
+        for band, problems in sorted(by_band.items()):
+            for position, problem_id in enumerate(rank_ladder(problems, Config.LADDER_SIZE)):
+                ladder_rows.append((band, position, problem_id))
+
+        # Write lock before the check, so concurrent builders replace the table one at a time
+        conn.execute('BEGIN IMMEDIATE')
+        if only_if_missing and conn.execute('SELECT 1 FROM ladders LIMIT 1').fetchone() is not None:
+            conn.rollback()
+            return None
+        conn.execute('DELETE FROM ladders')
+        conn.executemany('INSERT INTO ladders (band, position, problem_id) VALUES (?, ?, ?)', ladder_rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        'bands': len(by_band),
+        'problems': len(ladder_rows),
+        'elapsed_seconds': round(time.time() - started, 3)
+    }
+
+
+def ladders_built():
+    conn = get_db_connection()
+    try:
+        return conn.execute('SELECT 1 FROM ladders LIMIT 1').fetchone() is not None
+    finally:
+        conn.close()
+
+
+def get_ladder(band, count, solved_ids=()):
+    """First count rungs of a band's ladder, skipping solved_ids; None if the band has no ladder"""
+    conn = get_db_connection()
+    try:
+        problems = fetch_problem_dicts(conn, '''
+            SELECT p.*, l.position
+            FROM ladders l
+            JOIN problems p ON p.id = l.problem_id
+            WHERE l.band = ?
+            ORDER BY l.position
+        ''', (band,))
+    finally:
+        conn.close()
+
+    if not problems:
+        return None
+    solved = set(solved_ids)
+    unsolved = [problem for problem in problems if problem['id'] not in solved]
+    return {
+        'band': band,
+        'problems': unsolved[:count],
+        'ladder_size': len(problems),
+        'solved_skipped': len(problems) - len(unsolved)
+    }
+
+
+def _on_catalog_change(version, contest_ids):
+    # Rebuild off the request thread; the previous ladders serve meanwhile
+    threading.Thread(target=build_ladders, name='ladders', daemon=True).start()
+
+
+catalog.subscribe(_on_catalog_change)
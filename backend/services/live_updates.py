@@ -0,0 +1,170 @@
+import asyncio
+from services.activity import format_activity
+from services.database import get_db_connection, run_db
+from services.metrics import metrics
+from services.ml_service import get_recommendations, solved_problem_keys, weak_tag_boosts
+from services.rate_limiter import BACKGROUND, upstream_priority
+from services.resilience import reset_stale
+from services.submission_sync import as_api_submissions, sync_user_submissions_async
+from utils.config import Config
+
+# Window the poller diffs against; verdicts of older submissions no longer change
+WATCH_WINDOW = 50
+# Submissions get_recommendations derives solved problems from
+RECOMMENDATION_WINDOW = 200
+
+
+def _load_recent(cf_handle, limit):
+    conn = get_db_connection()
+    try:
+        return conn.execute('''
+            SELECT id, creation_time, verdict, contest_id, problem_index, problem_name, problem_rating, tags
+            FROM user_submissions
+            WHERE cf_handle = ?
+            ORDER BY creation_time DESC
+            LIMIT ?
+        ''', (cf_handle, limit)).fetchall()
+    finally:
+        conn.close()
+
+
+def _recommend(cf_handle):
+    submissions = as_api_submissions(_load_recent(cf_handle, RECOMMENDATION_WINDOW))
+    return get_recommendations(
+        cf_handle, Config.LIVE_RECOMMENDATIONS, 'simple',
+        solved_problem_keys(submissions), weak_tag_boosts(submissions)
+    ) or []
+
+
+class HandleFeed:
+    """One background poller per watched handle, fanned out to its subscribers.
+
+    The poller syncs the handle every LIVE_POLL_INTERVAL seconds (the store
+    is shared, so a sync made by another worker counts), diffs the newest
+    submissions against what it saw last and recomputes recommendations only
+    after a new accepted verdict. Subscribers receive just those deltas, so
+    upstream traffic grows with watched handles, not with open tabs.
+    """
+
+    def __init__(self, cf_handle, on_stop=None):
+        self.cf_handle = cf_handle
+        self.on_stop = on_stop
+        self.subscribers = set()
+        self.task = None
+        self.verdicts = None
+        self.recommendations = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=Config.LIVE_QUEUE_SIZE)
+        # Late joiners start from the current recommendations; later
+        # events are deltas on top of them
+        if self.recommendations is not None:
+            queue.put_nowait(('recommendations', {'recommendations': self.recommendations}))
+        self.subscribers.add(queue)
+        metrics.add_gauge('live_subscribers', 1)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self.subscribers:
+            self.subscribers.discard(queue)
+            metrics.add_gauge('live_subscribers', -1)
+
+    def publish(self, event, data):
+        metrics.inc('live_events_total', {'event': event})
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A subscriber that stopped reading is cut off, not buffered
+                metrics.inc('live_dropped_subscribers_total')
+                self.unsubscribe(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _run(self):
+        metrics.add_gauge('live_pollers', 1)
+        try:
+            while self.subscribers:
+                try:
+                    await self.poll()
+                except Exception as e:
+                    print(f"Live poll failed for {self.cf_handle}: {str(e)}")
+                await asyncio.sleep(Config.LIVE_POLL_INTERVAL)
+        finally:
+            metrics.add_gauge('live_pollers', -1)
+            if self.on_stop is not None:
+                self.on_stop(self)
+
+    async def poll(self):
+        # The poller task lives across polls; one stale answer must not taint the next
+        reset_stale()
+        with upstream_priority(BACKGROUND):
+            await sync_user_submissions_async(self.cf_handle, ttl=Config.LIVE_POLL_INTERVAL)
+
+        rows = await run_db(_load_recent, self.cf_handle, WATCH_WINDOW)
+        verdicts = {row['id']: row['verdict'] for row in rows}
+        changed = [row for row in rows if self.verdicts is None or self.verdicts.get(row['id']) != row['verdict']]
+        first_poll = self.verdicts is None
+        self.verdicts = verdicts
+
+        if changed and not first_poll:
+            self.publish('submissions', {
+                'submissions': [{'id': row['id'], **format_activity(row)} for row in reversed(changed)]
+            })
+
+        accepted = any(row['verdict'] == 'OK' for row in changed)
+        if self.recommendations is None or (accepted and not first_poll):
+            recommendations = await run_db(_recommend, self.cf_handle)
+            keys = [rec['problem_id'] for rec in recommendations]
+            if self.recommendations is None or keys != [rec['problem_id'] for rec in self.recommendations]:
+                self.recommendations = recommendations
+                self.publish('recommendations', {'recommendations': recommendations})
+
+
+class LiveUpdates:
+    """Registry of the handle feeds of this worker"""
+
+    def __init__(self):
+        self._feeds = {}
+
+    def subscribe(self, cf_handle):
+        key = cf_handle.lower()
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = HandleFeed(cf_handle, on_stop=self._remove)
+        return feed, feed.subscribe()
+
+    def _remove(self, feed):
+        # The poller exits once its last subscriber is gone
+        if self._feeds.get(feed.cf_handle.lower()) is feed:
+            del self._feeds[feed.cf_handle.lower()]
+
+    async def stream(self, cf_handle):
+        """(event, data) pairs for one subscriber; None data is a keep-alive"""
+        feed, queue = self.subscribe(cf_handle)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), Config.LIVE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield 'ping', None
+                    continue
+                if item is None:
+                    return
+                yield item
+        finally:
+            feed.unsubscribe(queue)
+
+    def feeds(self):
+        return len(self._feeds)
+
+
+# Global instance
+live_updates = LiveUpdates()
+
+metrics.describe('live_subscribers', 'gauge', 'Open live-update streams')
+metrics.describe('live_pollers', 'gauge', 'Handles polled for live updates')
+metrics.describe('live_events_total', 'counter', 'Live-update events published, before fan-out')
+metrics.describe('live_dropped_subscribers_total', 'counter', 'Live-update streams closed because the client stopped reading')
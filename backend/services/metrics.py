@@ -0,0 +1,253 @@
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from utils.config import Config
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (extra or [])
+    if not items:
+        return ''
+    escaped = [
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in items
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._meta[name] = (kind, help_text, tuple(buckets or DEFAULT_BUCKETS))
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, labels=None):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def add_gauge(self, name, delta, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name, value, labels=None):
+        buckets = self._meta.get(name, (None, None, DEFAULT_BUCKETS))[2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def register_collector(self, fn):
+        """fn() -> iterable of (name, labels, value) gauges sampled at render time"""
+        self._collectors.append(fn)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {k: (list(v[0]), v[1], v[2]) for k, v in self._histograms.items()}
+
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges[(name, _label_key(labels))] = value
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+
+        # {name: [(label key, lines)]}; a histogram's lines stay together in bound order
+        series = {}
+        for (name, key), value in counters.items():
+            series.setdefault(name, []).append((key, [f"{name}{_format_labels(key)} {_format_value(value)}"]))
+        for (name, key), value in gauges.items():
+            series.setdefault(name, []).append((key, [f"{name}{_format_labels(key)} {_format_value(value)}"]))
+        for (name, key), (counts, total, count) in histograms.items():
+            buckets = self._meta.get(name, (None, None, DEFAULT_BUCKETS))[2]
+            lines = []
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(key)} {count}")
+            series.setdefault(name, []).append((key, lines))
+
+        output = []
+        for name in sorted(series):
+            kind, help_text, _ = self._meta.get(name, ('untyped', None, None))
+            if help_text:
+                output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            for _, lines in sorted(series[name], key=lambda entry: _format_labels(entry[0])):
+                output.extend(lines)
+        return '\n'.join(output) + '\n'
+
+
+class SlowRequestSampler:
+    """Samples the stacks of requests that run longer than a threshold.
+
+    A single daemon thread wakes every interval and only looks at requests
+    already past the threshold, so fast requests pay nothing but two dict
+    operations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._recent = deque(maxlen=Config.SLOW_REQUEST_HISTORY)
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='slow-request-sampler', daemon=True)
+                    self._thread.start()
+
+    def start_request(self, route, method, path):
+        self._ensure_started()
+        with self._lock:
+            self._in_flight[threading.get_ident()] = {
+                'route': route,
+                'method': method,
+                'path': path,
+                'started': time.time(),
+                'samples': []
+            }
+
+    def end_request(self, duration, status):
+        with self._lock:
+            entry = self._in_flight.pop(threading.get_ident(), None)
+        if entry and duration >= Config.SLOW_REQUEST_THRESHOLD:
+            stacks = {}
+            for stack in entry['samples']:
+                stacks[stack] = stacks.get(stack, 0) + 1
+            self._recent.append({
+                'route': entry['route'],
+                'method': entry['method'],
+                'path': entry['path'],
+                'status': status,
+                'started': entry['started'],
+                'duration_seconds': round(duration, 4),
+                'stacks': [
+                    {'samples': count, 'stack': list(stack)}
+                    for stack, count in sorted(stacks.items(), key=lambda x: x[1], reverse=True)
+                ]
+            })
+
+    def _run(self):
+        while True:
+            time.sleep(Config.SLOW_REQUEST_SAMPLE_INTERVAL)
+            now = time.time()
+            with self._lock:
+                slow = [
+                    (thread_id, entry) for thread_id, entry in self._in_flight.items()
+                    if now - entry['started'] >= Config.SLOW_REQUEST_THRESHOLD
+                    and len(entry['samples']) < Config.SLOW_REQUEST_MAX_SAMPLES
+                ]
+            if not slow:
+                continue
+
+            frames = sys._current_frames()
+            for thread_id, entry in slow:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = tuple(
+                    f"{f.filename}:{f.lineno} {f.name}"
+                    for f in traceback.extract_stack(frame)[-Config.SLOW_REQUEST_STACK_DEPTH:]
+                )
+                entry['samples'].append(stack)
+
+    def recent(self):
+        return list(self._recent)[::-1]
+
+
+def record_cache_result(cache, source):
+    """Count local-cache lookups: 'cache' is a hit, 'upstream' a miss, 'stale' a fallback"""
+    result = {'cache': 'hit', 'upstream': 'miss'}.get(source, source)
+    metrics.inc('cache_requests_total', {'cache': cache, 'result': result})
+
+
+def instrument_app(app):
+    """Record per-route latency histograms and feed the slow-request sampler"""
+    from flask import request, g
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.add_gauge('http_requests_in_flight', 1)
+        slow_requests.start_request(g._metrics_route, request.method, request.path)
+
+    @app.teardown_request
+    def _record_request(exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        route = g.pop('_metrics_route', 'unmatched')
+        status = g.pop('_metrics_status', 500 if exc else 200)
+        labels = {'route': route, 'method': request.method, 'blueprint': request.blueprint or ''}
+
+        metrics.add_gauge('http_requests_in_flight', -1)
+        metrics.observe('http_request_duration_seconds', duration, labels)
+        metrics.inc('http_requests_total', {**labels, 'status': str(status)})
+        slow_requests.end_request(duration, status)
+
+    @app.after_request
+    def _remember_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+
+# Global instances
+metrics = MetricsRegistry()
+slow_requests = SlowRequestSampler()
+
+metrics.describe('http_request_duration_seconds', 'histogram', 'Request latency per route')
+metrics.describe('http_requests_total', 'counter', 'Requests per route and status')
+metrics.describe('http_requests_in_flight', 'gauge', 'Requests currently being served')
+metrics.describe('cf_api_request_duration_seconds', 'histogram', 'Codeforces API call latency per endpoint')
+metrics.describe('cf_api_requests_total', 'counter', 'Codeforces API calls per endpoint and outcome')
+metrics.describe('cf_api_rate_limit_wait_seconds', 'histogram', 'Time spent waiting for a rate-limiter slot')
+metrics.describe('db_query_duration_seconds', 'histogram', 'SQLite statement latency per statement type')
+metrics.describe('db_queries_total', 'counter', 'SQLite statements per statement type')
+metrics.describe('cache_requests_total', 'counter', 'Local cache lookups per cache and result')
@@ -1,18 +1,46 @@
-import json
+import os
 import random
+import sys
 from collections import defaultdict, Counter
 from datetime import datetime, timedelta
-from services.database import get_db_connection
+from services.database import get_db_connection, run_db
 from services.codeforces_api import cf_api
+from services.candidate_cache import band_candidates, band_of, fit_score, DEFAULT_USER_RATING
+from services.recommendation_log import recommendation_writer
+from utils.config import Config
+from utils.helpers import generate_problem_id
 import math
 
+# The ml/ package (model artifact format) lives at the repository root
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
 
+MODEL_ARTIFACT = 'user_item'
 
-def analyze_user_performance(submissions):
-    """Analyze user's submission history to identify strengths and weaknesses"""
+
+
+ANALYSIS_SECTIONS = (
+    'tag_stats', 'rating_stats', 'weak_tags', 'strong_tags', 'weak_tags_detailed',
+    'strong_tags_detailed', 'recent_performance', 'total_submissions', 'unique_problems_attempted'
+)
+_TAG_SECTIONS = {'tag_stats', 'weak_tags', 'strong_tags', 'weak_tags_detailed', 'strong_tags_detailed'}
+
+def analyze_user_performance(submissions, sections=None):
+    """Analyze user's submission history to identify strengths and weaknesses
+    
+    sections limits the result to those ANALYSIS_SECTIONS keys; work only
+    needed for the others (rating buckets, recent window, ...) is skipped.
+    """
     if not submissions:
         return {}
     
+    wanted = set(ANALYSIS_SECTIONS) if sections is None else set(sections)
+    track_tags = not wanted.isdisjoint(_TAG_SECTIONS)
+    track_ratings = 'rating_stats' in wanted
+    track_recent = 'recent_performance' in wanted
+    recent_cutoff = datetime.now() - timedelta(days=30)
+    
     # Initialize counters
     tag_stats = defaultdict(lambda: {'solved': 0, 'attempted': 0, 'accuracy': 0})
     rating_stats = defaultdict(lambda: {'solved': 0, 'attempted': 0})
@@ -29,21 +57,23 @@ def analyze_user_performance(submissions):
         rating = problem.get('rating', 0)
         
         # Track by tags
-        for tag in tags:
+        for tag in tags if track_tags else ():
             tag_stats[tag]['attempted'] += 1
             if verdict == 'OK':
                 tag_stats[tag]['solved'] += 1
         
         # Track by rating
-        if rating > 0:
+        if track_ratings and rating > 0:
             rating_range = f"{(rating // 100) * 100}-{(rating // 100) * 100 + 99}"
             rating_stats[rating_range]['attempted'] += 1
             if verdict == 'OK':
                 rating_stats[rating_range]['solved'] += 1
         
         # Recent performance (last 30 days)
+        if not track_recent:
+            continue
         submission_time = datetime.fromtimestamp(submission.get('creationTimeSeconds', 0))
-        if submission_time > datetime.now() - timedelta(days=30):
+        if submission_time > recent_cutoff:
             recent_performance.append({
                 'verdict': verdict,
                 'rating': rating,
@@ -89,7 +119,7 @@ def analyze_user_performance(submissions):
     recent_total = len(recent_performance)
     recent_accuracy = recent_solved / recent_total if recent_total > 0 else 0
     
-    return {
+    analysis = {
         'tag_stats': dict(tag_stats),
         'rating_stats': dict(rating_stats),
         'weak_tags': [tag['tag'] for tag in weak_tags[:5]],
@@ -101,13 +131,21 @@ def analyze_user_performance(submissions):
             'solved': recent_solved,
             'accuracy': recent_accuracy
         },
-        'total_submissions': len(submissions),
-        'unique_problems_attempted': len(set(sub['problem']['name'] for sub in submissions if 'problem' in sub))
+        'total_submissions': len(submissions)
     }
+    if 'unique_problems_attempted' in wanted:
+        analysis['unique_problems_attempted'] = len(set(sub['problem']['name'] for sub in submissions if 'problem' in sub))
+    
+    if sections is None:
+        return analysis
+    return {key: value for key, value in analysis.items() if key in wanted}
 
 def get_user_solved_problems(cf_handle):
     """Get list of problems solved by user"""
-    submissions = cf_api.get_user_submissions(cf_handle, count=200)
+    return solved_problem_keys(cf_api.get_user_submissions(cf_handle, count=200))
+
+def solved_problem_keys(submissions):
+    """"contestId-index" keys of accepted submissions"""
     if not submissions:
         return set()
     
@@ -120,8 +158,30 @@ def get_user_solved_problems(cf_handle):
     
     return solved_problems
 
-def get_recommendations(cf_handle, count=5, method='simple'):
-    """Generate problem recommendations for a user"""
+def weak_tag_boosts(submissions):
+    """{tag: score bonus} for the user's weak tags, so practice targets them"""
+    if not submissions:
+        return {}
+    weak_tags = analyze_user_performance(submissions, sections=('weak_tags',)).get('weak_tags', [])
+    return {tag: Config.RECOMMENDATION_WEAK_TAG_BOOST for tag in weak_tags}
+
+async def get_recommendations_async(cf_handle, count=5, method='simple'):
+    """get_recommendations() for the ASGI app: submissions awaited, DB work on run_db"""
+    # httpx is only needed once the ASGI app is in use
+    from services.async_codeforces_api import async_cf_api
+    
+    submissions = await async_cf_api.get_user_submissions(cf_handle, count=200)
+    return await run_db(
+        get_recommendations, cf_handle, count, method, solved_problem_keys(submissions), weak_tag_boosts(submissions)
+    )
+
+def get_recommendations(cf_handle, count=5, method='simple', solved_problems=None, tag_boosts=None):
+    """Generate problem recommendations for a user.
+    
+    solved_problems (a set of "contestId-index") and tag_boosts ({tag: score
+    bonus}) are derived from the user's Codeforces submissions when
+    solved_problems is not given.
+    """
     try:
         conn = get_db_connection()
         
@@ -129,81 +189,354 @@ def get_recommendations(cf_handle, count=5, method='simple'):
         user = conn.execute(
             'SELECT * FROM users WHERE cf_handle = ?', (cf_handle,)
         ).fetchone()
+        conn.close()
         
         if not user:
-            conn.close()
             return None
         
-        user_rating = user['rating'] or 1200
+        user_rating = user['rating'] or DEFAULT_USER_RATING
         
         # Get user's solved problems
-        solved_problems = get_user_solved_problems(cf_handle)
+        if solved_problems is None:
+            submissions = cf_api.get_user_submissions(cf_handle, count=200)
+            solved_problems = solved_problem_keys(submissions)
+            tag_boosts = weak_tag_boosts(submissions)
         
-        # Get candidate problems (rating range: user_rating ± 300)
-        rating_min = max(800, user_rating - 300)
-        rating_max = user_rating + 400
+        # Candidates are shared by everyone in the user's rating band and
+        # come pre-sorted; only exclusion and tag boosts are per user. Users
+        # who solved the cached top of the band page on into the rest of it.
         
-        problems = conn.execute('''
-            SELECT * FROM problems
-            WHERE rating BETWEEN ? AND ?
-            ORDER BY RANDOM()
-            LIMIT 50
-        ''', (rating_min, rating_max)).fetchall()
-        
-        conn.close()
+        # Filter out solved problems and score the shortlist
+        shortlisted = []
+        shortlist = count * Config.RECOMMENDATION_SHORTLIST_FACTOR
+        for candidate in band_candidates(band_of(user_rating)):
+            # Skip if already solved
+            if candidate['_key'] in solved_problems:
+                continue
+            
+            score, reason = fit_score(abs(candidate['rating'] - user_rating))
+            if tag_boosts:
+                score += max((tag_boosts.get(tag, 0.0) for tag in candidate['tags']), default=0.0)
+            shortlisted.append((-score, random.random(), reason, candidate))
+            if len(shortlisted) >= shortlist:
+                break
         
-        if not problems:
+        if not shortlisted:
             return None
         
-        # Filter out solved problems and score
+        # Sort by score and return top recommendations; ties are broken at
+        # random so repeat requests vary within the shortlist
+        shortlisted.sort(key=lambda x: (x[0], x[1]))
         recommendations = []
-        for problem in problems:
-            problem_dict = dict(problem)
-            problem_key = f"{problem_dict['contest_id']}-{problem_dict['index']}"
-            
-            # Skip if already solved
-            if problem_key in solved_problems:
-                continue
-            
-            # Simple scoring based on rating difference
-            rating_diff = abs(problem_dict['rating'] - user_rating)
-            if rating_diff <= 100:
-                score = 1.0
-                reason = "Perfect difficulty match"
-            elif rating_diff <= 200:
-                score = 0.8
-                reason = "Good difficulty match"
-            else:
-                score = 0.5
-                reason = "Challenging problem"
-            
-            problem_dict['tags'] = json.loads(problem_dict['tags']) if problem_dict['tags'] else []
-            problem_dict['url'] = f"https://codeforces.com/contest/{problem_dict['contest_id']}/problem/{problem_dict['index']}"
-            problem_dict['score'] = score
+        for negative_score, _, reason, candidate in shortlisted[:count]:
+            # Cached candidates are shared; hand out copies
+            problem_dict = {key: value for key, value in candidate.items() if key[0] != '_'}
+            problem_dict['tags'] = list(candidate['tags'])
+            problem_dict['score'] = -negative_score
             problem_dict['reason'] = reason
             problem_dict['problem_id'] = problem_dict['id']
             recommendations.append(problem_dict)
         
-        # Sort by score and return top recommendations
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:count]
+        # Buffered; written in batches off the request path
+        recommendation_writer.record(user['id'], recommendations)
+        return recommendations
         
     except Exception as e:
         print(f"Error generating recommendations: {str(e)}")
         return None
 
+class HandleList:
+    """Handles of a freshly built matrix, by user position"""
+    def __init__(self, handles):
+        self.handles = handles
+        self._index = {handle.lower(): i for i, handle in enumerate(handles)}
+    
+    def __len__(self):
+        return len(self.handles)
+    
+    def __getitem__(self, position):
+        return self.handles[position]
+    
+    def position(self, handle):
+        return self._index.get(handle.lower())
+
+class MappedHandles:
+    """Handles of a mapped model artifact.
+    
+    Nothing is decoded up front: lookups binary-search the artifact's sorted
+    lowercase keys and a handle is decoded only when asked for, so every
+    worker shares the one copy in the page cache.
+    """
+    def __init__(self, artifact):
+        from ml.artifact import pack_sorted_keys, unpack_strings
+        
+        self._blob = artifact['user_blob']
+        self._offsets = artifact['user_offsets']
+        if 'user_keys' in artifact.arrays:
+            self._keys = artifact['user_keys']
+            self._key_users = artifact['user_key_positions']
+        else:
+            # Artifact from before the key index: build it in memory once
+            handles = unpack_strings(self._blob, self._offsets)
+            self._keys, self._key_users = pack_sorted_keys([handle.lower() for handle in handles])
+    
+    def __len__(self):
+        return len(self._offsets) - 1
+    
+    def __getitem__(self, position):
+        from ml.artifact import string_at
+        
+        return string_at(self._blob, self._offsets, position)
+    
+    def position(self, handle):
+        from ml.artifact import find_key
+        
+        row = find_key(self._keys, handle.lower())
+        return int(self._key_users[row]) if row is not None else None
+
+class UserItemMatrix:
+    """Binary user x problem "solved" matrix in CSR form"""
+    def __init__(self, users, items, indptr, indices, item_users=None, version=None):
+        # A list of handles, or a handle table such as MappedHandles
+        self.users = users if hasattr(users, 'position') else HandleList(users)
+        self.items = items
+        self.indptr = indptr
+        self.indices = indices
+        # Column view (col_ptr, col_users): users of each item, for overlap counting
+        self.item_users = item_users if item_users is not None else self._column_view()
+        self.version = version
+    
+    def _column_view(self):
+        import numpy as np
+        
+        user_of_entry = np.repeat(np.arange(len(self.users), dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        col_ptr = np.zeros(len(self.items) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.items)), out=col_ptr[1:])
+        return col_ptr, user_of_entry[order]
+    
+    @property
+    def shape(self):
+        return (len(self.users), len(self.items))
+    
+    @property
+    def nnz(self):
+        return int(len(self.indices))
+    
+    @property
+    def sparsity(self):
+        cells = len(self.users) * len(self.items)
+        return 1 - self.nnz / cells if cells else 1.0
+    
+    def row(self, user_pos):
+        return self.indices[self.indptr[user_pos]:self.indptr[user_pos + 1]]
+    
+    def position(self, handle):
+        """User position of a handle (case-insensitive), or None"""
+        return self.users.position(handle)
+    
+    def summary(self):
+        return {
+            'users_count': len(self.users),
+            'items_count': len(self.items),
+            'interactions': self.nnz,
+            'sparsity': f"{self.sparsity:.2%}",
+            'matrix_shape': list(self.shape),
+            'version': self.version
+        }
+
+def save_matrix_artifact(matrix, directory=None):
+    """Write the matrix, column view and handle index included, as the next model artifact version"""
+    import numpy as np
+    from ml.artifact import write_artifact, pack_strings, pack_sorted_keys
+    
+    handles = matrix.users.handles
+    user_blob, user_offsets = pack_strings(handles)
+    user_keys, user_key_positions = pack_sorted_keys([handle.lower() for handle in handles])
+    col_ptr, col_users = matrix.item_users
+    return write_artifact(directory or Config.MODEL_ARTIFACT_DIR, MODEL_ARTIFACT, {
+        'indptr': np.asarray(matrix.indptr, dtype=np.int64),
+        'indices': np.asarray(matrix.indices, dtype=np.int32),
+        'col_ptr': np.asarray(col_ptr, dtype=np.int64),
+        'col_users': np.asarray(col_users, dtype=np.int32),
+        'items': np.asarray(matrix.items, dtype=np.int64),
+        'user_blob': user_blob,
+        'user_offsets': user_offsets,
+        'user_keys': user_keys,
+        'user_key_positions': user_key_positions
+    }, meta={'kind': 'user_item_csr', **matrix.summary()}, keep=Config.MODEL_ARTIFACT_KEEP)
+
+def matrix_from_artifact(artifact):
+    """UserItemMatrix whose arrays, item ids and handles are views into the mapped artifact"""
+    return UserItemMatrix(
+        MappedHandles(artifact),
+        artifact['items'],
+        artifact['indptr'],
+        artifact['indices'],
+        item_users=(artifact['col_ptr'], artifact['col_users']),
+        version=artifact.version
+    )
+
+def build_model_artifact():
+    """Job entry point: build the matrix and publish it as an artifact.
+    
+    Every worker maps the new version on its next check instead of holding
+    its own copy of the matrix.
+    """
+    matrix = build_interaction_matrix()
+    if matrix is None:
+        return None
+    version, path = save_matrix_artifact(matrix)
+    return {'version': version, 'path': path}
+
+def build_interaction_matrix():
+    """Build the user-item matrix from locally synced accepted submissions
+    and, with MODEL_USE_STANDINGS, problems solved in ingested contest standings.
+    
+    Runs in a worker process when submitted as a job, so it only touches the
+    DB and returns a picklable matrix.
+    """
+    import numpy as np
+
+    # Standings-ingested interactions add every contest participant's solves
+    standings = '''
+        UNION
+        SELECT cf_handle, contest_id, problem_index
+        FROM interactions
+        WHERE solved = 1
+    ''' if Config.MODEL_USE_STANDINGS else ''
+    
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        SELECT DISTINCT cf_handle, contest_id, problem_index
+        FROM user_submissions
+        WHERE verdict = 'OK' AND contest_id IS NOT NULL
+        {standings}
+        ORDER BY cf_handle COLLATE NOCASE
+    ''').fetchall()
+    conn.close()
+    
+    if not rows:
+        return None
+    
+    users = []
+    item_index = {}
+    user_positions = []
+    item_positions = []
+    last_handle = None
+    
+    for row in rows:
+        handle = row['cf_handle']
+        if last_handle is None or handle.lower() != last_handle.lower():
+            users.append(handle)
+            last_handle = handle
+        item_id = generate_problem_id(row['contest_id'], row['problem_index'])
+        user_positions.append(len(users) - 1)
+        item_positions.append(item_index.setdefault(item_id, len(item_index)))
+    
+    user_positions = np.asarray(user_positions, dtype=np.int32)
+    item_positions = np.asarray(item_positions, dtype=np.int32)
+    
+    # Rows are already grouped by user; dedupe items within each row
+    pairs = np.unique(user_positions.astype(np.int64) * len(item_index) + item_positions)
+    user_positions = (pairs // len(item_index)).astype(np.int32)
+    indices = (pairs % len(item_index)).astype(np.int32)
+    indptr = np.zeros(len(users) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(user_positions, minlength=len(users)), out=indptr[1:])
+    
+    items = [None] * len(item_index)
+    for item_id, position in item_index.items():
+        items[position] = item_id
+    
+    return UserItemMatrix(users, items, indptr, indices)
+
 # Simple recommendation engine class
 class CFRecommendationEngine:
     def __init__(self):
-        self.user_item_matrix = None
+        self._matrix = None
+        self._watcher = None
     
-    def get_collaborative_recommendations(self, cf_handle, count=5):
-        """Simple collaborative filtering fallback"""
-        return []
+    @property
+    def user_item_matrix(self):
+        """Current matrix; a newer model artifact on disk is swapped in first"""
+        self._get_watcher().check()
+        return self._matrix
     
-    def build_user_item_matrix(self):
-        """Build user-item matrix (simplified)"""
-        return None
+    def _get_watcher(self):
+        if self._watcher is None:
+            from ml.artifact import ArtifactWatcher
+            
+            self._watcher = ArtifactWatcher(
+                Config.MODEL_ARTIFACT_DIR, MODEL_ARTIFACT,
+                on_load=lambda artifact: self.set_matrix(matrix_from_artifact(artifact)),
+                check_interval=Config.MODEL_CHECK_INTERVAL
+            )
+        return self._watcher
+    
+    def reload(self):
+        """Map the current model artifact now; returns its summary or None"""
+        artifact = self._get_watcher().check(force=True)
+        return artifact.summary() if artifact is not None else None
+    
+    def set_matrix(self, matrix):
+        """Install a (possibly externally built) user-item matrix"""
+        # One reference swap, so readers never mix two versions
+        self._matrix = matrix
+    
+    def compute_user_similarity(self, cf_handle):
+        """Cosine similarity between cf_handle and every user sharing a solved problem"""
+        matrix = self.user_item_matrix
+        if matrix is None:
+            return {}
+        target = matrix.position(cf_handle)
+        if target is None:
+            return {}
+        candidates, scores = self._similarities(matrix, target)
+        return {matrix.users[u]: float(score) for u, score in zip(candidates, scores)}
+    
+    def _similarities(self, matrix, target):
+        """(user positions, cosine scores) of the users sharing a solved problem with target"""
+        import numpy as np
+        
+        col_ptr, col_users = matrix.item_users
+        items = matrix.row(target)
+        if len(items) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        
+        neighbours = np.concatenate([col_users[col_ptr[i]:col_ptr[i + 1]] for i in items])
+        overlap = np.bincount(neighbours, minlength=len(matrix.users))
+        overlap[target] = 0
+        
+        degrees = np.diff(matrix.indptr)
+        candidates = np.nonzero(overlap)[0]
+        scores = overlap[candidates] / np.sqrt(degrees[target] * degrees[candidates])
+        return candidates, scores
+    
+    def get_collaborative_recommendations(self, cf_handle, count=5, neighbours=20):
+        """Problems solved by the most similar users but not by cf_handle"""
+        import numpy as np
+        
+        matrix = self.user_item_matrix
+        if matrix is None:
+            return []
+        
+        target = matrix.position(cf_handle)
+        if target is None:
+            return []
+        candidates, similarities = self._similarities(matrix, target)
+        if not len(candidates):
+            return []
+        
+        solved = set(matrix.row(target).tolist())
+        scores = defaultdict(float)
+        top = np.argsort(-similarities, kind='stable')[:neighbours]
+        for user, similarity in zip(candidates[top].tolist(), similarities[top].tolist()):
+            for item in matrix.row(user).tolist():
+                if item not in solved:
+                    scores[int(matrix.items[item])] += similarity
+        
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:count]
+        return [{'problem_id': problem_id, 'score': score} for problem_id, score in ranked]
 
 # Global recommendation engine instance
 recommendation_engine = CFRecommendationEngine()
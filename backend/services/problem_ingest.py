@@ -0,0 +1,207 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from services.codeforces_api import cf_api
+from services.database import get_db_connection
+from services.catalog import catalog
+from services.rate_limiter import upstream_priority, BULK
+from utils.config import Config
+from utils.helpers import generate_problem_id
+
+GYM_CONTEST_ID_MIN = 100000
+
+
+def get_finished_contest_ids(contests):
+    """Finished, non-gym contest ids in the order Codeforces returns them (newest first)"""
+    return [
+        c['id'] for c in contests
+        if c.get('phase') == 'FINISHED' and c['id'] <= GYM_CONTEST_ID_MIN
+    ]
+
+
+def stage_contest_ids(conn, contest_ids):
+    """Load contest ids into the connection's temp table finished_contests for set queries"""
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS finished_contests (id INTEGER PRIMARY KEY)')
+    conn.execute('DELETE FROM finished_contests')
+    conn.executemany(
+        'INSERT OR IGNORE INTO finished_contests (id) VALUES (?)',
+        [(contest_id,) for contest_id in contest_ids]
+    )
+
+
+def find_missing_contests(conn, contest_ids, now=None):
+    """Return the contests that have no rated problems in the DB and are due a fetch.
+
+    Contests never tried come first, newest first, then earlier attempts,
+    least recently tried first. A contest fetched while still unrated is
+    skipped until its retry_after, so ratings are picked up once Codeforces
+    assigns them without contests that never get any taking every run.
+    """
+    if not contest_ids:
+        return []
+
+    stage_contest_ids(conn, contest_ids)
+
+    rows = conn.execute('''
+        SELECT f.id FROM finished_contests f
+        LEFT JOIN contest_fetches c ON c.contest_id = f.id
+        WHERE NOT EXISTS (SELECT 1 FROM problems p WHERE p.contest_id = f.id AND p.rating IS NOT NULL)
+          AND (c.retry_after IS NULL OR c.retry_after <= ?)
+        ORDER BY c.last_attempt IS NOT NULL, c.last_attempt, f.id DESC
+    ''', (time.time() if now is None else now,)).fetchall()
+
+    return [row[0] for row in rows]
+
+
+def record_attempts(conn, fetched, failed, now=None):
+    """Remember fetch attempts (caller commits).
+
+    Fetched contests wait INGEST_RETRY_INTERVAL, doubling per attempt up to
+    INGEST_RETRY_MAX; failed ones only move behind the others.
+    """
+    now = time.time() if now is None else now
+    conn.executemany('''
+        INSERT INTO contest_fetches (contest_id, attempts, last_attempt, retry_after)
+        VALUES (?, 1, ?, ? + ?)
+        ON CONFLICT (contest_id) DO UPDATE SET
+            attempts = attempts + 1,
+            last_attempt = excluded.last_attempt,
+            retry_after = excluded.last_attempt + MIN(? * (1 << MIN(attempts, 20)), ?)
+    ''', [
+        (contest_id, now, now, Config.INGEST_RETRY_INTERVAL, Config.INGEST_RETRY_INTERVAL, Config.INGEST_RETRY_MAX)
+        for contest_id in fetched
+    ])
+    conn.executemany('''
+        INSERT INTO contest_fetches (contest_id, last_attempt) VALUES (?, ?)
+        ON CONFLICT (contest_id) DO UPDATE SET last_attempt = excluded.last_attempt
+    ''', [(contest_id, now) for contest_id in failed])
+
+
+def _problem_rows(problems):
+    rows = []
+    for problem in problems:
+        if 'contestId' not in problem or not problem.get('index'):
+            continue
+        rows.append((
+            generate_problem_id(problem['contestId'], problem['index']),
+            problem['contestId'],
+            problem['index'],
+            problem['name'],
+            problem.get('type', 'PROGRAMMING'),
+            problem.get('rating'),
+            json.dumps(problem.get('tags', []))
+        ))
+    return rows
+
+
+def upsert_problems(conn, rows):
+    """Bulk insert/update problem rows (caller commits); solved_count is left as stored"""
+    conn.executemany('''
+        INSERT INTO problems (id, contest_id, `index`, name, type, rating, tags)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            contest_id = excluded.contest_id,
+            `index` = excluded.`index`,
+            name = excluded.name,
+            type = excluded.type,
+            rating = excluded.rating,
+            tags = excluded.tags
+    ''', rows)
+
+
+_DEFERRED = object()
+
+
+def _fetch_before_deadline(contest_id, deadline):
+    # Bulk class: only uses slots interactive requests leave idle
+    with upstream_priority(BULK):
+        problems = cf_api.get_contest_problems(contest_id, deadline=deadline)
+    if problems is None and max(time.time(), cf_api.next_slot_time()) >= deadline:
+        return _DEFERRED
+    return problems
+
+
+def fetch_contests_problems(contest_ids, time_budget, workers):
+    """Fetch problems of several contests in parallel within a time budget.
+
+    Requests go through the shared rate-limited client. Returns
+    (problems_by_contest, failed_ids, deferred_ids); contests still queued
+    or in flight when the budget runs out are deferred to the next run.
+    """
+    problems_by_contest = {}
+    failed = []
+
+    deadline = time.time() + time_budget
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {
+        executor.submit(_fetch_before_deadline, contest_id, deadline): contest_id
+        for contest_id in contest_ids
+    }
+
+    done, not_done = wait(futures, timeout=time_budget)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    deferred = [futures[future] for future in not_done]
+    for future in done:
+        contest_id = futures[future]
+        try:
+            problems = future.result()
+        except Exception as e:
+            print(f"Failed to fetch contest {contest_id}: {str(e)}")
+            problems = None
+
+        if problems is _DEFERRED:
+            deferred.append(contest_id)
+        elif problems is None:
+            failed.append(contest_id)
+        else:
+            problems_by_contest[contest_id] = problems
+
+    return problems_by_contest, sorted(failed), sorted(deferred)
+
+
+def ingest_latest_problems(max_contests=None, time_budget=None):
+    """Import problems from finished contests that are missing from the DB"""
+    max_contests = max_contests or Config.INGEST_MAX_CONTESTS
+    time_budget = time_budget or Config.INGEST_TIME_BUDGET
+    started = time.time()
+
+    contests = cf_api.get_contest_list()
+    if not contests:
+        return None
+
+    finished = get_finished_contest_ids(contests)
+
+    conn = get_db_connection()
+    try:
+        missing = find_missing_contests(conn, finished)
+        to_fetch = missing[:max_contests]
+
+        remaining_budget = max(0.0, time_budget - (time.time() - started))
+        problems_by_contest, failed, deferred = fetch_contests_problems(
+            to_fetch, remaining_budget, Config.INGEST_WORKERS
+        )
+
+        rows = []
+        for problems in problems_by_contest.values():
+            rows.extend(_problem_rows(problems))
+
+        if rows:
+            upsert_problems(conn, rows)
+        record_attempts(conn, problems_by_contest, failed)
+        conn.commit()
+    finally:
+        conn.close()
+
+    if rows:
+        catalog.notify_changed(sorted(problems_by_contest))
+
+    return {
+        'finished_contests': len(finished),
+        'contests_missing': len(missing),
+        'contests_fetched': sorted(problems_by_contest),
+        'contests_failed': failed,
+        'contests_deferred': deferred,
+        'new_problems': len(rows),
+        'elapsed_seconds': round(time.time() - started, 3)
+    }
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from services.activity import activity_after_sync, load_submission_rows
+from services.database import run_db
+from services.ml_service import analyze_user_performance, get_recommendations, solved_problem_keys, weak_tag_boosts
+from services.rating_history import build_rating_history, sync_rating_history, sync_rating_history_async
+from services.resilience import isolated, mark_stale
+from services.submission_sync import as_api_submissions, sync_user_submissions, sync_user_submissions_async
+from utils.config import Config
+
+BUNDLE_SECTIONS = ('analysis', 'activity', 'recommendations', 'rating')
+
+# Same submission windows as /recommendations/analyze and get_recommendations
+ANALYSIS_WINDOW = 100
+RECOMMENDATION_WINDOW = 200
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.PROFILE_BUNDLE_THREADS, thread_name_prefix='bundle')
+        return _executor
+
+
+def parse_sections(value):
+    """Sections named by a comma-separated sections= value, in bundle order (None/empty: all)"""
+    if not value:
+        return BUNDLE_SECTIONS
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested.difference(BUNDLE_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+    return tuple(name for name in BUNDLE_SECTIONS if name in requested)
+
+
+def _analysis_panel(cf_handle, rows, sync):
+    submissions = as_api_submissions(rows[:ANALYSIS_WINDOW])
+    return {'analysis': analyze_user_performance(submissions), 'total_submissions': len(submissions)}
+
+
+def _activity_panel(cf_handle, rows, sync):
+    return activity_after_sync(cf_handle, sync['submissions'][0], sync['submissions'][1], rows)
+
+
+def _recommendations_panel(cf_handle, rows, sync):
+    submissions = as_api_submissions(rows[:RECOMMENDATION_WINDOW])
+    return get_recommendations(
+        cf_handle, Config.PROFILE_BUNDLE_RECOMMENDATIONS, 'simple',
+        solved_problem_keys(submissions), weak_tag_boosts(submissions)
+    )
+
+
+def _rating_panel(cf_handle, rows, sync):
+    return build_rating_history(cf_handle, sync['rating'], max_points=Config.PROFILE_BUNDLE_RATING_POINTS)
+
+
+_PANELS = {
+    'analysis': _analysis_panel,
+    'activity': _activity_panel,
+    'recommendations': _recommendations_panel,
+    'rating': _rating_panel
+}
+
+
+def _submission_rows(cf_handle, sections, sync):
+    """Stored submissions, loaded once for every section built from them"""
+    if sections == ('rating',) or sync['submissions'][1] is None:
+        return None
+    return load_submission_rows(cf_handle)
+
+
+def _panel(section, cf_handle, rows, sync):
+    """One section of the bundle; a failing panel doesn't fail the others"""
+    if section != 'rating' and rows is None:
+        return section, None, 'Could not fetch user submissions'
+    try:
+        value = _PANELS[section](cf_handle, rows, sync)
+        if section == 'rating' and value is None:
+            # Upstream unreachable and nothing stored; /rating-history answers 500 here
+            return section, None, 'Could not fetch rating history'
+        return section, value, None
+    except Exception as e:
+        print(f"Error building {section} for {cf_handle}: {str(e)}")
+        return section, None, str(e)
+
+
+def _assemble(cf_handle, sections, sync, panels):
+    # Upstream calls ran on other threads/tasks, whose stale flag doesn't
+    # reach this request; re-raise it here
+    sources = {kind: value[0] if kind == 'submissions' else value for kind, value in sync.items()}
+    if 'stale' in sources.values():
+        mark_stale()
+
+    bundle = {
+        'cf_handle': cf_handle,
+        'sections': list(sections),
+        'sources': sources,
+        'generated_at': datetime.now().isoformat()
+    }
+    errors = {}
+    for section, value, error in panels:
+        bundle[section] = value
+        if error:
+            errors[section] = error
+    if errors:
+        bundle['errors'] = errors
+    return bundle
+
+
+def _syncs_needed(sections):
+    needed = []
+    if sections != ('rating',):
+        needed.append('submissions')
+    if 'rating' in sections:
+        needed.append('rating')
+    return needed
+
+
+def get_profile_bundle(cf_handle, sections=BUNDLE_SECTIONS):
+    """Every requested profile panel, built from one upstream sync.
+
+    Submissions and rating history are synced once (concurrently), the
+    stored submissions are read once, and the panels are then computed in
+    parallel from that shared data instead of each fetching its own copy.
+    """
+    executor = _get_executor()
+    syncs = {'submissions': sync_user_submissions, 'rating': sync_rating_history}
+    futures = {kind: executor.submit(isolated(syncs[kind]), cf_handle) for kind in _syncs_needed(sections)}
+    sync = {kind: future.result() for kind, future in futures.items()}
+
+    rows = _submission_rows(cf_handle, sections, sync)
+    futures = [executor.submit(isolated(_panel), section, cf_handle, rows, sync) for section in sections]
+    return _assemble(cf_handle, sections, sync, [future.result() for future in futures])
+
+
+async def get_profile_bundle_async(cf_handle, sections=BUNDLE_SECTIONS):
+    """get_profile_bundle() for the ASGI app: upstream awaited, panels on run_db"""
+    syncs = {'submissions': sync_user_submissions_async, 'rating': sync_rating_history_async}
+    kinds = _syncs_needed(sections)
+    results = await asyncio.gather(*(syncs[kind](cf_handle) for kind in kinds))
+    sync = dict(zip(kinds, results))
+
+    rows = await run_db(_submission_rows, cf_handle, sections, sync)
+    panels = await asyncio.gather(*(run_db(_panel, section, cf_handle, rows, sync) for section in sections))
+    return _assemble(cf_handle, sections, sync, panels)
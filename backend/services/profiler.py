@@ -0,0 +1,161 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from utils.auth import is_admin_request
+from utils.config import Config
+
+_write_lock = threading.Lock()
+TRACE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _requested_explicitly(request):
+    flag = request.args.get('__profile') or request.headers.get('X-Profile')
+    return flag in ('1', 'true') and is_admin_request(request)
+
+
+def _trace_path(trace_id, ext):
+    return os.path.join(Config.PROFILE_DIR, f"{trace_id}.{ext}")
+
+
+def save_trace(profile, meta):
+    """Write a profile and its metadata to PROFILE_DIR, keeping the newest traces"""
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    profile.dump_stats(_trace_path(meta['id'], 'prof'))
+    with open(_trace_path(meta['id'], 'json'), 'w') as f:
+        json.dump(meta, f)
+
+    with _write_lock:
+        traces = list_traces()
+        for old in traces[Config.PROFILE_MAX_TRACES:]:
+            for ext in ('prof', 'json'):
+                try:
+                    os.remove(_trace_path(old['id'], ext))
+                except OSError:
+                    pass
+
+
+def list_traces():
+    """Metadata of stored traces, newest first"""
+    if not os.path.isdir(Config.PROFILE_DIR):
+        return []
+
+    traces = []
+    for name in os.listdir(Config.PROFILE_DIR):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(Config.PROFILE_DIR, name)) as f:
+                traces.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    traces.sort(key=lambda t: t['created'], reverse=True)
+    return traces
+
+
+def get_trace(trace_id):
+    if not TRACE_ID_PATTERN.match(trace_id):
+        return None
+    try:
+        with open(_trace_path(trace_id, 'json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def trace_file(trace_id):
+    path = _trace_path(trace_id, 'prof')
+    return path if TRACE_ID_PATTERN.match(trace_id) and os.path.exists(path) else None
+
+
+def top_functions(trace_id, limit=30, sort='cumulative', pattern=None):
+    """Top functions of a stored trace, optionally restricted to file/function names matching pattern"""
+    path = trace_file(trace_id)
+    if path is None:
+        return None
+
+    stats = pstats.Stats(path)
+    sort_key = {'cumulative': 3, 'tottime': 2, 'calls': 1}.get(sort, 3)
+    regex = re.compile(pattern) if pattern else None
+
+    rows = []
+    for (filename, line, name), (primitive, ncalls, tottime, cumtime, _) in stats.stats.items():
+        function = f"{filename}:{line}({name})"
+        if regex and not regex.search(function):
+            continue
+        rows.append((function, ncalls, tottime, cumtime, primitive))
+
+    rows.sort(key=lambda r: r[sort_key], reverse=True)
+    return [{
+        'function': function,
+        'ncalls': ncalls,
+        'primitive_calls': primitive,
+        'tottime': round(tottime, 6),
+        'cumtime': round(cumtime, 6),
+        'percall_cumtime': round(cumtime / ncalls, 6) if ncalls else 0
+    } for function, ncalls, tottime, cumtime, primitive in rows[:limit]]
+
+
+def init_profiler(app):
+    """Profile requests on demand (admin ?__profile=1 / X-Profile: 1) or by sampling.
+
+    Sampled requests are only kept when they exceed PROFILE_SLOW_THRESHOLD,
+    so the automatic mode captures slow calls without storing every trace.
+    """
+    from flask import request, g
+
+    @app.before_request
+    def _start_profile():
+        if _requested_explicitly(request):
+            trigger = 'explicit'
+        elif Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE:
+            trigger = 'sampled'
+        else:
+            return
+
+        profile = cProfile.Profile()
+        g._profile = (profile, trigger, time.perf_counter())
+        profile.enable()
+
+    @app.after_request
+    def _finish_profile(response):
+        state = g.pop('_profile', None)
+        if state is None:
+            return response
+
+        profile, trigger, start = state
+        profile.disable()
+        duration = time.perf_counter() - start
+
+        if trigger == 'sampled' and duration < Config.PROFILE_SLOW_THRESHOLD:
+            return response
+
+        meta = {
+            'id': uuid.uuid4().hex,
+            'created': time.time(),
+            'trigger': trigger,
+            'method': request.method,
+            'path': request.path,
+            'route': request.url_rule.rule if request.url_rule else None,
+            'status': response.status_code,
+            'duration_seconds': round(duration, 4)
+        }
+        try:
+            save_trace(profile, meta)
+            response.headers['X-Profile-Id'] = meta['id']
+        except OSError as e:
+            print(f"Failed to save profile: {str(e)}")
+        return response
+
+    @app.teardown_request
+    def _discard_profile(exc):
+        # Request failed before after_request ran
+        state = g.pop('_profile', None)
+        if state is not None:
+            state[0].disable()
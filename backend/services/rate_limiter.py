@@ -0,0 +1,182 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from services.metrics import metrics
+from utils.config import Config
+
+# Priority classes, most urgent first
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+BULK = 'bulk'
+PRIORITIES = (INTERACTIVE, BACKGROUND, BULK)
+
+_priority = contextvars.ContextVar('upstream_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def upstream_priority(priority):
+    """Run a block's Codeforces calls in the given priority class"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def _lookahead(priority, interval):
+    """How far ahead of now a class may book a slot (None: unlimited).
+
+    Interactive callers always take the next free slot. Lower classes only
+    book once the backlog has drained to their lookahead, so a burst of
+    background calls never queues in front of a user's request.
+    """
+    if priority == BACKGROUND:
+        return Config.CF_BACKGROUND_LOOKAHEAD * interval
+    if priority == BULK:
+        return Config.CF_BULK_LOOKAHEAD * interval
+    return None
+
+
+class RateLimiter:
+    """Hands out request slots spaced `interval` seconds apart.
+
+    Subclasses only provide _update(decide), an atomic read-modify-write of
+    the next free slot time, and _read(), a plain read of it.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def _update(self, decide):
+        """decide(next_slot) -> (result, new next_slot), applied atomically"""
+        raise NotImplementedError
+
+    def _read(self):
+        """Current next_slot, without taking the write lock"""
+        raise NotImplementedError
+
+    def reserve(self, priority=INTERACTIVE, deadline=None):
+        """Try to book a slot.
+
+        Returns (delay, True) for a booked slot starting after delay seconds,
+        (delay, False) when this class must not book that far ahead yet and
+        should try again after delay, or None if the deadline can't be met.
+        """
+        if self.interval <= 0:
+            return 0.0, True
+        lookahead = _lookahead(priority, self.interval)
+
+        def decide(next_slot):
+            now = time.time()
+            slot = max(now, next_slot)
+            if deadline is not None and slot >= deadline:
+                return None, next_slot
+            if lookahead is not None and slot - now > lookahead:
+                return (slot - lookahead - now, False), next_slot
+            return (slot - now, True), slot + self.interval
+
+        return self._update(decide)
+
+    def penalize(self, seconds):
+        """Push every pending caller back, e.g. after "Call limit exceeded" """
+        self._update(lambda next_slot: (None, max(next_slot, time.time() + seconds)))
+
+    def next_slot_time(self):
+        """Earliest time the next request may be sent"""
+        return self._read()
+
+    def backlog(self):
+        """Seconds of already booked slots ahead of a new interactive caller"""
+        return max(0.0, self.next_slot_time() - time.time())
+
+
+class LocalRateLimiter(RateLimiter):
+    """Per-process limiter; each worker process gets its own budget"""
+
+    def __init__(self, interval):
+        super().__init__(interval)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _update(self, decide):
+        with self._lock:
+            result, self._next_slot = decide(self._next_slot)
+        return result
+
+    def _read(self):
+        with self._lock:
+            return self._next_slot
+
+
+class SharedRateLimiter(RateLimiter):
+    """Limiter shared by every process on the host through a small SQLite file.
+
+    Each booking is one BEGIN IMMEDIATE transaction on a single row, so
+    gunicorn/uvicorn workers draw from one budget instead of N. Nothing here
+    needs to survive a crash, so the file runs with synchronous=OFF.
+    """
+
+    def __init__(self, path, interval, name='codeforces'):
+        super().__init__(interval)
+        self.path = path
+        self.name = name
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    name TEXT PRIMARY KEY,
+                    next_slot REAL NOT NULL
+                )
+            ''')
+            self._local.conn = conn
+        return conn
+
+    def _update(self, decide):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT next_slot FROM rate_limit WHERE name = ?', (self.name,)).fetchone()
+            result, next_slot = decide(row[0] if row else 0.0)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit (name, next_slot) VALUES (?, ?)', (self.name, next_slot)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def _read(self):
+        # WAL readers never wait for a writer, so metrics scrapes stay off the booking lock
+        row = self._connect().execute('SELECT next_slot FROM rate_limit WHERE name = ?', (self.name,)).fetchone()
+        return row[0] if row else 0.0
+
+
+def build_rate_limiter(interval=None):
+    """Limiter selected by Config.CF_RATE_LIMITER ('shared' or 'local')"""
+    interval = Config.CF_MIN_REQUEST_INTERVAL if interval is None else interval
+    if Config.CF_RATE_LIMITER == 'shared':
+        directory = os.path.dirname(Config.CF_RATE_LIMIT_DB)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SharedRateLimiter(Config.CF_RATE_LIMIT_DB, interval)
+    return LocalRateLimiter(interval)
+
+
+metrics.describe('cf_api_rate_limit_deferrals_total', 'counter', 'Times a lower-priority call waited for the backlog to drain')
+metrics.describe('cf_api_rate_limit_backlog_seconds', 'gauge', 'Booked Codeforces request slots ahead of a new interactive call')
@@ -0,0 +1,238 @@
+import time
+from services.codeforces_api import cf_api
+from services.database import get_db_connection, get_last_synced, mark_synced, run_db
+from services.metrics import record_cache_result
+from services.resilience import mark_stale
+from utils.config import Config
+
+SYNC_KIND = 'rating'
+SECONDS_PER_DAY = 86400
+# LTTB keeps the first and last points plus one per bucket in between
+MIN_DOWNSAMPLE_POINTS = 3
+
+
+def _rating_sync_due(cf_handle, force=False):
+    """True when the local copy is missing or older than RATING_HISTORY_TTL"""
+    if force:
+        return True
+    conn = get_db_connection()
+    try:
+        last_synced = get_last_synced(conn, cf_handle, SYNC_KIND)
+    finally:
+        conn.close()
+    return not last_synced or time.time() - last_synced >= Config.RATING_HISTORY_TTL
+
+
+def store_rating_changes(cf_handle, changes, synced_at):
+    """Store the contests of a user.rating answer newer than what we already have"""
+    conn = get_db_connection()
+    try:
+        # user.rating always returns the full history
+        row = conn.execute(
+            'SELECT MAX(update_time) FROM rating_changes WHERE cf_handle = ?', (cf_handle,)
+        ).fetchone()
+        latest = row[0] or 0
+
+        new_rows = [(
+            cf_handle,
+            change['contestId'],
+            change.get('contestName'),
+            change.get('rank'),
+            change.get('oldRating'),
+            change.get('newRating'),
+            change.get('ratingUpdateTimeSeconds', 0)
+        ) for change in changes if change.get('ratingUpdateTimeSeconds', 0) > latest]
+
+        conn.executemany('''
+            INSERT OR REPLACE INTO rating_changes
+            (cf_handle, contest_id, contest_name, rank, old_rating, new_rating, update_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', new_rows)
+        mark_synced(conn, cf_handle, SYNC_KIND, synced_at)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _upstream_unavailable(changes):
+    """True, with the request flagged stale, when there is nothing fresh to store"""
+    if changes is not None:
+        return False
+    # Unreachable: serve what we have and retry on the next request
+    mark_stale()
+    record_cache_result('rating_history', 'stale')
+    return True
+
+
+def sync_rating_history(cf_handle, force=False):
+    """Bring the local rating history of a handle up to date.
+
+    Returns 'cache' when the local copy is fresh enough, 'upstream' after a
+    successful refresh and 'stale' when Codeforces could not be reached.
+    """
+    if not _rating_sync_due(cf_handle, force):
+        record_cache_result('rating_history', 'cache')
+        return 'cache'
+
+    now = time.time()
+    changes = cf_api.get_user_rating(cf_handle, allow_stale=False)
+    if _upstream_unavailable(changes):
+        return 'stale'
+
+    store_rating_changes(cf_handle, changes, now)
+    record_cache_result('rating_history', 'upstream')
+    return 'upstream'
+
+
+async def sync_rating_history_async(cf_handle, force=False):
+    """sync_rating_history() for the ASGI app: upstream awaited, DB work on run_db"""
+    # httpx is only needed once the ASGI app is in use
+    from services.async_codeforces_api import async_cf_api
+
+    if not await run_db(_rating_sync_due, cf_handle, force):
+        record_cache_result('rating_history', 'cache')
+        return 'cache'
+
+    now = time.time()
+    changes = await async_cf_api.get_user_rating(cf_handle, allow_stale=False)
+    if _upstream_unavailable(changes):
+        return 'stale'
+
+    await run_db(store_rating_changes, cf_handle, changes, now)
+    record_cache_result('rating_history', 'upstream')
+    return 'upstream'
+
+
+def load_rating_history(cf_handle):
+    """All stored rating changes of a handle, oldest first"""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT contest_id, contest_name, rank, old_rating, new_rating, update_time
+        FROM rating_changes
+        WHERE cf_handle = ?
+        ORDER BY update_time
+    ''', (cf_handle,)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most `threshold` points that preserve the
+    visual shape of the (x, y) series. First and last points are kept.
+    """
+    import numpy as np
+
+    n = len(x)
+    if threshold >= n or threshold < MIN_DOWNSAMPLE_POINTS:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        if i < threshold - 3:
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    selected[-1] = n - 1
+    return selected
+
+
+def compute_rating_metrics(history, trend_window=None):
+    """Derived metrics over a rating history (oldest first)"""
+    import numpy as np
+
+    if not history:
+        return {}
+
+    trend_window = trend_window or Config.RATING_TREND_WINDOW
+    times = np.fromiter((h['update_time'] for h in history), dtype=np.float64, count=len(history))
+    ratings = np.fromiter((h['new_rating'] for h in history), dtype=np.float64, count=len(history))
+    old_ratings = np.fromiter((h['old_rating'] for h in history), dtype=np.float64, count=len(history))
+    deltas = ratings - old_ratings
+
+    # Trend: least-squares slope of rating over the last contests, per 30 days
+    recent_times = times[-trend_window:]
+    recent_ratings = ratings[-trend_window:]
+    trend_slope = 0.0
+    if len(recent_times) >= 2 and np.ptp(recent_times) > 0:
+        days = (recent_times - recent_times[0]) / SECONDS_PER_DAY
+        trend_slope = float(np.polyfit(days, recent_ratings, 1)[0] * 30)
+
+    return {
+        'contests': len(history),
+        'current_rating': int(ratings[-1]),
+        'max_rating': int(ratings.max()),
+        'min_rating': int(ratings.min()),
+        'volatility': round(float(deltas.std()), 2),
+        'recent_volatility': round(float(deltas[-trend_window:].std()), 2),
+        'avg_change': round(float(deltas.mean()), 2),
+        'best_gain': int(deltas.max()),
+        'worst_drop': int(deltas.min()),
+        'trend_per_30_days': round(trend_slope, 2),
+        'trend_window': len(recent_times)
+    }
+
+
+def get_rating_history(cf_handle, since=None, max_points=None):
+    """Rating history served from the local store, refreshed when stale"""
+    source = sync_rating_history(cf_handle)
+    return build_rating_history(cf_handle, source, since, max_points)
+
+
+async def get_rating_history_async(cf_handle, since=None, max_points=None):
+    source = await sync_rating_history_async(cf_handle)
+    return await run_db(build_rating_history, cf_handle, source, since, max_points)
+
+
+def build_rating_history(cf_handle, source, since=None, max_points=None):
+    """Response body for the stored history after a sync that reported source"""
+    history = load_rating_history(cf_handle)
+
+    if not history and source == 'stale':
+        return None
+
+    metrics = compute_rating_metrics(history)
+
+    points = history
+    if since:
+        points = [h for h in history if h['update_time'] > since]
+
+    downsampled = False
+    if max_points and len(points) > max_points:
+        indices = lttb_indices(
+            [p['update_time'] for p in points],
+            [p['new_rating'] for p in points],
+            max_points
+        )
+        downsampled = len(indices) < len(points)
+        points = [points[i] for i in indices]
+
+    return {
+        'cf_handle': cf_handle,
+        'history': points,
+        'metrics': metrics,
+        'last_update_time': history[-1]['update_time'] if history else None,
+        'downsampled': downsampled,
+        'source': source
+    }
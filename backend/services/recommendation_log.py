@@ -0,0 +1,92 @@
+import atexit
+import threading
+import time
+from services.metrics import metrics
+from utils.config import Config
+
+
+class RecommendationWriter:
+    """Records served recommendations without a commit per row.
+
+    record() only appends to an in-memory buffer; a daemon thread flushes it
+    with one executemany per batch, when it reaches RECOMMENDATION_FLUSH_SIZE
+    rows or every RECOMMENDATION_FLUSH_INTERVAL seconds. Past
+    RECOMMENDATION_MAX_PENDING buffered rows new ones are dropped (and
+    counted) rather than slowing requests down.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = []
+        self._thread = None
+        self._flush_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recommendation-writer', daemon=True)
+            self._thread.start()
+
+    def record(self, user_id, recommendations):
+        """Queue what get_recommendations returned for user_id"""
+        if not Config.RECOMMENDATION_LOG_ENABLED or not recommendations:
+            return
+        rows = [
+            (user_id, rec.get('problem_id', rec.get('id')), rec.get('score'), rec.get('reason'))
+            for rec in recommendations
+        ]
+        with self._lock:
+            room = Config.RECOMMENDATION_MAX_PENDING - len(self._pending)
+            if room < len(rows):
+                metrics.inc('recommendation_log_dropped_total', value=len(rows) - max(room, 0))
+                rows = rows[:max(room, 0)]
+            self._pending.extend(rows)
+            self._ensure_started()
+            if len(self._pending) >= Config.RECOMMENDATION_FLUSH_SIZE:
+                self._wakeup.notify()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _take(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        return rows
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        from models.recommendation import Recommendation
+
+        # One flush at a time keeps batches in order
+        with self._flush_lock:
+            rows = self._take()
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            try:
+                Recommendation.create_many(rows)
+            except Exception as e:
+                print(f"Error writing {len(rows)} recommendations: {str(e)}")
+                metrics.inc('recommendation_log_errors_total')
+                return 0
+            metrics.observe('recommendation_log_flush_seconds', time.perf_counter() - start)
+            metrics.inc('recommendation_log_rows_total', value=len(rows))
+            return len(rows)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if len(self._pending) < Config.RECOMMENDATION_FLUSH_SIZE:
+                    self._wakeup.wait(Config.RECOMMENDATION_FLUSH_INTERVAL)
+            self.flush()
+
+
+# Global instance
+recommendation_writer = RecommendationWriter()
+
+metrics.describe('recommendation_log_rows_total', 'counter', 'Served recommendations written to the recommendations table')
+metrics.describe('recommendation_log_dropped_total', 'counter', 'Served recommendations dropped because the write buffer was full')
+metrics.describe('recommendation_log_errors_total', 'counter', 'Failed recommendation batch writes')
+metrics.describe('recommendation_log_flush_seconds', 'histogram', 'Time to write one batch of recommendations')
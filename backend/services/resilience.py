@@ -0,0 +1,177 @@
+import contextvars
+import random
+import threading
+import time
+from collections import OrderedDict
+from services.metrics import metrics
+from utils.config import Config
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+# allow() answer for the single half-open trial call
+TRIAL = 'trial'
+
+_stale = contextvars.ContextVar('upstream_stale', default=False)
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures.
+
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half_open after `reset_timeout` seconds, where a single trial call
+    decides between closed and open again.
+    """
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.CF_BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or Config.CF_BREAKER_RESET
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Truthy if a call may go upstream; TRIAL for the half-open trial call.
+
+        The trial caller must end it with record_success, record_failure or
+        release_trial.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return TRIAL
+            return False
+
+    def release_trial(self):
+        """End a trial call that finished without an outcome (deadline, call
+        limit, an unexpected error, cancellation); the next call tries again
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.time()
+                self._trial_in_flight = False
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, name):
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name)
+            return breaker
+
+    def states(self):
+        with self._lock:
+            return {name: b.state for name, b in self._breakers.items()}
+
+
+class LastGoodCache:
+    """Bounded LRU of the last successful response per call"""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or Config.CF_STALE_CACHE_SIZE
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff for the given (0-based) retry attempt"""
+    base = Config.CF_BACKOFF_BASE if base is None else base
+    cap = Config.CF_BACKOFF_CAP if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def mark_stale():
+    """Flag the current request as served from stale data"""
+    _stale.set(True)
+
+
+def is_stale():
+    return _stale.get()
+
+
+def reset_stale():
+    _stale.set(False)
+
+
+def isolated(fn):
+    """fn bound to a copy of the current context, with the stale flag cleared.
+
+    Wrap each call handed to a long-lived pool thread: the caller's context
+    (upstream priority) goes along, and a stale mark stays with the call
+    instead of sticking to the thread. One wrapper per call; a context
+    can't be entered by two threads at once.
+    """
+    context = contextvars.copy_context()
+    context.run(reset_stale)
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def init_stale_marking(app):
+    """Add X-Upstream-Stale / Warning headers to responses built from stale data"""
+
+    @app.before_request
+    def _reset_stale():
+        reset_stale()
+
+    @app.after_request
+    def _mark_stale_response(response):
+        if is_stale():
+            response.headers['X-Upstream-Stale'] = 'true'
+            response.headers['Warning'] = '110 - "Response is Stale"'
+        return response
+
+
+# Global instances
+breakers = BreakerRegistry()
+last_good = LastGoodCache()
+
+metrics.describe('cf_api_circuit_state', 'gauge', 'Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)')
+metrics.describe('cf_api_retries_total', 'counter', 'Retried Codeforces API calls per endpoint and failure outcome')
+metrics.describe('cf_api_stale_responses_total', 'counter', 'Calls answered from the last known good response')
+metrics.register_collector(lambda: [
+    ('cf_api_circuit_state', {'endpoint': name}, STATE_VALUES[state])
+    for name, state in breakers.states().items()
+])
@@ -0,0 +1,281 @@
+import time
+from services.catalog_snapshot import catalog_columns
+from services.ml_service import build_interaction_matrix
+from utils.config import Config
+
+SIMILARITY_ARTIFACT = 'similar_problems'
+# Hashes are (a * x + b) mod a Mersenne prime below 2**31, so signatures fit int32
+MERSENNE = (1 << 31) - 1
+# Fixed seeds: a query re-hashes signatures into band keys the way the build did
+HASH_SEED = 1
+BAND_SEED = 2
+# Hash functions evaluated per pass over the elements; bounds temporary memory
+HASH_CHUNK = 8
+
+
+def _hash_params(num_perm):
+    import numpy as np
+
+    rng = np.random.default_rng(HASH_SEED)
+    return (
+        rng.integers(1, MERSENNE, num_perm, dtype=np.uint64),
+        rng.integers(0, MERSENNE, num_perm, dtype=np.uint64)
+    )
+
+
+def minhash_signatures(set_ptr, elements, num_perm):
+    """(n, num_perm) int32 MinHash signatures of n sets given in CSR form.
+
+    Set i is elements[set_ptr[i]:set_ptr[i + 1]] (non-negative integers).
+    Every slot of an empty set's signature is MERSENNE.
+    """
+    import numpy as np
+
+    a, b = _hash_params(num_perm)
+    signatures = np.full((len(set_ptr) - 1, num_perm), MERSENNE, dtype=np.int32)
+    nonempty = np.nonzero(np.diff(set_ptr))[0]
+    if not len(nonempty):
+        return signatures
+
+    values = np.asarray(elements, dtype=np.uint64)[:, None] % np.uint64(MERSENNE)
+    starts = np.asarray(set_ptr)[nonempty]
+    for k in range(0, num_perm, HASH_CHUNK):
+        hashed = (values * a[k:k + HASH_CHUNK] + b[k:k + HASH_CHUNK]) % np.uint64(MERSENNE)
+        # Empty sets have no elements, so consecutive non-empty starts delimit each set
+        signatures[nonempty, k:k + HASH_CHUNK] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signatures
+
+
+def band_keys(signatures, bands):
+    """(bands, n) uint64 LSH keys: the rows of each band hashed into one value.
+
+    Two sets land in the same bucket of a band with probability J ** rows,
+    J being their Jaccard similarity.
+    """
+    import numpy as np
+
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    multipliers = np.random.default_rng(BAND_SEED).integers(1, 2 ** 63, rows, dtype=np.uint64) | np.uint64(1)
+    banded = signatures[:, :bands * rows].astype(np.uint64).reshape(n, bands, rows)
+    # uint64 arithmetic wraps, which is all a hash needs
+    return (banded * multipliers).sum(axis=2, dtype=np.uint64).T
+
+
+def _buckets(signatures, present, bands):
+    """(sorted keys, positions) per band over the problems with a non-empty set"""
+    import numpy as np
+
+    members = np.nonzero(present)[0].astype(np.int32)
+    keys = band_keys(signatures[members], bands)
+    order = np.argsort(keys, axis=1, kind='stable')
+    return np.take_along_axis(keys, order, axis=1), members[order]
+
+
+def _tag_sets(tag_bits, tag_count):
+    """CSR (set_ptr, elements) of tag bit positions per problem"""
+    import numpy as np
+
+    bits = np.arange(tag_count, dtype=np.uint64)
+    member = ((tag_bits[:, None] >> bits) & np.uint64(1)).astype(bool)
+    set_ptr = np.zeros(len(tag_bits) + 1, dtype=np.int64)
+    np.cumsum(member.sum(axis=1), out=set_ptr[1:])
+    return set_ptr, np.nonzero(member)[1]
+
+
+def _solver_sets(ids):
+    """CSR (set_ptr, elements) of solver positions per problem of ids (sorted).
+
+    Solvers come from the user-item matrix, so synced submissions and
+    ingested contest standings both count. Problems with fewer than
+    SIMILAR_MIN_SOLVERS solvers get an empty set.
+    """
+    import numpy as np
+
+    matrix = build_interaction_matrix()
+    if matrix is None:
+        return np.zeros(len(ids) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32)
+
+    col_ptr, col_users = matrix.item_users
+    counts = np.diff(col_ptr)
+    items = np.asarray(matrix.items, dtype=np.int64)
+    positions = np.searchsorted(ids, items)
+    known = (positions < len(ids)) & (ids[np.minimum(positions, len(ids) - 1)] == items)
+    keep = known & (counts >= Config.SIMILAR_MIN_SOLVERS)
+
+    sizes = np.zeros(len(ids), dtype=np.int64)
+    sizes[positions[keep]] = counts[keep]
+    set_ptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=set_ptr[1:])
+
+    # Gather each kept item's solvers in problem-id order
+    kept_items = np.nonzero(keep)[0]
+    kept_items = kept_items[np.argsort(positions[kept_items], kind='stable')]
+    entry_ranges = [np.arange(col_ptr[item], col_ptr[item + 1]) for item in kept_items]
+    entries = np.concatenate(entry_ranges) if entry_ranges else np.zeros(0, dtype=np.int64)
+    return set_ptr, np.asarray(col_users)[entries]
+
+
+def build_similarity_index(directory=None):
+    """Offline step: MinHash signatures and LSH buckets of every problem, as an artifact.
+
+    Run after importing problems (and after standings ingestion for solver
+    sets); every worker maps the new version on its next check.
+    """
+    import numpy as np
+    from ml.artifact import write_artifact
+
+    started = time.time()
+    columns, tags = catalog_columns()
+    order = np.argsort(columns['ids'], kind='stable')
+    ids = columns['ids'][order].astype(np.int64)
+    num_perm = Config.SIMILAR_NUM_PERM
+
+    tag_sig = minhash_signatures(*_tag_sets(columns['tag_bits'][order], len(tags)), num_perm)
+    has_tags = (tag_sig != MERSENNE).any(axis=1)
+    if Config.SIMILAR_USE_SOLVERS:
+        solver_sig = minhash_signatures(*_solver_sets(ids), num_perm)
+    else:
+        solver_sig = np.full((len(ids), num_perm), MERSENNE, dtype=np.int32)
+    has_solvers = (solver_sig != MERSENNE).any(axis=1)
+
+    tag_keys, tag_positions = _buckets(tag_sig, has_tags, Config.SIMILAR_TAG_BANDS)
+    solver_keys, solver_positions = _buckets(solver_sig, has_solvers, Config.SIMILAR_SOLVER_BANDS)
+
+    meta = {
+        'kind': 'minhash_lsh',
+        'problems': int(len(ids)),
+        'with_tags': int(has_tags.sum()),
+        'with_solvers': int(has_solvers.sum()),
+        'num_perm': num_perm,
+        'tag_bands': Config.SIMILAR_TAG_BANDS,
+        'solver_bands': Config.SIMILAR_SOLVER_BANDS
+    }
+    version, path = write_artifact(directory or Config.MODEL_ARTIFACT_DIR, SIMILARITY_ARTIFACT, {
+        'ids': ids,
+        'ratings': columns['ratings'][order].astype(np.int32),
+        'tag_sig': tag_sig,
+        'solver_sig': solver_sig,
+        'has_tags': has_tags.astype(np.uint8),
+        'has_solvers': has_solvers.astype(np.uint8),
+        'tag_keys': tag_keys,
+        'tag_positions': tag_positions,
+        'solver_keys': solver_keys,
+        'solver_positions': solver_positions
+    }, meta=meta, keep=Config.MODEL_ARTIFACT_KEEP)
+    return {**meta, 'version': version, 'path': path, 'elapsed_seconds': round(time.time() - started, 3)}
+
+
+class SimilarityIndex:
+    """Query side of a mapped similarity artifact; arrays are views, nothing is copied"""
+
+    def __init__(self, artifact):
+        self.version = artifact.version
+        self.meta = artifact.meta
+        for name in artifact.arrays:
+            setattr(self, name, artifact[name])
+
+    def position(self, problem_id):
+        import numpy as np
+
+        i = int(np.searchsorted(self.ids, problem_id))
+        return i if i < len(self.ids) and self.ids[i] == problem_id else None
+
+    @staticmethod
+    def _bucket_members(keys, positions, query_keys):
+        """Positions sharing at least one band bucket with the query"""
+        import numpy as np
+
+        found = []
+        for band, key in enumerate(query_keys):
+            lo = np.searchsorted(keys[band], key, side='left')
+            hi = np.searchsorted(keys[band], key, side='right')
+            found.append(positions[band, lo:hi])
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int32)
+
+    def query(self, problem_id, count, rating_min=None, rating_max=None):
+        """Up to count (problem_id, score, tag_similarity, solver_similarity), best first.
+
+        Only problems sharing an LSH bucket with problem_id are scored, with
+        Jaccard similarities estimated from the signatures. Returns None when
+        problem_id is not in the index.
+        """
+        import numpy as np
+
+        pos = self.position(problem_id)
+        if pos is None:
+            return None
+
+        use_solvers = bool(self.has_solvers[pos])
+        groups = []
+        if self.has_tags[pos]:
+            groups.append(self._bucket_members(
+                self.tag_keys, self.tag_positions, band_keys(self.tag_sig[pos:pos + 1], self.meta['tag_bands'])[:, 0]
+            ))
+        if use_solvers:
+            groups.append(self._bucket_members(
+                self.solver_keys, self.solver_positions,
+                band_keys(self.solver_sig[pos:pos + 1], self.meta['solver_bands'])[:, 0]
+            ))
+        candidates = np.unique(np.concatenate(groups)) if groups else np.zeros(0, dtype=np.int32)
+        candidates = candidates[candidates != pos]
+
+        if rating_min is not None:
+            candidates = candidates[self.ratings[candidates] >= rating_min]
+        if rating_max is not None:
+            candidates = candidates[self.ratings[candidates] <= rating_max]
+        if not len(candidates):
+            return []
+
+        tag_similarity = (self.tag_sig[candidates] == self.tag_sig[pos]).mean(axis=1) * self.has_tags[candidates]
+        if use_solvers:
+            solver_similarity = (
+                (self.solver_sig[candidates] == self.solver_sig[pos]).mean(axis=1) * self.has_solvers[candidates]
+            )
+            weight = Config.SIMILAR_TAG_WEIGHT
+            scores = weight * tag_similarity + (1 - weight) * solver_similarity
+        else:
+            solver_similarity = np.zeros(len(candidates))
+            scores = tag_similarity
+
+        # Candidates are in id order, so ties resolve the same way every time
+        best = np.argsort(-scores, kind='stable')[:count]
+        best = best[scores[best] > 0]
+        return [
+            (int(self.ids[candidates[i]]), float(scores[i]), float(tag_similarity[i]),
+             float(solver_similarity[i]) if use_solvers else None)
+            for i in best
+        ]
+
+
+class SimilarProblems:
+    """Keeps the newest similarity artifact mapped and answers queries from it"""
+
+    def __init__(self):
+        self._index = None
+        self._watcher = None
+
+    def _get_watcher(self):
+        if self._watcher is None:
+            from ml.artifact import ArtifactWatcher
+
+            self._watcher = ArtifactWatcher(
+                Config.MODEL_ARTIFACT_DIR, SIMILARITY_ARTIFACT,
+                on_load=lambda artifact: setattr(self, '_index', SimilarityIndex(artifact)),
+                check_interval=Config.MODEL_CHECK_INTERVAL
+            )
+        return self._watcher
+
+    def get(self):
+        """Current index, or None if none was built"""
+        self._get_watcher().check()
+        return self._index
+
+    def reload(self):
+        """Map the current similarity artifact now; returns its summary or None"""
+        artifact = self._get_watcher().check(force=True)
+        return artifact.summary() if artifact is not None else None
+
+
+# Global instance
+similar_problems = SimilarProblems()
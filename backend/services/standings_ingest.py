@@ -0,0 +1,187 @@
+import time
+from services.codeforces_api import cf_api
+from services.database import get_db_connection
+from services.metrics import metrics
+from services.problem_ingest import get_finished_contest_ids, stage_contest_ids
+from services.rate_limiter import upstream_priority, BULK
+from utils.config import Config
+
+
+def page_interactions(contest_id, page):
+    """(handle, contest_id, index, solved) rows of one contest.standings page.
+
+    Every member of a team gets the team's results. Problems a participant
+    never submitted are left out; rejected attempts count as unsolved.
+    """
+    indices = [problem.get('index') for problem in page.get('problems', [])]
+    rows = []
+    for row in page.get('rows', []):
+        handles = [member['handle'] for member in row.get('party', {}).get('members', []) if member.get('handle')]
+        for index, result in zip(indices, row.get('problemResults', [])):
+            if not index:
+                continue
+            solved = (result.get('points') or 0) > 0
+            if not solved and not result.get('rejectedAttemptCount'):
+                continue
+            rows.extend((handle, contest_id, index, int(solved)) for handle in handles)
+    return rows
+
+
+def pending_contests(conn, contest_ids):
+    """(contest_id, next_row) of contests not fully ingested yet.
+
+    Contests already started come first (least recently touched first, so
+    one that keeps failing doesn't block the others), then new ones newest
+    first.
+    """
+    if not contest_ids:
+        return []
+    stage_contest_ids(conn, contest_ids)
+    rows = conn.execute('''
+        SELECT f.id, COALESCE(p.next_row, 1) AS next_row
+        FROM finished_contests f
+        LEFT JOIN standings_progress p ON p.contest_id = f.id
+        WHERE p.done IS NULL OR p.done = 0
+        ORDER BY p.contest_id IS NULL, p.updated_at, f.id DESC
+    ''').fetchall()
+    return [(row['id'], row['next_row']) for row in rows]
+
+
+def save_page(conn, contest_id, rows, next_row, done):
+    """Store a page's interactions and advance the contest's checkpoint in one transaction"""
+    conn.executemany('''
+        INSERT INTO interactions (cf_handle, contest_id, problem_index, solved)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (cf_handle, contest_id, problem_index) DO UPDATE SET solved = MAX(solved, excluded.solved)
+    ''', rows)
+    conn.execute('''
+        INSERT INTO standings_progress (contest_id, next_row, done, interactions, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (contest_id) DO UPDATE SET
+            next_row = excluded.next_row,
+            done = excluded.done,
+            interactions = interactions + excluded.interactions,
+            updated_at = excluded.updated_at
+    ''', (contest_id, next_row, int(done), len(rows), time.time()))
+    conn.commit()
+
+
+def _touch(conn, contest_id, next_row):
+    """Move a contest that failed to the back of the resume queue"""
+    conn.execute('''
+        INSERT INTO standings_progress (contest_id, next_row, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT (contest_id) DO UPDATE SET updated_at = excluded.updated_at
+    ''', (contest_id, next_row, time.time()))
+    conn.commit()
+
+
+def ingest_contest(conn, contest_id, next_row, deadline):
+    """Page through one contest's standings from next_row until done or out of time.
+
+    Returns (outcome, interactions, standings rows); outcome is 'done',
+    'deferred' (resumes next run) or 'failed'.
+    """
+    page_size = Config.STANDINGS_PAGE_SIZE
+    interactions = standings_rows = 0
+    while True:
+        if time.time() >= deadline:
+            return 'deferred', interactions, standings_rows
+        # Bulk class: only uses slots interactive requests leave idle
+        with upstream_priority(BULK):
+            page = cf_api.get_contest_standings(contest_id, count=page_size, start=next_row, deadline=deadline)
+        if page is None:
+            if max(time.time(), cf_api.next_slot_time()) >= deadline:
+                return 'deferred', interactions, standings_rows
+            _touch(conn, contest_id, next_row)
+            return 'failed', interactions, standings_rows
+
+        rows = page_interactions(contest_id, page)
+        fetched = len(page.get('rows', []))
+        next_row += fetched
+        done = fetched < page_size
+        save_page(conn, contest_id, rows, next_row, done)
+
+        interactions += len(rows)
+        standings_rows += fetched
+        metrics.inc('standings_ingest_pages_total')
+        metrics.inc('standings_ingest_interactions_total', value=len(rows))
+        if done:
+            return 'done', interactions, standings_rows
+
+
+def ingest_standings(max_contests=None, time_budget=None, progress=print):
+    """Walk finished contests' standings into the interactions table.
+
+    Resumable: each page commits together with its checkpoint, so an
+    interrupted run (or one out of budget) continues where it stopped.
+    Requests go through the shared rate-limited client at bulk priority.
+    """
+    max_contests = max_contests or Config.STANDINGS_MAX_CONTESTS
+    time_budget = time_budget or Config.STANDINGS_TIME_BUDGET
+    started = time.time()
+    deadline = started + time_budget
+
+    with upstream_priority(BULK):
+        contests = cf_api.get_contest_list()
+    if not contests:
+        return None
+
+    outcomes = {'done': [], 'deferred': [], 'failed': []}
+    interactions = standings_rows = 0
+    conn = get_db_connection()
+    try:
+        pending = pending_contests(conn, get_finished_contest_ids(contests))
+        for contest_id, next_row in pending[:max_contests]:
+            outcome, stored, fetched = ingest_contest(conn, contest_id, next_row, deadline)
+            outcomes[outcome].append(contest_id)
+            interactions += stored
+            standings_rows += fetched
+            metrics.inc('standings_ingest_contests_total', {'outcome': outcome})
+
+            elapsed = time.time() - started
+            progress(
+                f"Contest {contest_id}: {outcome}, {stored} interactions from {fetched} rows "
+                f"({interactions / elapsed if elapsed else 0:.0f} interactions/s overall)"
+            )
+            if outcome == 'deferred':
+                break
+    finally:
+        conn.close()
+
+    elapsed = time.time() - started
+    return {
+        'contests_pending': len(pending),
+        'contests_done': sorted(outcomes['done']),
+        'contests_deferred': sorted(outcomes['deferred']),
+        'contests_failed': sorted(outcomes['failed']),
+        'standings_rows': standings_rows,
+        'interactions': interactions,
+        'interactions_per_second': round(interactions / elapsed, 1) if elapsed else 0.0,
+        'elapsed_seconds': round(elapsed, 3)
+    }
+
+
+def ingest_status():
+    """Checkpoint totals: contests finished or in progress and interactions stored"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute('''
+            SELECT COALESCE(SUM(done), 0) AS done,
+                   COUNT(*) - COALESCE(SUM(done), 0) AS in_progress,
+                   COALESCE(SUM(interactions), 0) AS interactions
+            FROM standings_progress
+        ''').fetchone()
+        solved = conn.execute('SELECT COUNT(*) FROM interactions WHERE solved = 1').fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        'contests_done': row['done'],
+        'contests_in_progress': row['in_progress'],
+        'interactions': row['interactions'],
+        'solved_interactions': solved
+    }
+
+
+metrics.describe('standings_ingest_pages_total', 'counter', 'contest.standings pages stored')
+metrics.describe('standings_ingest_interactions_total', 'counter', 'Participant-problem interactions stored from standings')
+metrics.describe('standings_ingest_contests_total', 'counter', 'Contests processed per outcome (done, deferred, failed)')
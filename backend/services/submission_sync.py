@@ -0,0 +1,190 @@
+import json
+import time
+from services.codeforces_api import cf_api
+from services.database import get_db_connection, get_last_synced, mark_synced, run_db
+from services.metrics import record_cache_result
+from services.resilience import mark_stale
+from models.problem import decode_tags
+from utils.config import Config
+
+SYNC_KIND = 'submissions'
+
+
+def _submission_row(cf_handle, submission):
+    problem = submission.get('problem', {})
+    return (
+        submission['id'],
+        cf_handle,
+        problem.get('contestId'),
+        problem.get('index'),
+        problem.get('name'),
+        problem.get('rating'),
+        json.dumps(problem.get('tags', [])),
+        submission.get('verdict', 'UNKNOWN'),
+        submission.get('creationTimeSeconds', 0)
+    )
+
+
+def as_api_submissions(rows):
+    """Stored submission rows in the shape user.status returns them"""
+    return [
+        {
+            'id': row['id'],
+            'problem': {
+                'contestId': row['contest_id'],
+                'index': row['problem_index'],
+                'name': row['problem_name'],
+                'rating': row['problem_rating'],
+                'tags': decode_tags(row['tags'])
+            },
+            'verdict': row['verdict'],
+            'creationTimeSeconds': row['creation_time']
+        }
+        for row in rows
+    ]
+
+
+def solved_problem_ids(handles):
+    """Catalog ids of problems accepted by any of the handles, from the synced store"""
+    if not handles:
+        return []
+    placeholders = ','.join('?' * len(handles))
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT DISTINCT p.id
+            FROM user_submissions s
+            JOIN problems p ON p.contest_id = s.contest_id AND p.`index` = s.problem_index
+            WHERE s.cf_handle IN ({placeholders}) AND s.verdict = 'OK'
+        ''', handles).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def _collect_page(new_submissions, page, start, latest_id):
+    """Add a user.status page to new_submissions; True once no further page is needed"""
+    fresh = [s for s in page if s.get('id', 0) > latest_id]
+    # The first page is re-stored whole so verdicts of submissions that
+    # were still being judged at the last sync get updated
+    new_submissions.extend(page if start == 1 else fresh)
+    return len(fresh) < len(page) or len(page) < Config.SUBMISSION_SYNC_PAGE
+
+
+def _fetch_new_submissions(cf_handle, latest_id):
+    """Page through user.status (newest first) until a known submission shows up"""
+    if latest_id is None:
+        return cf_api.get_user_submissions(cf_handle, count=None, allow_stale=False)
+
+    new_submissions = []
+    start = 1
+    while True:
+        page = cf_api.get_user_submissions(
+            cf_handle, count=Config.SUBMISSION_SYNC_PAGE, start=start, allow_stale=False
+        )
+        if page is None:
+            return None
+        if _collect_page(new_submissions, page, start, latest_id):
+            return new_submissions
+        start += Config.SUBMISSION_SYNC_PAGE
+
+
+async def _fetch_new_submissions_async(cf_handle, latest_id):
+    # httpx is only needed once the ASGI app is in use
+    from services.async_codeforces_api import async_cf_api
+
+    if latest_id is None:
+        return await async_cf_api.get_user_submissions(cf_handle, count=None, allow_stale=False)
+
+    new_submissions = []
+    start = 1
+    while True:
+        page = await async_cf_api.get_user_submissions(
+            cf_handle, count=Config.SUBMISSION_SYNC_PAGE, start=start, allow_stale=False
+        )
+        if page is None:
+            return None
+        if _collect_page(new_submissions, page, start, latest_id):
+            return new_submissions
+        start += Config.SUBMISSION_SYNC_PAGE
+
+
+def _sync_state(cf_handle, force=False, ttl=None):
+    """(due, last_synced, latest stored id or None for a first full sync)"""
+    ttl = Config.SUBMISSION_SYNC_TTL if ttl is None else ttl
+    conn = get_db_connection()
+    try:
+        last_synced = get_last_synced(conn, cf_handle, SYNC_KIND)
+        if not force and last_synced and time.time() - last_synced < ttl:
+            return False, last_synced, None
+
+        row = conn.execute(
+            'SELECT MAX(id) FROM user_submissions WHERE cf_handle = ?', (cf_handle,)
+        ).fetchone()
+        return True, last_synced, row[0] if last_synced else None
+    finally:
+        conn.close()
+
+
+def store_submissions(cf_handle, submissions, synced_at):
+    conn = get_db_connection()
+    try:
+        conn.executemany('''
+            INSERT OR REPLACE INTO user_submissions
+            (id, cf_handle, contest_id, problem_index, problem_name, problem_rating, tags, verdict, creation_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [_submission_row(cf_handle, s) for s in submissions if 'id' in s])
+        mark_synced(conn, cf_handle, SYNC_KIND, synced_at)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _upstream_unavailable(submissions):
+    """True, with the request flagged stale, when there is nothing fresh to store"""
+    if submissions is not None:
+        return False
+    # Unreachable: serve what we have and retry on the next request
+    mark_stale()
+    record_cache_result('submissions', 'stale')
+    return True
+
+
+def sync_user_submissions(cf_handle, force=False, ttl=None):
+    """Bring the locally stored submissions of a handle up to date.
+
+    Returns (source, last_synced) where source is 'cache', 'upstream' or
+    'stale' (Codeforces unreachable, local data served as is). last_synced
+    changes whenever new data may have arrived, so it doubles as a cache key.
+    ttl overrides SUBMISSION_SYNC_TTL, the age at which the store is refreshed.
+    """
+    due, last_synced, latest_id = _sync_state(cf_handle, force, ttl)
+    if not due:
+        record_cache_result('submissions', 'cache')
+        return 'cache', last_synced
+
+    now = time.time()
+    submissions = _fetch_new_submissions(cf_handle, latest_id)
+    if _upstream_unavailable(submissions):
+        return 'stale', last_synced
+
+    store_submissions(cf_handle, submissions, now)
+    record_cache_result('submissions', 'upstream')
+    return 'upstream', now
+
+
+async def sync_user_submissions_async(cf_handle, force=False, ttl=None):
+    """sync_user_submissions() for the ASGI app: upstream awaited, DB work on run_db"""
+    due, last_synced, latest_id = await run_db(_sync_state, cf_handle, force, ttl)
+    if not due:
+        record_cache_result('submissions', 'cache')
+        return 'cache', last_synced
+
+    now = time.time()
+    submissions = await _fetch_new_submissions_async(cf_handle, latest_id)
+    if _upstream_unavailable(submissions):
+        return 'stale', last_synced
+
+    await run_db(store_submissions, cf_handle, submissions, now)
+    record_cache_result('submissions', 'upstream')
+    return 'upstream', now
@@ -0,0 +1,307 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from services.catalog_snapshot import snapshots, in_memory_snapshot
+from services.database import get_db_connection
+from services.resilience import isolated, mark_stale
+from services.submission_sync import solved_problem_ids, sync_user_submissions
+from models.problem import fetch_problem_dicts
+from utils.config import Config
+
+METHODS = ('greedy', 'beam')
+ORDERS = ('ascending', 'descending')
+# Covering one more required tag beats any difference in problem quality
+COVERAGE_WEIGHT = 10.0
+# Seeded noise so equally good sets vary between seeds
+JITTER = 0.3
+RATING_STEP = 100
+
+
+class ContestSpec:
+    """A validated virtual-contest request"""
+
+    def __init__(self, slots, tags, handles, method, beam_width, seed, min_solved, ascending):
+        self.slots = slots
+        self.tags = tags
+        self.handles = handles
+        self.method = method
+        self.beam_width = beam_width
+        self.seed = seed
+        self.min_solved = min_solved
+        self.ascending = ascending
+
+
+def _int_field(data, name, default=None, minimum=None, maximum=None):
+    value = data.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{name} must be an integer")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValueError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def _tag_list(data, name):
+    tags = data.get(name) or []
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError(f"{name} must be a list of tags")
+    return [tag.strip() for tag in tags if tag.strip()]
+
+
+def _even_slots(count, rating_min, rating_max):
+    """count slots stepping from rating_min to rating_max, each with its own window"""
+    if count == 1:
+        return [{'rating_min': rating_min, 'rating_max': rating_max, 'tags': []}]
+    step = (rating_max - rating_min) / (count - 1)
+    slots = []
+    for i in range(count):
+        target = int(round((rating_min + i * step) / RATING_STEP) * RATING_STEP)
+        half = max(RATING_STEP, int(step // 2 // RATING_STEP * RATING_STEP))
+        slots.append({
+            'rating_min': max(rating_min, target - half),
+            'rating_max': min(rating_max, target + half),
+            'tags': []
+        })
+    return slots
+
+
+def parse_contest_spec(data):
+    """ContestSpec from a request body; raises ValueError on invalid input.
+
+    Either `slots` ([{rating_min, rating_max, tags}]) or `count` with
+    `rating_min`/`rating_max` (spread evenly) describe the problems; `tags`
+    must be covered by the set as a whole and `handles` must not have
+    solved any of them.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+
+    if data.get('slots') is not None:
+        raw_slots = data['slots']
+        if not isinstance(raw_slots, list) or not raw_slots:
+            raise ValueError('slots must be a non-empty list')
+        slots = []
+        for raw in raw_slots:
+            if not isinstance(raw, dict):
+                raise ValueError('Each slot must be an object')
+            slot_min = _int_field(raw, 'rating_min', 800, 0, 4000)
+            slot_max = _int_field(raw, 'rating_max', 3500, 0, 4000)
+            if slot_min > slot_max:
+                raise ValueError('Slot rating_min is above its rating_max')
+            slots.append({'rating_min': slot_min, 'rating_max': slot_max, 'tags': _tag_list(raw, 'tags')})
+    else:
+        count = _int_field(data, 'count', 6, 1)
+        rating_min = _int_field(data, 'rating_min', 800, 0, 4000)
+        rating_max = _int_field(data, 'rating_max', 3500, 0, 4000)
+        if rating_min > rating_max:
+            raise ValueError('rating_min is above rating_max')
+        slots = _even_slots(count, rating_min, rating_max)
+
+    if len(slots) > Config.VIRTUAL_CONTEST_MAX_PROBLEMS:
+        raise ValueError(f"At most {Config.VIRTUAL_CONTEST_MAX_PROBLEMS} problems per contest")
+
+    handles = data.get('handles') or []
+    if not isinstance(handles, list) or not all(isinstance(h, str) and h.strip() for h in handles):
+        raise ValueError('handles must be a list of Codeforces handles')
+    handles = list(dict.fromkeys(h.strip() for h in handles))
+    if len(handles) > Config.VIRTUAL_CONTEST_MAX_HANDLES:
+        raise ValueError(f"At most {Config.VIRTUAL_CONTEST_MAX_HANDLES} handles")
+
+    method = data.get('method', 'beam')
+    if method not in METHODS:
+        raise ValueError(f"method must be one of: {', '.join(METHODS)}")
+
+    order = data.get('order', 'ascending')
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of: {', '.join(ORDERS)}")
+
+    seed = _int_field(data, 'seed', None, 0, 2 ** 32 - 1)
+    return ContestSpec(
+        slots=slots,
+        tags=_tag_list(data, 'tags'),
+        handles=handles,
+        method=method,
+        beam_width=_int_field(data, 'beam_width', Config.VIRTUAL_CONTEST_BEAM_WIDTH, 1, 64),
+        seed=random.randrange(2 ** 32) if seed is None else seed,
+        min_solved=_int_field(data, 'min_solved', 0, 0),
+        ascending=order == 'ascending'
+    )
+
+
+def _sync_participants(handles):
+    """{handle: source} after syncing every handle's submissions concurrently"""
+    if not handles:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(handles), thread_name_prefix='participants') as executor:
+        futures = [executor.submit(isolated(sync_user_submissions), handle) for handle in handles]
+        results = [future.result() for future in futures]
+    # Syncs ran on other threads; carry their staleness over to this request
+    if any(source == 'stale' for source, _ in results):
+        mark_stale()
+    # last_synced None: nothing stored and Codeforces unreachable
+    return {handle: source if last_synced is not None else None for handle, (source, last_synced) in zip(handles, results)}
+
+
+def _tag_masks(snapshot, tags):
+    index = {tag: bit for bit, tag in enumerate(snapshot.tags)}
+    unknown = [tag for tag in tags if tag not in index]
+    if unknown:
+        raise ValueError(f"Unknown tags: {', '.join(unknown)}")
+    return [index[tag] for tag in tags]
+
+
+def _slot_pool(snapshot, slot, slot_bits, excluded, min_solved, rng):
+    """Candidates of one slot as arrays (ids, ratings, tag_bits, quality), best first"""
+    import numpy as np
+
+    lo, hi = snapshot.rating_range(max(slot['rating_min'], 1), slot['rating_max'])
+    ids = np.asarray(snapshot.ids[lo:hi])
+    ratings = np.asarray(snapshot.ratings[lo:hi])
+    bits = np.asarray(snapshot.tag_bits[lo:hi])
+    solved = np.asarray(snapshot.solved_counts[lo:hi])
+
+    keep = ~np.isin(ids, excluded) & (solved >= min_solved)
+    mask = np.uint64(sum(1 << bit for bit in slot_bits))
+    if slot_bits:
+        keep &= (bits & mask) == mask
+    ids, ratings, bits, solved = ids[keep], ratings[keep], bits[keep], solved[keep]
+    if not len(ids):
+        return None
+
+    # Closeness to the middle of the slot, popularity as a proxy for a
+    # well-tested statement, and seeded jitter
+    center = (slot['rating_min'] + slot['rating_max']) / 2
+    half = max((slot['rating_max'] - slot['rating_min']) / 2, 1)
+    fit = 1 - np.abs(ratings - center) / (half + RATING_STEP)
+    popularity = np.log1p(solved) / max(np.log1p(solved.max()), 1)
+    quality = fit + 0.5 * popularity + JITTER * rng.random(len(ids))
+
+    order = np.argsort(-quality, kind='stable')[:Config.VIRTUAL_CONTEST_POOL_SIZE]
+    return ids[order], ratings[order], bits[order], quality[order]
+
+
+def beam_search(pools, required_bits, width, ascending):
+    """Pick one candidate per pool maximising required-tag coverage, then quality.
+
+    Keeps the `width` best partial sets after every slot; width 1 is greedy.
+    Empty pools leave their slot unfilled. Returns (picks, covered_bits)
+    with picks[i] an index into pools[i] or None.
+    """
+    import numpy as np
+
+    # (score, picks, covered bits, last rating, chosen ids)
+    beam = [(0.0, (), frozenset(), 0, frozenset())]
+    for pool in pools:
+        if pool is None:
+            beam = [(score, picks + (None,), covered, last, chosen) for score, picks, covered, last, chosen in beam]
+            continue
+        ids, ratings, bits, quality = pool
+        expansions = []
+        for score, picks, covered, last, chosen in beam:
+            needed = [bit for bit in required_bits if bit not in covered]
+            gain = np.zeros(len(ids))
+            for bit in needed:
+                gain += (bits >> np.uint64(bit)) & np.uint64(1)
+            scores = score + COVERAGE_WEIGHT * gain + quality
+            valid = ~np.isin(ids, list(chosen)) if chosen else np.ones(len(ids), dtype=bool)
+            if ascending:
+                valid &= ratings >= last
+            candidates = np.nonzero(valid)[0]
+            if not len(candidates):
+                expansions.append((score, picks + (None,), covered, last, chosen))
+                continue
+            best = candidates[np.argsort(-scores[candidates], kind='stable')[:width]]
+            for i in best:
+                problem_bits = int(bits[i])
+                newly = {bit for bit in needed if problem_bits >> bit & 1}
+                expansions.append((
+                    float(scores[i]), picks + (int(i),), covered | newly, int(ratings[i]), chosen | {int(ids[i])}
+                ))
+        # Stable sort on score only keeps ties in a seed-determined order
+        expansions.sort(key=lambda state: -state[0])
+        seen = set()
+        beam = []
+        for state in expansions:
+            if state[4] in seen:
+                continue
+            seen.add(state[4])
+            beam.append(state)
+            if len(beam) >= width:
+                break
+    _, picks, covered, _, _ = beam[0]
+    return picks, covered
+
+
+def _search(snapshot, spec, excluded):
+    """(required tag bits, slot pools, picks, covered bits) over one snapshot"""
+    import numpy as np
+
+    required_bits = _tag_masks(snapshot, spec.tags)
+    slot_bits = [_tag_masks(snapshot, slot['tags']) for slot in spec.slots]
+    rng = np.random.default_rng(spec.seed)
+    pools = [
+        _slot_pool(snapshot, slot, bits, excluded, spec.min_solved, rng)
+        for slot, bits in zip(spec.slots, slot_bits)
+    ]
+    width = 1 if spec.method == 'greedy' else spec.beam_width
+    picks, covered = beam_search(pools, required_bits, width, spec.ascending)
+    return required_bits, pools, picks, covered
+
+
+def _picked_ids(pools, picks):
+    return [int(pool[0][i]) for pool, i in zip(pools, picks) if i is not None]
+
+
+def _fetch_problems(ids):
+    """{id: problem dict} of the ids still in the problems table"""
+    if not ids:
+        return {}
+    conn = get_db_connection()
+    try:
+        rows = fetch_problem_dicts(conn, f"SELECT * FROM problems WHERE id IN ({','.join('?' * len(ids))})", ids)
+    finally:
+        conn.close()
+    return {problem['id']: problem for problem in rows}
+
+
+def build_virtual_contest(spec):
+    """Problem set for a ContestSpec, deterministic for a given seed and catalog"""
+    import numpy as np
+
+    participants = _sync_participants(spec.handles)
+    unavailable = [handle for handle, source in participants.items() if source is None]
+    if unavailable:
+        return {'error': f"Could not fetch submissions of: {', '.join(unavailable)}"}
+
+    excluded = np.asarray(solved_problem_ids(spec.handles), dtype=np.int64)
+    snapshot = snapshots.get()
+    if snapshot is not None:
+        required_bits, pools, picks, covered = _search(snapshot, spec, excluded)
+        picked_ids = _picked_ids(pools, picks)
+        problems = _fetch_problems(picked_ids)
+        if len(problems) < len(picked_ids):
+            # The mapped snapshot predates a catalog change; search the live table instead
+            snapshot = None
+    if snapshot is None:
+        required_bits, pools, picks, covered = _search(in_memory_snapshot(), spec, excluded)
+        problems = _fetch_problems(_picked_ids(pools, picks))
+
+    # Anything still missing was deleted mid-request; leave its slot unfilled
+    picks = [i if i is not None and int(pool[0][i]) in problems else None for pool, i in zip(pools, picks)]
+    selected = [
+        {**problems[int(pool[0][i])], 'slot': position}
+        for position, (pool, i) in enumerate(zip(pools, picks)) if i is not None
+    ]
+
+    covered_tags = [tag for tag, bit in zip(spec.tags, required_bits) if bit in covered]
+    return {
+        'problems': selected,
+        'slots': spec.slots,
+        'unfilled_slots': [position for position, i in enumerate(picks) if i is None],
+        'covered_tags': covered_tags,
+        'missing_tags': [tag for tag in spec.tags if tag not in covered_tags],
+        'excluded_solved': int(len(excluded)),
+        'participants': participants,
+        'method': spec.method,
+        'seed': spec.seed
+    }
@@ -0,0 +1,118 @@
+import importlib
+import threading
+import time
+from utils.config import Config
+
+
+class Warmup:
+    """Prepares a fresh worker in the background; /api/ready reports progress.
+
+    Each step is recorded with its duration and outcome. A failed step does
+    not block readiness when the worker can serve without it (e.g. no
+    snapshot means falling back to SQL).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps = []
+        self._thread = None
+        self.results = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def add_step(self, name, fn):
+        """Register fn() -> JSON-able detail, run in order by start()"""
+        self._steps.append((name, fn))
+
+    def start(self, background=True):
+        with self._lock:
+            if self._thread is not None or self.started_at is not None:
+                return
+            self.started_at = time.time()
+            if background:
+                self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+                self._thread.start()
+                return
+        self._run()
+
+    def _run(self):
+        for name, fn in self._steps:
+            start = time.perf_counter()
+            try:
+                detail = fn()
+                result = {'ok': True, 'detail': detail}
+            except Exception as e:
+                print(f"Warm-up step {name} failed: {str(e)}")
+                result = {'ok': False, 'error': str(e)}
+            result['seconds'] = round(time.perf_counter() - start, 4)
+            with self._lock:
+                self.results[name] = result
+        self.finished_at = time.time()
+
+    @property
+    def ready(self):
+        return self.finished_at is not None
+
+    def status(self):
+        with self._lock:
+            results = dict(self.results)
+        return {
+            'ready': self.ready,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'warm_seconds': round(self.finished_at - self.started_at, 4) if self.ready else None,
+            'steps': results,
+            'pending': [name for name, _ in self._steps if name not in results]
+        }
+
+
+def _import_numpy():
+    return importlib.import_module('numpy').__version__
+
+
+def _load_catalog_snapshot():
+    from services.catalog_snapshot import snapshots
+
+    snapshot = snapshots.load()
+    if snapshot is None and Config.SNAPSHOT_BUILD_ON_START:
+        # No build step ran; export once so later workers can map it
+        snapshot = snapshots.refresh()
+    return snapshot.summary() if snapshot is not None else None
+
+
+def _map_model_artifact():
+    from services.ml_service import recommendation_engine
+
+    return recommendation_engine.reload()
+
+
+def _map_similarity_index():
+    from services.similar_problems import similar_problems
+
+    return similar_problems.reload()
+
+
+def _warm_candidate_bands():
+    from services.candidate_cache import candidate_cache
+
+    return candidate_cache.warm()
+
+
+def _build_missing_ladders():
+    from services.ladders import build_ladders, ladders_built
+
+    # Normally built after each import; covers a DB populated before ladders existed.
+    # Every worker runs this at startup; the first one to get the write lock builds.
+    if ladders_built():
+        return 'present'
+    return build_ladders(only_if_missing=True) or 'present'
+
+
+# Global instance
+warmup = Warmup()
+warmup.add_step('numpy', _import_numpy)
+warmup.add_step('catalog_snapshot', _load_catalog_snapshot)
+warmup.add_step('model_artifact', _map_model_artifact)
+warmup.add_step('similar_problems', _map_similarity_index)
+warmup.add_step('ladders', _build_missing_ladders)
+warmup.add_step('candidate_bands', _warm_candidate_bands)
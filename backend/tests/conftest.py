@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Tests import the backend packages the way the app does (from backend/);
+# ml/ lives at the repository root
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.append(os.path.dirname(BACKEND))
+os.environ.setdefault('CF_RATE_LIMITER', 'local')
+os.environ.setdefault('CF_MIN_REQUEST_INTERVAL', '0')
+os.environ.setdefault('WARMUP_IN_BACKGROUND', 'false')
@@ -0,0 +1,45 @@
+import threading
+import numpy as np
+from ml.artifact import current_version, find_key, open_artifact, pack_sorted_keys, write_artifact
+from services.ml_service import UserItemMatrix, matrix_from_artifact, save_matrix_artifact
+
+
+def test_sorted_keys_lookup():
+    rows, order = pack_sorted_keys(['tourist', 'petr', 'a', 'benq'])
+    keys = ['tourist', 'petr', 'a', 'benq']
+    for position, key in enumerate(keys):
+        assert order[find_key(rows, key)] == position
+    assert find_key(rows, 'nobody') is None
+    assert find_key(rows, 'a-much-longer-handle-than-any') is None
+
+
+def test_concurrent_writers_get_distinct_versions(tmp_path):
+    versions = []
+    barrier = threading.Barrier(4)
+
+    def build():
+        barrier.wait()
+        versions.append(write_artifact(str(tmp_path), 'model', {'x': np.arange(10)}, keep=10)[0])
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(versions) == [1, 2, 3, 4]
+    assert current_version(str(tmp_path), 'model') == 4
+
+
+def test_mapped_matrix_matches_built_matrix(tmp_path):
+    users = ['Alice', 'bob', 'Carol']
+    indptr = np.array([0, 2, 4, 5])
+    indices = np.array([0, 1, 1, 2, 0], dtype=np.int32)
+    built = UserItemMatrix(users, [101, 102, 103], indptr, indices)
+    save_matrix_artifact(built, str(tmp_path))
+
+    mapped = matrix_from_artifact(open_artifact(str(tmp_path), 'user_item'))
+    assert isinstance(mapped.items, np.ndarray)
+    for i, handle in enumerate(users):
+        assert mapped.position(handle.upper()) == built.position(handle) == i
+        assert mapped.users[i] == handle
+    assert mapped.position('dave') is None
@@ -0,0 +1,69 @@
+import threading
+import time
+import pytest
+from services.database import init_db
+from services.jobs import JobManager, IO
+from utils.config import Config
+
+
+def add(a, b=1):
+    return {'sum': a + b}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    init_db()
+
+
+def test_job_is_visible_from_another_worker(db):
+    finished = threading.Event()
+    submitting, polling = JobManager(), JobManager()
+    submitting.register('add', add, pool=IO, on_result=lambda result: finished.set() or result)
+    job = submitting.submit('add', {'a': 2, 'b': 3})
+    assert finished.wait(5)
+
+    for _ in range(100):
+        polled = polling.get(job['id'])
+        if polled['status'] == 'done':
+            break
+        time.sleep(0.01)
+    assert polled['result'] == {'sum': 5}
+    assert polled['params'] == {'a': 2, 'b': 3}
+
+
+def test_params_are_checked_against_the_task_signature(db):
+    manager = JobManager()
+    manager.register('add', add, pool=IO)
+    with pytest.raises(ValueError):
+        manager.submit('add', {'a': 1, 'c': 2})
+    with pytest.raises(ValueError):
+        manager.submit('add', {})
+
+
+def crash():
+    import os
+    os._exit(1)
+
+
+def test_broken_process_pool_is_replaced(db, monkeypatch):
+    monkeypatch.setattr(Config, 'JOB_OFFLOAD_ENABLED', True)
+    monkeypatch.setattr(Config, 'JOB_PROCESS_WORKERS', 1)
+    manager = JobManager()
+    manager.register('crash', crash)
+    manager.register('add', add)
+
+    crashed = manager.submit('crash')
+    for _ in range(500):
+        if manager.get(crashed['id'])['status'] == 'failed':
+            break
+        time.sleep(0.01)
+    assert manager.get(crashed['id'])['status'] == 'failed'
+
+    job = manager.submit('add', {'a': 1})
+    for _ in range(1000):
+        job = manager.get(job['id'])
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    assert job['result'] == {'sum': 2}
@@ -0,0 +1,22 @@
+from services.metrics import MetricsRegistry
+
+
+def test_histogram_lines_follow_bucket_order_per_label_set():
+    registry = MetricsRegistry()
+    registry.describe('latency_seconds', 'histogram', 'Latency', buckets=(2.5, 10.0))
+    registry.observe('latency_seconds', 1.0, {'route': 'b'})
+    registry.observe('latency_seconds', 5.0, {'route': 'a'})
+
+    lines = [line for line in registry.render().splitlines() if not line.startswith('#')]
+    assert lines == [
+        'latency_seconds_bucket{route="a",le="2.5"} 0',
+        'latency_seconds_bucket{route="a",le="10"} 1',
+        'latency_seconds_bucket{route="a",le="+Inf"} 1',
+        'latency_seconds_sum{route="a"} 5',
+        'latency_seconds_count{route="a"} 1',
+        'latency_seconds_bucket{route="b",le="2.5"} 1',
+        'latency_seconds_bucket{route="b",le="10"} 1',
+        'latency_seconds_bucket{route="b",le="+Inf"} 1',
+        'latency_seconds_sum{route="b"} 1',
+        'latency_seconds_count{route="b"} 1',
+    ]
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+import pytest
+from services.codeforces_api import CodeforcesAPI
+from services.rate_limiter import LocalRateLimiter
+from services.resilience import breakers, CircuitBreaker, CLOSED, HALF_OPEN, OPEN, TRIAL
+from utils.config import Config
+
+
+class FakeTransport:
+    """Answers every call with the next item of `answers` (an exception is raised)"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def get(self, endpoint, params):
+        self.calls += 1
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+OK = (200, {'status': 'OK', 'result': [{'id': 1}]})
+CALL_LIMIT = (200, {'status': 'FAILED', 'comment': 'Call limit exceeded'})
+
+
+class NoSlotLimiter(LocalRateLimiter):
+    def reserve(self, priority=None, deadline=None):
+        return None
+
+
+def _half_open(endpoint):
+    """Registry breaker for endpoint, opened long enough ago to allow a trial"""
+    breaker = breakers.get(endpoint)
+    breaker.state = OPEN
+    breaker.opened_at = time.time() - breaker.reset_timeout - 1
+    breaker._trial_in_flight = False
+    return breaker
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(Config, 'CF_CALL_LIMIT_PENALTY', 0)
+    monkeypatch.setattr(Config, 'CF_BACKOFF_BASE', 0)
+
+
+def test_trial_is_granted_once():
+    breaker = CircuitBreaker('test.once', failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow() == TRIAL
+    assert not breaker.allow()
+    breaker.release_trial()
+    assert breaker.allow() == TRIAL
+
+
+def test_deadline_exit_releases_trial():
+    breaker = _half_open('test.deadline')
+    api = CodeforcesAPI(transport=FakeTransport(OK), limiter=NoSlotLimiter(0))
+    assert api._make_request('test.deadline', {}, deadline=time.time()) is None
+    assert breaker.state == HALF_OPEN
+
+    api.limiter = LocalRateLimiter(0)
+    assert api._make_request('test.deadline', {}) == [{'id': 1}]
+    assert breaker.state == CLOSED
+
+
+def test_call_limit_trial_releases_breaker():
+    breaker = _half_open('test.call_limit')
+    api = CodeforcesAPI(transport=FakeTransport(CALL_LIMIT, OK), limiter=LocalRateLimiter(0))
+    assert api._make_request('test.call_limit', {}) is None
+    assert api._make_request('test.call_limit', {}) == [{'id': 1}]
+    assert breaker.state == CLOSED
+
+
+def test_unexpected_error_releases_trial():
+    breaker = _half_open('test.error')
+    api = CodeforcesAPI(transport=FakeTransport(ValueError('boom'), OK), limiter=LocalRateLimiter(0))
+    with pytest.raises(ValueError):
+        api._make_request('test.error', {})
+    assert api._make_request('test.error', {}) == [{'id': 1}]
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_async_trial_releases_breaker():
+    pytest.importorskip('httpx')
+    from services.async_codeforces_api import AsyncCodeforcesAPI
+
+    class SlowTransport:
+        async def get(self, endpoint, params):
+            await asyncio.sleep(10)
+
+    breaker = _half_open('test.cancel')
+    api = AsyncCodeforcesAPI(transport=SlowTransport(), limiter=CodeforcesAPI(FakeTransport(OK), LocalRateLimiter(0)))
+
+    async def cancel_trial():
+        task = asyncio.create_task(api._make_request('test.cancel', {}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert breaker.allow() == TRIAL
+
+
+def test_sync_recovers_after_stale_answer_on_same_thread(tmp_path, monkeypatch):
+    from services import submission_sync
+    from services.database import init_db
+    from services.cf_transport import fixture_key
+    from services.resilience import last_good
+
+    monkeypatch.setattr(Config, 'DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(Config, 'CF_MAX_RETRIES', 0)
+    init_db()
+
+    submission = {'id': 7, 'problem': {'contestId': 1, 'index': 'A'}, 'verdict': 'OK', 'creationTimeSeconds': 1}
+    down = (503, {})
+    transport = FakeTransport(down)
+    api = CodeforcesAPI(transport=transport, limiter=LocalRateLimiter(0))
+    monkeypatch.setattr(submission_sync, 'cf_api', api)
+    # A last-good answer exists, so the plain client would serve it as stale
+    last_good.put(fixture_key('user.status', {'handle': 'tourist', 'from': 1}), [submission])
+
+    sources = []
+
+    def run():
+        sources.append(submission_sync.sync_user_submissions('tourist', force=True)[0])
+        transport.answers = [(200, {'status': 'OK', 'result': [submission]})]
+        breakers.get('user.status').record_success()
+        sources.append(submission_sync.sync_user_submissions('tourist', force=True)[0])
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert sources == ['stale', 'upstream']
+
+
+def test_isolated_call_keeps_stale_mark_off_the_pool_thread():
+    from concurrent.futures import ThreadPoolExecutor
+    from services.rate_limiter import BACKGROUND, current_priority, upstream_priority
+    from services.resilience import isolated, is_stale, mark_stale
+
+    def mark():
+        mark_stale()
+        return current_priority(), is_stale()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with upstream_priority(BACKGROUND):
+            assert executor.submit(isolated(mark)).result() == (BACKGROUND, True)
+        assert executor.submit(is_stale).result() is False
+    assert not is_stale()
+
+
+def test_bulk_answers_stay_out_of_last_good_cache():
+    from services.cf_transport import fixture_key
+    from services.resilience import last_good
+
+    page = (200, {'status': 'OK', 'result': {'problems': [], 'rows': []}})
+    api = CodeforcesAPI(transport=FakeTransport(page), limiter=LocalRateLimiter(0))
+    api.get_contest_standings(4242, count=5000, start=1)
+    params = {'contestId': 4242, 'from': 1, 'count': 5000, 'showUnofficial': False}
+    assert last_good.get(fixture_key('contest.standings', params)) is None
@@ -0,0 +1,22 @@
+import hmac
+from functools import wraps
+from flask import request, jsonify
+from utils.config import Config
+
+def is_admin_request(req=None):
+    """True when the request carries the configured admin key"""
+    req = req or request
+    if not Config.ADMIN_KEY:
+        return False
+    supplied = req.headers.get('X-Admin-Key') or req.args.get('admin_key') or ''
+    # Bytes: compare_digest rejects str with non-ASCII characters
+    return hmac.compare_digest(supplied.encode('utf-8'), Config.ADMIN_KEY.encode('utf-8'))
+
+def admin_required(view):
+    """Reject requests without a valid admin key"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Admin key required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,103 @@
+import gzip
+from utils.config import Config
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+# Content types worth compressing; images and archives already are
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'text/', 'image/svg+xml', 'application/manifest+json'
+)
+
+
+def accepts_encoding(accept_encoding, coding):
+    """True if an Accept-Encoding header value allows coding (q > 0)"""
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() not in (coding, '*'):
+            continue
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def available_encodings():
+    """Encodings this process can produce, preferred first"""
+    return ('br', 'gzip') if brotli is not None and Config.BROTLI_ENABLED else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding the client accepts, or None"""
+    for coding in available_encodings():
+        if accepts_encoding(accept_encoding, coding):
+            return coding
+    return None
+
+
+def compressible(content_type):
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body, encoding, level=None):
+    """body compressed with encoding ('br' or 'gzip'); level None means the on-the-fly default"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=Config.BROTLI_QUALITY if level is None else level)
+    return gzip.compress(body, compresslevel=Config.GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def compress_body(body, accept_encoding, content_type='application/json'):
+    """(body, content_encoding) with body compressed when worthwhile and accepted.
+
+    Small bodies are sent as is; the framing would eat the savings.
+    """
+    if len(body) < Config.COMPRESSION_MIN_SIZE or not compressible(content_type):
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+def init_compression(app):
+    """Compress Flask responses on the fly.
+
+    Register before hooks that need to see the uncompressed body (after
+    request hooks run in reverse order).
+    """
+    from flask import request
+
+    @app.after_request
+    def _compress(response):
+        if not Config.COMPRESSION_ENABLED:
+            return response
+        if response.direct_passthrough or 'Content-Encoding' in response.headers or response.status_code < 200:
+            return response
+        response.vary.add('Accept-Encoding')
+        body, encoding = compress_body(
+            response.get_data(), request.headers.get('Accept-Encoding'), response.mimetype
+        )
+        if encoding:
+            response.set_data(body)
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def compress_starlette_response(response, accept_encoding):
+    """Same as init_compression's hook, for a Starlette Response with a body"""
+    body = getattr(response, 'body', None)
+    if not Config.COMPRESSION_ENABLED or body is None or 'content-encoding' in response.headers:
+        return response
+    response.headers['Vary'] = 'Accept-Encoding'
+    body, encoding = compress_body(body, accept_encoding, response.media_type)
+    if encoding:
+        response.body = body
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(body))
+    return response
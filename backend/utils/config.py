@@ -8,3 +8,166 @@ class Config:
     DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///cf_recommender.db'
     CODEFORCES_API_BASE = 'https://codeforces.com/api'
     DEBUG = True
+
+    # Incremental problem ingestion (/api/problems/fetch-latest)
+    INGEST_MAX_CONTESTS = int(os.environ.get('INGEST_MAX_CONTESTS', 20))
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 4))
+    INGEST_TIME_BUDGET = float(os.environ.get('INGEST_TIME_BUDGET', 20))
+    # A contest fetched without rated problems waits this long (doubling per attempt) before the next try
+    INGEST_RETRY_INTERVAL = float(os.environ.get('INGEST_RETRY_INTERVAL', 86400))
+    INGEST_RETRY_MAX = float(os.environ.get('INGEST_RETRY_MAX', 30 * 86400))
+
+    # Locally cached rating history (/api/users/<handle>/rating-history)
+    RATING_HISTORY_TTL = int(os.environ.get('RATING_HISTORY_TTL', 3600))
+    RATING_TREND_WINDOW = int(os.environ.get('RATING_TREND_WINDOW', 20))
+
+    # Locally synced submissions and activity metrics
+    SUBMISSION_SYNC_TTL = int(os.environ.get('SUBMISSION_SYNC_TTL', 300))
+    SUBMISSION_SYNC_PAGE = int(os.environ.get('SUBMISSION_SYNC_PAGE', 100))
+    ACTIVITY_HEATMAP_DAYS = int(os.environ.get('ACTIVITY_HEATMAP_DAYS', 365))
+
+    # Background job executor (/api/jobs)
+    JOB_PROCESS_WORKERS = int(os.environ.get('JOB_PROCESS_WORKERS', 2))
+    JOB_THREAD_WORKERS = int(os.environ.get('JOB_THREAD_WORKERS', 4))
+    JOB_HISTORY_LIMIT = int(os.environ.get('JOB_HISTORY_LIMIT', 200))
+    JOB_OFFLOAD_ENABLED = os.environ.get('JOB_OFFLOAD_ENABLED', 'true').lower() == 'true'
+
+    # Metrics and slow-request sampling (/api/metrics)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    SLOW_REQUEST_THRESHOLD = float(os.environ.get('SLOW_REQUEST_THRESHOLD', 1.0))
+    SLOW_REQUEST_SAMPLE_INTERVAL = float(os.environ.get('SLOW_REQUEST_SAMPLE_INTERVAL', 0.1))
+    SLOW_REQUEST_MAX_SAMPLES = int(os.environ.get('SLOW_REQUEST_MAX_SAMPLES', 50))
+    SLOW_REQUEST_STACK_DEPTH = int(os.environ.get('SLOW_REQUEST_STACK_DEPTH', 12))
+    SLOW_REQUEST_HISTORY = int(os.environ.get('SLOW_REQUEST_HISTORY', 50))
+
+    # Admin-only endpoints and the request profiler (/api/profiles)
+    ADMIN_KEY = os.environ.get('ADMIN_KEY')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+    PROFILE_SLOW_THRESHOLD = float(os.environ.get('PROFILE_SLOW_THRESHOLD', 2.0))
+    PROFILE_MAX_TRACES = int(os.environ.get('PROFILE_MAX_TRACES', 100))
+
+    # Codeforces transport: http, record (to CF_FIXTURE_ARCHIVE) or replay (from it)
+    CF_TRANSPORT = os.environ.get('CF_TRANSPORT', 'http')
+    CF_FIXTURE_ARCHIVE = os.environ.get('CF_FIXTURE_ARCHIVE', 'fixtures/codeforces.jsonl.gz')
+    CF_REPLAY_LATENCY = float(os.environ.get('CF_REPLAY_LATENCY', 0.0))
+    CF_REPLAY_JITTER = float(os.environ.get('CF_REPLAY_JITTER', 0.0))
+    CF_REPLAY_TIMEOUT_RATE = float(os.environ.get('CF_REPLAY_TIMEOUT_RATE', 0.0))
+    CF_REPLAY_FAILED_RATE = float(os.environ.get('CF_REPLAY_FAILED_RATE', 0.0))
+    CF_REPLAY_503_RATE = float(os.environ.get('CF_REPLAY_503_RATE', 0.0))
+    CF_REPLAY_SEED = int(os.environ['CF_REPLAY_SEED']) if os.environ.get('CF_REPLAY_SEED') else None
+
+    # Upstream resilience: retries, circuit breaker, stale fallback
+    CF_MAX_RETRIES = int(os.environ.get('CF_MAX_RETRIES', 2))
+    CF_BACKOFF_BASE = float(os.environ.get('CF_BACKOFF_BASE', 0.5))
+    CF_BACKOFF_CAP = float(os.environ.get('CF_BACKOFF_CAP', 4.0))
+    CF_CALL_LIMIT_PENALTY = float(os.environ.get('CF_CALL_LIMIT_PENALTY', 2.0))
+    CF_BREAKER_FAILURES = int(os.environ.get('CF_BREAKER_FAILURES', 5))
+    CF_BREAKER_RESET = float(os.environ.get('CF_BREAKER_RESET', 30.0))
+    CF_STALE_CACHE_SIZE = int(os.environ.get('CF_STALE_CACHE_SIZE', 256))
+
+    # Serving (serve.py / asgi.py)
+    SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('SERVER_PORT', 5000))
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 2))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))
+    ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 8))
+    CF_ASYNC_MAX_CONNECTIONS = int(os.environ.get('CF_ASYNC_MAX_CONNECTIONS', 100))
+
+    # Cold start: catalog snapshot and warm-up
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'snapshots')
+    SNAPSHOT_KEEP = int(os.environ.get('SNAPSHOT_KEEP', 2))
+    SNAPSHOT_CHECK_INTERVAL = float(os.environ.get('SNAPSHOT_CHECK_INTERVAL', 5.0))
+    SNAPSHOT_BUILD_ON_START = os.environ.get('SNAPSHOT_BUILD_ON_START', 'true').lower() == 'true'
+    WARMUP_IN_BACKGROUND = os.environ.get('WARMUP_IN_BACKGROUND', 'true').lower() == 'true'
+
+    # Model artifacts (ml/artifact.py)
+    MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR', 'artifacts')
+    MODEL_ARTIFACT_KEEP = int(os.environ.get('MODEL_ARTIFACT_KEEP', 3))
+    MODEL_CHECK_INTERVAL = float(os.environ.get('MODEL_CHECK_INTERVAL', 5.0))
+
+    # Response encoding: auto (orjson when installed), orjson or stdlib
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+    # Served-recommendation log and its retention
+    RECOMMENDATION_LOG_ENABLED = os.environ.get('RECOMMENDATION_LOG_ENABLED', 'true').lower() == 'true'
+    RECOMMENDATION_FLUSH_SIZE = int(os.environ.get('RECOMMENDATION_FLUSH_SIZE', 200))
+    RECOMMENDATION_FLUSH_INTERVAL = float(os.environ.get('RECOMMENDATION_FLUSH_INTERVAL', 2.0))
+    RECOMMENDATION_MAX_PENDING = int(os.environ.get('RECOMMENDATION_MAX_PENDING', 10000))
+    RECOMMENDATION_RETENTION_DAYS = int(os.environ.get('RECOMMENDATION_RETENTION_DAYS', 30))
+    RECOMMENDATION_RETENTION_CHUNK = int(os.environ.get('RECOMMENDATION_RETENTION_CHUNK', 500))
+    RECOMMENDATION_RETENTION_PAUSE = float(os.environ.get('RECOMMENDATION_RETENTION_PAUSE', 0.05))
+    RECOMMENDATION_ROLLUP = os.environ.get('RECOMMENDATION_ROLLUP', 'true').lower() == 'true'
+
+    # Codeforces rate limit: shared (one budget per host, via CF_RATE_LIMIT_DB) or local
+    CF_RATE_LIMITER = os.environ.get('CF_RATE_LIMITER', 'shared')
+    CF_RATE_LIMIT_DB = os.environ.get('CF_RATE_LIMIT_DB', 'rate_limit.db')
+    CF_MIN_REQUEST_INTERVAL = float(os.environ.get('CF_MIN_REQUEST_INTERVAL', 0.5))
+    CF_BACKGROUND_LOOKAHEAD = float(os.environ.get('CF_BACKGROUND_LOOKAHEAD', 1))
+    CF_BULK_LOOKAHEAD = float(os.environ.get('CF_BULK_LOOKAHEAD', 0))
+
+    # Recommendation candidates shared per rating band
+    RECOMMENDATION_BAND_WIDTH = int(os.environ.get('RECOMMENDATION_BAND_WIDTH', 50))
+    RECOMMENDATION_BAND_SIZE = int(os.environ.get('RECOMMENDATION_BAND_SIZE', 300))
+    RECOMMENDATION_BANDS_CACHED = int(os.environ.get('RECOMMENDATION_BANDS_CACHED', 64))
+    RECOMMENDATION_BAND_TTL = float(os.environ.get('RECOMMENDATION_BAND_TTL', 600))
+    # Bands prebuilt during warm-up, busiest (most users) first
+    RECOMMENDATION_WARM_BANDS = int(os.environ.get('RECOMMENDATION_WARM_BANDS', 16))
+    RECOMMENDATION_SHORTLIST_FACTOR = int(os.environ.get('RECOMMENDATION_SHORTLIST_FACTOR', 4))
+    RECOMMENDATION_WEAK_TAG_BOOST = float(os.environ.get('RECOMMENDATION_WEAK_TAG_BOOST', 0.2))
+
+    # Profile bundle (/api/users/<handle>/bundle)
+    PROFILE_BUNDLE_THREADS = int(os.environ.get('PROFILE_BUNDLE_THREADS', 8))
+    PROFILE_BUNDLE_RECOMMENDATIONS = int(os.environ.get('PROFILE_BUNDLE_RECOMMENDATIONS', 5))
+    PROFILE_BUNDLE_RATING_POINTS = int(os.environ.get('PROFILE_BUNDLE_RATING_POINTS', 100))
+
+    # Live updates (server-sent events at /api/users/<handle>/live)
+    LIVE_POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', 5.0))
+    LIVE_KEEPALIVE_INTERVAL = float(os.environ.get('LIVE_KEEPALIVE_INTERVAL', 15.0))
+    LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', 100))
+    LIVE_RECOMMENDATIONS = int(os.environ.get('LIVE_RECOMMENDATIONS', 5))
+
+    # Admission control for expensive routes (services/admission.py)
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_CONCURRENCY = int(os.environ.get('ADMISSION_CONCURRENCY', 4))
+    ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 16))
+    ADMISSION_MAX_WAIT = float(os.environ.get('ADMISSION_MAX_WAIT', 2.0))
+    ADMISSION_CLIENT_RATE = float(os.environ.get('ADMISSION_CLIENT_RATE', 2.0))
+    ADMISSION_CLIENT_BURST = float(os.environ.get('ADMISSION_CLIENT_BURST', 10))
+    ADMISSION_MAX_CLIENTS = int(os.environ.get('ADMISSION_MAX_CLIENTS', 10000))
+    ADMISSION_TRUST_FORWARDED = os.environ.get('ADMISSION_TRUST_FORWARDED', 'false').lower() == 'true'
+    ADMISSION_STALE_ENTRIES = int(os.environ.get('ADMISSION_STALE_ENTRIES', 1024))
+    ADMISSION_STALE_MAX_AGE = float(os.environ.get('ADMISSION_STALE_MAX_AGE', 600))
+
+    # Response compression (gzip, plus brotli when installed) and the frontend build
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    BROTLI_ENABLED = os.environ.get('BROTLI_ENABLED', 'true').lower() == 'true'
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))
+    FRONTEND_BUILD_DIR = os.environ.get('FRONTEND_BUILD_DIR', '../frontend/build')
+    SERVE_FRONTEND = os.environ.get('SERVE_FRONTEND', 'true').lower() == 'true'
+    FRONTEND_CACHE_MAX_AGE = int(os.environ.get('FRONTEND_CACHE_MAX_AGE', 31536000))
+
+    # Virtual-contest builder (POST /api/problems/virtual-contest)
+    VIRTUAL_CONTEST_MAX_PROBLEMS = int(os.environ.get('VIRTUAL_CONTEST_MAX_PROBLEMS', 12))
+    VIRTUAL_CONTEST_MAX_HANDLES = int(os.environ.get('VIRTUAL_CONTEST_MAX_HANDLES', 10))
+    VIRTUAL_CONTEST_BEAM_WIDTH = int(os.environ.get('VIRTUAL_CONTEST_BEAM_WIDTH', 8))
+    VIRTUAL_CONTEST_POOL_SIZE = int(os.environ.get('VIRTUAL_CONTEST_POOL_SIZE', 200))
+
+    # Practice ladders (GET /api/problems/ladder/<band>)
+    LADDER_SIZE = int(os.environ.get('LADDER_SIZE', 100))
+
+    # Contest standings ingestion into the interactions table (scripts/ingest_standings.py)
+    STANDINGS_PAGE_SIZE = int(os.environ.get('STANDINGS_PAGE_SIZE', 5000))
+    STANDINGS_MAX_CONTESTS = int(os.environ.get('STANDINGS_MAX_CONTESTS', 50))
+    STANDINGS_TIME_BUDGET = float(os.environ.get('STANDINGS_TIME_BUDGET', 300))
+    MODEL_USE_STANDINGS = os.environ.get('MODEL_USE_STANDINGS', 'true').lower() == 'true'
+
+    # Similar problems: MinHash LSH over tag and solver sets (GET /api/problems/<id>/similar)
+    SIMILAR_NUM_PERM = int(os.environ.get('SIMILAR_NUM_PERM', 64))
+    SIMILAR_TAG_BANDS = int(os.environ.get('SIMILAR_TAG_BANDS', 32))
+    SIMILAR_SOLVER_BANDS = int(os.environ.get('SIMILAR_SOLVER_BANDS', 16))
+    SIMILAR_TAG_WEIGHT = float(os.environ.get('SIMILAR_TAG_WEIGHT', 0.4))
+    SIMILAR_USE_SOLVERS = os.environ.get('SIMILAR_USE_SOLVERS', 'true').lower() == 'true'
+    SIMILAR_MIN_SOLVERS = int(os.environ.get('SIMILAR_MIN_SOLVERS', 5))
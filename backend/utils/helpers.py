@@ -301,3 +301,45 @@ def get_next_rating_milestone(current_rating: int) -> tuple:
             return milestone, milestone - current_rating
     
     return None, 0  # Already at highest level
+
+def parse_fields(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a `fields=` query parameter into a selection tree
+    "cf_handle,analysis.weak_tags" -> {'cf_handle': None, 'analysis': {'weak_tags': None}}
+    None (everything) when the parameter is absent or empty; None as a
+    value selects the whole subtree
+    """
+    if not value:
+        return None
+    
+    tree = {}
+    for path in value.split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break  # parent already selected whole
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+def subfields(fields: Optional[Dict[str, Any]], key: str) -> Optional[set]:
+    """Names selected under key: None when key is selected whole, empty when not at all"""
+    if fields is None:
+        return None
+    if key not in fields:
+        return set()
+    return None if fields[key] is None else set(fields[key])
+
+def select_fields(data: Any, fields: Optional[Dict[str, Any]]) -> Any:
+    """Project data onto a parse_fields() tree; lists are projected element-wise"""
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [select_fields(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: select_fields(data[key], sub) for key, sub in fields.items() if key in data}
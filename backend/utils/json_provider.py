@@ -0,0 +1,68 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+from utils.config import Config
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+# Datetimes go through `default` so both encoders format them the same way;
+# int dict keys (e.g. per-day buckets) are allowed like with json.dumps
+_ORJSON_OPTIONS = (
+    (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY)
+    if orjson is not None else 0
+)
+
+
+def fast_encoder_enabled():
+    if Config.JSON_ENCODER == 'stdlib':
+        return False
+    if Config.JSON_ENCODER == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_ENCODER=orjson but orjson is not installed')
+    return orjson is not None
+
+
+def dumps_bytes(obj, default, sort_keys=True, indent=False):
+    """UTF-8 JSON for obj: orjson when enabled and installed, else json.dumps"""
+    if fast_encoder_enabled():
+        options = _ORJSON_OPTIONS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=options)
+
+    if indent:
+        text = json.dumps(obj, default=default, sort_keys=sort_keys, indent=2)
+    else:
+        text = json.dumps(obj, default=default, sort_keys=sort_keys, separators=(',', ':'))
+    return text.encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through dumps_bytes; same defaults as Flask's provider.
+
+    Differences with orjson: non-ASCII characters are emitted as UTF-8
+    instead of \\u escapes, and NaN/Infinity become null.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or not fast_encoder_enabled():
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, self.default, self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or not fast_encoder_enabled():
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, self.default, self.sort_keys, indent=indent) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    app.json = FastJSONProvider(app)
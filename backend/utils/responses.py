@@ -0,0 +1,24 @@
+from datetime import date
+from starlette.responses import Response
+from utils.json_provider import dumps_bytes
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_response(body, status_code=200):
+    """Starlette counterpart of flask.jsonify: sorted keys, compact separators"""
+    content = dumps_bytes(body, _default) + b'\n'
+    return Response(content, status_code=status_code, media_type='application/json')
+
+
+def sse_event(event, data):
+    """One text/event-stream message; data None gives a keep-alive comment"""
+    if data is None:
+        return f": {event}\n\n".encode('utf-8')
+    return b'event: ' + event.encode('utf-8') + b'\ndata: ' + dumps_bytes(data, _default) + b'\n\n'
@@ -0,0 +1,319 @@
+"""Versioned, memory-mapped model artifacts.
+
+File layout (little-endian):
+
+    magic      8 bytes   b'CFMODEL\\0'
+    format     uint32    FORMAT_VERSION
+    header_len uint32    length of the JSON header
+    header     JSON      {"name", "version", "created", "meta", "arrays": {name: {dtype, shape, offset}}}
+    padding    up to the next ALIGNMENT boundary
+    arrays     raw C-order data, each starting on an ALIGNMENT boundary
+
+Arrays are exposed as zero-copy views over a read-only mmap, so every
+worker process on a host shares the same physical pages through the OS
+page cache. Writers produce `<name>-<version>.cfa` next to a `<name>.current`
+pointer that is replaced atomically; ArtifactWatcher picks up new versions
+without a restart.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b'CFMODEL\0'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+SUPPORTED_DTYPES = ('float32', 'float64', 'int32', 'int64', 'uint8', 'uint64')
+_PREAMBLE = struct.Struct('<8sII')
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _pointer_path(directory, name):
+    return os.path.join(directory, f"{name}.current")
+
+
+def pack_strings(strings):
+    """(uint8 blob, int64 offsets) for a list of str, storable as arrays"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(blob, offsets):
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def string_at(blob, offsets, i):
+    """The i-th string of a pack_strings pair, decoded on its own"""
+    return blob[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+
+def pack_sorted_keys(keys):
+    """(uint8 (n, width) rows, int32 order) for a list of str keys.
+
+    Rows hold the UTF-8 keys sorted bytewise and NUL-padded to one width;
+    order[r] is the position in `keys` of row r. Lookups with find_key
+    binary-search the mapped rows without decoding them.
+    """
+    encoded = [key.encode('utf-8') for key in keys]
+    width = max((len(key) for key in encoded), default=0) or 1
+    fixed = np.array(encoded, dtype=f'S{width}') if encoded else np.zeros(0, dtype=f'S{width}')
+    order = np.argsort(fixed, kind='stable').astype(np.int32)
+    rows = np.frombuffer(fixed[order].tobytes(), dtype=np.uint8).reshape(len(encoded), width)
+    return rows, order
+
+
+def find_key(rows, key):
+    """Row index of key in pack_sorted_keys rows, or None"""
+    encoded = key.encode('utf-8')
+    if not len(rows) or len(encoded) > rows.shape[1]:
+        return None
+    sorted_keys = rows.view(f'S{rows.shape[1]}').ravel()
+    i = int(np.searchsorted(sorted_keys, encoded))
+    return i if i < len(sorted_keys) and sorted_keys[i] == encoded else None
+
+
+def current_version(directory, name):
+    """Version the pointer names, or None"""
+    try:
+        with open(_pointer_path(directory, name)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _reserve_version(directory, name):
+    """(version, path) of a new version file, created empty with O_EXCL.
+
+    Two builds running at once can't claim the same version: the loser of
+    the create race moves on to the next number.
+    """
+    version = (current_version(directory, name) or 0) + 1
+    while True:
+        path = os.path.join(directory, f"{name}-{version}.cfa")
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return version, path
+        except FileExistsError:
+            version += 1
+
+
+def write_artifact(directory, name, arrays, meta=None, keep=3):
+    """Write arrays as the next version of artifact `name` and make it current.
+
+    The file is written and fsynced under a temporary name before being
+    renamed into place, then the pointer is swapped with os.replace, so
+    readers see either the old or the new version, never a partial one.
+    Returns (version, path).
+    """
+    os.makedirs(directory, exist_ok=True)
+    version, path = _reserve_version(directory, name)
+
+    prepared = {}
+    for array_name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        if values.dtype.name not in SUPPORTED_DTYPES:
+            raise ArtifactError(f"{array_name}: unsupported dtype {values.dtype}")
+        prepared[array_name] = values.astype(values.dtype.newbyteorder('<'), copy=False)
+
+    # Array offsets are relative to the data start until the header size is known
+    relative = {}
+    position = 0
+    for array_name, values in prepared.items():
+        position = _aligned(position)
+        relative[array_name] = position
+        position += values.nbytes
+
+    header = {
+        'name': name,
+        'version': version,
+        'created': time.time(),
+        'meta': meta or {},
+        'arrays': {}
+    }
+    data_start = 0
+    while True:
+        header['arrays'] = {
+            array_name: {'dtype': values.dtype.name, 'shape': list(values.shape), 'offset': data_start + relative[array_name]}
+            for array_name, values in prepared.items()
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        needed = _aligned(_PREAMBLE.size + len(header_bytes))
+        if needed <= data_start:
+            break
+        data_start = needed
+    layout = header['arrays']
+
+    # Unique per writer: threads of one process share a pid
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}-{version}.", suffix='.tmp')
+    try:
+        # mkstemp creates 0600; workers running as other users must be able to map it
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for array_name, values in prepared.items():
+                f.seek(layout[array_name]['offset'])
+                f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Give up the reserved (still empty) version file
+        for leftover in (tmp_path, path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+
+    _publish(directory, name, version)
+    _prune(directory, name, keep, version)
+    return version, path
+
+
+def _publish(directory, name, version):
+    """Point CURRENT at version unless a concurrent build published a later one.
+
+    The check and the replace happen under an exclusive lock on
+    `<name>.lock`, so a slower writer can't move the pointer backwards.
+    """
+    with open(os.path.join(directory, f"{name}.lock"), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if (current_version(directory, name) or 0) >= version:
+                return
+            fd, pointer_tmp = tempfile.mkstemp(dir=directory, prefix=f"{name}.current.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(str(version))
+                os.replace(pointer_tmp, _pointer_path(directory, name))
+            except BaseException:
+                if os.path.exists(pointer_tmp):
+                    os.remove(pointer_tmp)
+                raise
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _prune(directory, name, keep, current):
+    versions = []
+    prefix = f"{name}-"
+    for filename in os.listdir(directory):
+        if filename.startswith(prefix) and filename.endswith('.cfa'):
+            try:
+                versions.append(int(filename[len(prefix):-4]))
+            except ValueError:
+                continue
+    for version in sorted(versions, reverse=True)[keep:]:
+        if version != current:
+            # Processes still mapping it keep their pages until they swap
+            try:
+                os.remove(os.path.join(directory, f"{name}-{version}.cfa"))
+            except OSError:
+                pass
+
+
+class Artifact:
+    """A mapped artifact file; arrays are read-only views into the mapping"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ArtifactError(f"{path}: not a model artifact")
+        if format_version != FORMAT_VERSION:
+            raise ArtifactError(f"{path}: unsupported format {format_version}")
+
+        self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_len].decode('utf-8'))
+        self.name = self.header['name']
+        self.version = self.header['version']
+        self.meta = self.header['meta']
+        self.arrays = {}
+        for array_name, entry in self.header['arrays'].items():
+            dtype = np.dtype(entry['dtype']).newbyteorder('<')
+            count = int(np.prod(entry['shape'])) if entry['shape'] else 1
+            view = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=entry['offset'])
+            self.arrays[array_name] = view.reshape(entry['shape'])
+
+    def __getitem__(self, array_name):
+        return self.arrays[array_name]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arrays.values())
+
+    def summary(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'created': self.header['created'],
+            'path': self.path,
+            'mapped_bytes': self.nbytes,
+            'meta': self.meta
+        }
+
+
+def open_artifact(directory, name):
+    """Map the current version of `name`, or None when there is none"""
+    version = current_version(directory, name)
+    if version is None:
+        return None
+    return Artifact(os.path.join(directory, f"{name}-{version}.cfa"))
+
+
+class ArtifactWatcher:
+    """Keeps the newest version of an artifact mapped in this process.
+
+    check() looks at the pointer at most every `check_interval` seconds and,
+    when the version changed, maps the new file and calls on_load(artifact).
+    The previous mapping is released once nothing references it anymore.
+    """
+
+    def __init__(self, directory, name, on_load, check_interval=5.0):
+        self.directory = directory
+        self.name = name
+        self.on_load = on_load
+        self.check_interval = check_interval
+        self.artifact = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def check(self, force=False):
+        now = time.time()
+        if not force and now - self._checked_at < self.check_interval:
+            return self.artifact
+        if not self._lock.acquire(blocking=force):
+            # Another thread is already swapping
+            return self.artifact
+        try:
+            self._checked_at = now
+            version = current_version(self.directory, self.name)
+            if version is None or (self.artifact is not None and self.artifact.version == version):
+                return self.artifact
+            try:
+                artifact = Artifact(os.path.join(self.directory, f"{self.name}-{version}.cfa"))
+            except (OSError, ArtifactError) as e:
+                print(f"Could not map {self.name} v{version}: {str(e)}")
+                return self.artifact
+            self.on_load(artifact)
+            self.artifact = artifact
+            return artifact
+        finally:
+            self._lock.release()
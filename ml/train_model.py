@@ -0,0 +1,34 @@
+"""Build the collaborative-filtering model and publish it as a model artifact.
+
+    python ml/train_model.py [--artifact-dir DIR]
+
+Run from backend/ so the default database and artifact paths resolve the
+same way as for the server. Running workers map the new version on their
+next check; no restart needed.
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import argparse
+import json
+from services.ml_service import build_interaction_matrix, save_matrix_artifact
+from utils.config import Config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the user-item model and write a new artifact version')
+    parser.add_argument('--artifact-dir', default=Config.MODEL_ARTIFACT_DIR)
+    args = parser.parse_args()
+
+    matrix = build_interaction_matrix()
+    if matrix is None:
+        print('No interaction data to build the model from', file=sys.stderr)
+        sys.exit(1)
+
+    version, path = save_matrix_artifact(matrix, args.artifact_dir)
+    print(json.dumps({'version': version, 'path': path, **matrix.summary()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()